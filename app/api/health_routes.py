@@ -0,0 +1,26 @@
+from aiohttp import web
+from app.services.speech_model_service import VoskModelRegistry
+from app.services.speech_grammar import get_speech_grammar
+
+class HealthAPI:
+  def __init__(self, model_registry: VoskModelRegistry, session_manager=None, loop_monitor=None):
+    self.model_registry = model_registry
+    self.session_manager = session_manager
+    self.loop_monitor = loop_monitor
+    
+  def setup_routes(self, app: web.Application):
+    app.router.add_get('/health', self.get_health)
+    
+  async def get_health(self, request: web.Request) -> web.Response:
+    speech_model = self.model_registry.status()
+    grammar = get_speech_grammar()
+    
+    # La API HTTP está disponible aunque el modelo de voz aún se esté cargando
+    return web.json_response({
+      "status": "ok" if speech_model["ready"] else "degraded",
+      "speech_model": speech_model,
+      "speech_grammar": grammar.stats() if grammar is not None else None,
+      "event_loop": self.loop_monitor.stats() if self.loop_monitor is not None else None,
+      "active_sessions": len(self.session_manager) if self.session_manager is not None else 0,
+      "sessions": self.session_manager.stats() if self.session_manager is not None else []
+    })
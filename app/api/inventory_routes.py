@@ -1,16 +1,23 @@
 from aiohttp import web
+import asyncio
 import json
 import traceback
-from app.services.inventory_service import InventoryService
+from contextlib import aclosing
+from datetime import datetime
+from app.services.async_inventory_service import AsyncInventoryService
+from app.api.responses import json_response
+from app.services.inventory_service import INVENTORY_TREE_BY_DEPTH
+from app.utils.serializers import dumps_json
 
 class InventoryAPI:
-  def __init__(self, inventory_service: InventoryService):
+  def __init__(self, inventory_service: AsyncInventoryService):
     self.inventory_service = inventory_service
     
   def setup_routes(self, app: web.Application):
     app.router.add_get("/", lambda request: web.json_response({"status": "ok"}))
     app.router.add_post('/api/v1/inventory/enter', self.enter_inventory)
     app.router.add_get('/api/v1/inventories', self.get_inventories)
+    app.router.add_get('/api/v1/inventories/export', self.export_inventories)
     app.router.add_get('/api/v1/inventory', self.get_inventory)
     
     app.router.add_get('/api/v1/context', self.get_context)
@@ -19,7 +26,7 @@ class InventoryAPI:
     try:
       data = await request.json()
     except json.JSONDecodeError:
-      return web.json_response({
+      return json_response({
         "success": False,
         "error": "Invalid JSON"
       }, status=400)
@@ -28,7 +35,7 @@ class InventoryAPI:
     missing_fields = [f for f in required_fields if f not in data]
     
     if missing_fields:
-      return web.json_response({
+      return json_response({
         "success": False,
         "error": f"Missing required fields: {', '.join(missing_fields)}"
       }, status=400)
@@ -38,11 +45,12 @@ class InventoryAPI:
       inventory_type_id = data['inventory_type_id']
       event_id = data['event_id']
       
-      inventory = self.inventory_service.enter_inventory(
-        property_id, inventory_type_id, event_id
+      # session_id (senderId del inspector) opcional: sin él se usa el contexto por defecto
+      inventory = await self.inventory_service.enter_inventory(
+        property_id, inventory_type_id, event_id, session_id=data.get('session_id')
       )
 
-      return web.json_response({
+      return json_response({
         "success": True,
         "inventory": inventory,
         "metadata": {
@@ -54,64 +62,181 @@ class InventoryAPI:
     except Exception as e:
       print("❌ Error en enter_inventory:", str(e))
       traceback.print_exc()
-      return web.json_response({
+      return json_response({
         "success": False,
         "error": str(e)
       }, status=500)
       
   async def get_inventories(self, request: web.Request) -> web.Response:
     try:
-      inventories = self.inventory_service.get_inventories()
+      params = self._parse_list_params(request.query)
+    except ValueError as e:
+      return json_response({
+        "success": False,
+        "error": str(e)
+      }, status=400)
+      
+    try:
+      inventories, next_cursor = await self.inventory_service.list_inventories(**params)
       
-      return web.json_response({
+      return json_response({
         "success": True,
         "inventories": inventories,
-        "count": len(inventories)
+        "count": len(inventories),
+        "next_cursor": next_cursor
       })
+    except ValueError as e:
+      return json_response({
+        "success": False,
+        "error": str(e)
+      }, status=400)
     except Exception as e:
       print("❌ Error en get_inventories:", str(e))
       traceback.print_exc()
-      return web.json_response({
+      return json_response({
         "success": False,
         "error": str(e)
       }, status=500)
       
+  async def export_inventories(self, request: web.Request) -> web.StreamResponse:
+    """Exporta todos los inventarios en streaming (JSON o NDJSON con ?format=ndjson)."""
+    try:
+      params = self._parse_list_params(request.query)
+    except ValueError as e:
+      return json_response({
+        "success": False,
+        "error": str(e)
+      }, status=400)
+      
+    # La exportación recorre todo: sin paginación ni proyección
+    for name in ('limit', 'cursor', 'fields'):
+      params.pop(name, None)
+    
+    ndjson = request.query.get('format', 'json').lower() == 'ndjson'
+    depth = params.get('depth', 3)
+    if depth not in INVENTORY_TREE_BY_DEPTH:
+      return json_response({
+        "success": False,
+        "error": f"depth debe estar entre 0 y {max(INVENTORY_TREE_BY_DEPTH)}"
+      }, status=400)
+    
+    response = web.StreamResponse(headers={
+      "Content-Type": "application/x-ndjson" if ndjson else "application/json"
+    })
+    await response.prepare(request)
+    
+    count = 0
+    try:
+      if not ndjson:
+        await response.write(b'{"success":true,"inventories":[')
+        
+      async with aclosing(self.inventory_service.iter_inventories(**params)) as batches:
+        async for batch in batches:
+          if not batch:
+            continue
+          encoded = [dumps_json(inventory) for inventory in batch]
+          if ndjson:
+            chunk = b"\n".join(encoded) + b"\n"
+          else:
+            chunk = (b"," if count else b"") + b",".join(encoded)
+          count += len(batch)
+          await response.write(chunk)
+          
+      if not ndjson:
+        await response.write(b'],"count":' + str(count).encode() + b'}')
+    except (ConnectionResetError, asyncio.CancelledError):
+      print(f"🔌 Exportación interrumpida por el cliente tras {count} inventarios")
+      raise
+    except Exception as e:
+      # Los headers ya se enviaron: solo queda registrar el error y cortar el stream
+      print("❌ Error en export_inventories:", str(e))
+      traceback.print_exc()
+      
+    await response.write_eof()
+    return response
+      
+  def _parse_list_params(self, query) -> dict:
+    """Traduce los query params de /api/v1/inventories a argumentos de list_inventories."""
+    params = {}
+    
+    for name in ('limit', 'depth', 'property_id', 'event_id'):
+      if query.get(name):
+        try:
+          params[name] = int(query[name])
+        except ValueError:
+          raise ValueError(f"El parámetro {name} debe ser entero")
+        
+    if query.get('cursor'):
+      params['cursor'] = query['cursor']
+      
+    if query.get('synced'):
+      synced = query['synced'].lower()
+      if synced not in ('true', 'false', '1', '0'):
+        raise ValueError("El parámetro synced debe ser true o false")
+      params['synced'] = synced in ('true', '1')
+      
+    if query.get('updated_since'):
+      try:
+        params['updated_since'] = datetime.fromisoformat(query['updated_since'])
+      except ValueError:
+        raise ValueError("El parámetro updated_since debe ser una fecha ISO 8601")
+      
+    if query.get('fields'):
+      params['fields'] = [f.strip() for f in query['fields'].split(',') if f.strip()]
+      
+    return params
+      
   async def get_inventory(self, request: web.Request) -> web.Response:
     try:
       inventory_id = request.query.get('inventory_id')
 
       if not inventory_id:
-        return web.json_response({
+        return json_response({
           "success": False,
           "error": "Missing required parameter: inventory_id"
         }, status=400)
 
-      inventory = self.inventory_service.get_inventory(inventory_id)
+      inventory = await self.inventory_service.get_inventory(inventory_id)
 
-      return web.json_response({
+      return json_response({
         "success": True,
         "inventory": inventory
       })
 
+    except ValueError as e:
+      return json_response({
+        "success": False,
+        "error": str(e)
+      }, status=400)
+    except LookupError as e:
+      return json_response({
+        "success": False,
+        "error": str(e)
+      }, status=404)
     except Exception as e:
       print("❌ Error en get_inventory:", str(e))
       traceback.print_exc()
-      return web.json_response({
+      return json_response({
         "success": False,
         "error": str(e)
       }, status=500)
         
   async def get_context(self, request: web.Request) -> web.Response:
     try:
-      context = self.inventory_service.get_context()
-      return web.json_response({
+      context = await self.inventory_service.get_context(request.query.get('session_id'))
+      return json_response({
         "success": True,
         "context": context,
       })
-    except:
+    except LookupError as e:
+      return json_response({
+        "success": False,
+        "error": str(e)
+      }, status=404)
+    except Exception as e:
       print("❌ Error en get_context:", str(e))
       traceback.print_exc()
-      return web.json_response({
+      return json_response({
         "success": False,
         "error": str(e)
       }, status=500)
\ No newline at end of file
@@ -0,0 +1,21 @@
+from aiohttp import web
+from app.utils.metrics import REGISTRY, MetricsRegistry
+
+class MetricsAPI:
+  def __init__(self, session_manager=None, registry: MetricsRegistry = REGISTRY):
+    self.registry = registry
+    if session_manager is not None:
+      # Se calcula al exponer las métricas, sin mantener un contador aparte
+      registry.gauge("peer_sessions_active", "Sesiones WebRTC activas").set_function(
+        lambda: len(session_manager)
+      )
+    
+  def setup_routes(self, app: web.Application):
+    app.router.add_get('/metrics', self.get_metrics)
+    
+  async def get_metrics(self, request: web.Request) -> web.Response:
+    # Formato de texto de Prometheus
+    return web.Response(
+      body=self.registry.render().encode("utf-8"),
+      headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"}
+    )
@@ -0,0 +1,10 @@
+from aiohttp import web
+from app.utils.serializers import dumps_json
+
+def json_response(data, status: int = 200) -> web.Response:
+  """Equivalente a web.json_response que codifica directamente a bytes con el encoder rápido."""
+  return web.Response(
+    body=dumps_json(data),
+    status=status,
+    content_type="application/json"
+  )
@@ -0,0 +1,39 @@
+from aiohttp import web
+import traceback
+from app.api.responses import json_response
+from app.services.sync_service import SyncService, SyncError
+
+class SyncAPI:
+  def __init__(self, sync_service: SyncService):
+    self.sync_service = sync_service
+    
+  def setup_routes(self, app: web.Application):
+    app.router.add_post('/api/v1/sync', self.run_sync)
+    app.router.add_get('/api/v1/sync', self.get_sync_status)
+    
+  async def run_sync(self, request: web.Request) -> web.Response:
+    try:
+      stats = await self.sync_service.run_once()
+      return json_response({
+        "success": stats["success"],
+        "sync": stats
+      }, status=200 if stats["success"] else 502)
+    except SyncError as e:
+      return json_response({
+        "success": False,
+        "error": str(e)
+      }, status=400)
+    except Exception as e:
+      print("❌ Error en run_sync:", str(e))
+      traceback.print_exc()
+      return json_response({
+        "success": False,
+        "error": str(e)
+      }, status=500)
+      
+  async def get_sync_status(self, request: web.Request) -> web.Response:
+    return json_response({
+      "success": True,
+      "upstream_url": self.sync_service.upstream_url or None,
+      "last_run": self.sync_service.last_run
+    })
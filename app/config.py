@@ -0,0 +1,145 @@
+import os
+import tempfile
+
+
+def _env_int(name, default):
+    value = os.getenv(name)
+    return int(value) if value not in (None, "") else default
+
+
+def _env_float(name, default):
+    value = os.getenv(name)
+    return float(value) if value not in (None, "") else default
+
+
+def _env_bool(name, default):
+    value = os.getenv(name)
+    if value in (None, ""):
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def _env_choice(name, default, choices):
+    """Valor de una lista cerrada; uno desconocido se avisa al arrancar y se usa el por defecto."""
+    value = os.getenv(name)
+    if value in (None, ""):
+        return default
+    value = value.strip().lower()
+    if value not in choices:
+        print(f"⚠️ {name}={value!r} no es válido (opciones: {', '.join(choices)}); se usa {default!r}")
+        return default
+    return value
+
+
+# ============ RECONOCIMIENTO DE VOZ ============
+VOSK_MODEL_PATH = os.getenv(
+    "VOSK_MODEL_PATH",
+    "/usr/local/lib/python3.11/site-packages/vosk_model/vosk-model-small-es-0.42"
+)
+# Vosk requiere específicamente 16kHz
+VOSK_SAMPLE_RATE = 16000
+# Cargar el modelo en segundo plano al arrancar (si no, se carga con la primera sesión)
+VOSK_WARMUP = _env_bool("VOSK_WARMUP", True)
+# Modo gramática: el reconocedor solo considera los comandos, su vocabulario y los
+# nombres de espacios/elementos ya guardados (menos CPU y más precisión, pero no
+# reconoce nombres nuevos salvo los de VOSK_GRAMMAR_EXTRA_WORDS)
+VOSK_GRAMMAR_ENABLED = _env_bool("VOSK_GRAMMAR_ENABLED", False)
+VOSK_GRAMMAR_EXTRA_WORDS = [
+    w.strip() for w in os.getenv("VOSK_GRAMMAR_EXTRA_WORDS", "").split(",") if w.strip()
+]
+# Hilos dedicados a Vosk (KaldiRecognizer libera el GIL durante la decodificación)
+RECOGNITION_WORKERS = _env_int("RECOGNITION_WORKERS", min(4, os.cpu_count() or 1))
+# Chunks de audio en espera por sesión antes de aplicar backpressure al loop de audio
+RECOGNITION_QUEUE_SIZE = _env_int("RECOGNITION_QUEUE_SIZE", 8)
+# Con la cola llena: "block" frena el loop de audio, "drop" descarta el chunk
+RECOGNITION_OVERLOAD_POLICY = _env_choice("RECOGNITION_OVERLOAD_POLICY", "block", ("block", "drop"))
+# Ejecutar los comandos sin slot ("tomar foto", grabación) desde los resultados
+# parciales, sin esperar el fin de la frase; el resultado final no los repite
+COMMAND_EARLY_COMMIT = _env_bool("COMMAND_EARLY_COMMIT", False)
+# Resultados parciales consecutivos con la misma intención para confirmarla
+COMMAND_EARLY_COMMIT_PARTIALS = _env_int("COMMAND_EARLY_COMMIT_PARTIALS", 2)
+
+# ============ DETECCIÓN DE VOZ (VAD) ============
+# Descarta los chunks de silencio antes de enviarlos a Vosk
+VAD_ENABLED = _env_bool("VAD_ENABLED", True)
+# RMS mínimo (int16) para considerar voz; el umbral real se adapta al ruido de fondo
+VAD_MIN_RMS = _env_float("VAD_MIN_RMS", 300.0)
+VAD_NOISE_RATIO = _env_float("VAD_NOISE_RATIO", 2.5)
+# Chunks de ~0.3 s enviados después de la voz y antes de ella
+VAD_HANGOVER_CHUNKS = _env_int("VAD_HANGOVER_CHUNKS", 2)
+VAD_PREROLL_CHUNKS = _env_int("VAD_PREROLL_CHUNKS", 1)
+
+# ============ GRABACIÓN DE DEPURACIÓN ============
+# Guardar el audio que llega a Vosk (desactivado por defecto), un archivo por sesión
+AUDIO_DEBUG_RECORDING = _env_bool("AUDIO_DEBUG_RECORDING", False)
+AUDIO_DEBUG_DIR = os.getenv("AUDIO_DEBUG_DIR", os.path.join(tempfile.gettempdir(), "debug_audio"))
+# wav, flac u opus (las claves de RECORDER_FORMATS en app/media/audio_recorder.py)
+AUDIO_DEBUG_FORMAT = _env_choice("AUDIO_DEBUG_FORMAT", "wav", ("wav", "flac", "opus"))
+# Rotar el archivo al superar este tamaño de PCM o esta duración
+AUDIO_DEBUG_MAX_MB = _env_float("AUDIO_DEBUG_MAX_MB", 50.0)
+AUDIO_DEBUG_MAX_SECONDS = _env_int("AUDIO_DEBUG_MAX_SECONDS", 600)
+# Retención del directorio: al abrir un archivo se borran los más antiguos (0 = sin límite)
+AUDIO_DEBUG_MAX_FILES = _env_int("AUDIO_DEBUG_MAX_FILES", 100)
+AUDIO_DEBUG_MAX_TOTAL_MB = _env_float("AUDIO_DEBUG_MAX_TOTAL_MB", 1024.0)
+# Frames en espera hacia el hilo escritor; si se llena, se descartan
+AUDIO_DEBUG_QUEUE_SIZE = _env_int("AUDIO_DEBUG_QUEUE_SIZE", 500)
+
+# ============ CAPTURA DE FOTOS ============
+CAPTURE_JPEG_QUALITY = _env_int("CAPTURE_JPEG_QUALITY", 95)
+# Hilos para convertir, codificar y escribir capturas fuera del event loop
+CAPTURE_ENCODER_WORKERS = _env_int("CAPTURE_ENCODER_WORKERS", 2)
+# Capturar el frame más nítido de los últimos N ms en vez del último recibido
+CAPTURE_BURST_ENABLED = _env_bool("CAPTURE_BURST_ENABLED", True)
+CAPTURE_BURST_WINDOW_MS = _env_int("CAPTURE_BURST_WINDOW_MS", 300)
+# Puntuar uno de cada N frames y conservar como máximo M frames puntuados
+CAPTURE_BURST_STRIDE = _env_int("CAPTURE_BURST_STRIDE", 2)
+CAPTURE_BURST_MAX_FRAMES = _env_int("CAPTURE_BURST_MAX_FRAMES", 8)
+# En modo perezoso la ráfaga termina antes de la ventana al tener N frames puntuados
+CAPTURE_BURST_MIN_FRAMES = _env_int("CAPTURE_BURST_MIN_FRAMES", 3)
+
+# ============ VIDEO ============
+# Modo perezoso: sin capturas pendientes recv() solo guarda la referencia al frame
+# nativo (YUV); la puntuación de nitidez corre solo durante la ventana de captura
+VIDEO_LAZY_MODE = _env_bool("VIDEO_LAZY_MODE", True)
+# En reposo (modo perezoso, sin captura pendiente) solo pasa 1 de cada N frames
+# por el pipeline; el resto se descarta sin tocarlo
+VIDEO_IDLE_FRAME_STRIDE = _env_int("VIDEO_IDLE_FRAME_STRIDE", 3)
+# Reenviar el video al cliente por el PeerConnection (obliga a re-codificar cada
+# frame). Sin él la answer queda en recvonly para el video, que los clientes que
+# solo envían aceptan; activarlo para clientes que muestran el video de vuelta
+VIDEO_LOOPBACK = _env_bool("VIDEO_LOOPBACK", False)
+
+# ============ BASE DE DATOS ============
+DB_PATH = os.getenv("DB_PATH", "/app/data/inventory.db")
+# Espera ante bloqueos de escritura antes de fallar con "database is locked"
+DB_BUSY_TIMEOUT_MS = _env_int("DB_BUSY_TIMEOUT_MS", 5000)
+DB_MMAP_SIZE = _env_int("DB_MMAP_SIZE", 256 * 1024 * 1024)
+# Páginas en caché por conexión (negativo = KiB)
+DB_CACHE_SIZE = _env_int("DB_CACHE_SIZE", -16000)
+DB_POOL_SIZE = _env_int("DB_POOL_SIZE", 5)
+DB_MAX_OVERFLOW = _env_int("DB_MAX_OVERFLOW", 10)
+# Formato de las claves UUID: "blob" (16 bytes) o "text" (36 caracteres, como antes
+# de la migración 2); al cambiarlo, los ids guardados se convierten al arrancar
+DB_UUID_STORAGE = _env_choice("DB_UUID_STORAGE", "blob", ("blob", "text"))
+# Hilos para las consultas de la API HTTP (fuera del event loop)
+DB_EXECUTOR_WORKERS = _env_int("DB_EXECUTOR_WORKERS", 4)
+
+# ============ SINCRONIZACIÓN ============
+# URL base del servidor central; vacío desactiva la sincronización
+SYNC_UPSTREAM_URL = os.getenv("SYNC_UPSTREAM_URL", "")
+SYNC_BATCH_SIZE = _env_int("SYNC_BATCH_SIZE", 200)
+SYNC_MAX_RETRIES = _env_int("SYNC_MAX_RETRIES", 3)
+# Espera base entre reintentos (se duplica en cada intento)
+SYNC_RETRY_BACKOFF = _env_float("SYNC_RETRY_BACKOFF", 1.0)
+SYNC_REQUEST_TIMEOUT = _env_float("SYNC_REQUEST_TIMEOUT", 30.0)
+SYNC_INTERVAL_SECONDS = _env_float("SYNC_INTERVAL_SECONDS", 60.0)
+
+# ============ MÉTRICAS ============
+# Cada cuánto se mide el retraso del event loop (segundos); 0 lo desactiva
+LOOP_LAG_INTERVAL = _env_float("LOOP_LAG_INTERVAL", 0.5)
+# Watchdog del event loop: si un bloqueo supera el umbral se muestrea la pila
+# del hilo del loop desde otro hilo para identificar la llamada responsable; 0 lo desactiva
+LOOP_STALL_THRESHOLD_MS = _env_float("LOOP_STALL_THRESHOLD_MS", 100)
+LOOP_STALL_SAMPLE_MS = _env_float("LOOP_STALL_SAMPLE_MS", 20)
+# Pilas responsables expuestas en /health
+LOOP_STALL_TOP = _env_int("LOOP_STALL_TOP", 10)
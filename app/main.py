@@ -3,8 +3,22 @@ from aiohttp import web
 from pathlib import Path
 
 from .signaling import sio, register_signaling_events
+from . import rtc
 from app.api.inventory_routes import InventoryAPI
+from app.api.health_routes import HealthAPI
+from app.api.sync_routes import SyncAPI
+from app.api.metrics_routes import MetricsAPI
+from app import config
 from app.services.inventory_service import InventoryService
+from app.services.async_inventory_service import AsyncInventoryService, shutdown_db_executor
+from app.services.session_context_cache import flush_session_context_caches
+from app.services.sync_service import SyncService
+from app.services.recognition_service import shutdown_recognition_executor
+from app.services.speech_model_service import get_vosk_model_registry
+from app.media.image_encoder import shutdown_jpeg_encoder
+from app.models.database import Base
+from app.utils.serializers import compile_serializers
+from app.utils.loop_monitor import LoopLagMonitor
 
 async def init_app():
     app = web.Application()
@@ -13,10 +27,43 @@ async def init_app():
     images_path.mkdir(parents=True, exist_ok=True)
     app.router.add_static("/images/", path=str(images_path), name="images")
 
+    # Planes de serialización precalculados para todos los modelos
+    compile_serializers(Base)
+    
     inventory_service = InventoryService()
-    inventory_api = InventoryAPI(inventory_service)
+    inventory_api = InventoryAPI(AsyncInventoryService(inventory_service))
     inventory_api.setup_routes(app)
     
+    sync_service = SyncService(inventory_service)
+    app["sync_service"] = sync_service
+    sync_api = SyncAPI(sync_service)
+    sync_api.setup_routes(app)
+    
+    metrics_api = MetricsAPI(rtc.session_manager)
+    metrics_api.setup_routes(app)
+    
+    # Retraso del event loop (en /metrics) y watchdog de bloqueos (en /health)
+    loop_monitor = LoopLagMonitor(
+        config.LOOP_LAG_INTERVAL,
+        stall_threshold=config.LOOP_STALL_THRESHOLD_MS / 1000,
+        sample_interval=config.LOOP_STALL_SAMPLE_MS / 1000,
+        top=config.LOOP_STALL_TOP,
+    )
+    app["loop_monitor"] = loop_monitor
+    
+    async def start_loop_monitor(app):
+        loop_monitor.start()
+    
+    async def stop_loop_monitor(app):
+        await loop_monitor.stop()
+    
+    app.on_startup.append(start_loop_monitor)
+    app.on_cleanup.append(stop_loop_monitor)
+    
+    model_registry = get_vosk_model_registry()
+    health_api = HealthAPI(model_registry, rtc.session_manager, loop_monitor)
+    health_api.setup_routes(app)
+    
     register_signaling_events()
     
     return app
@@ -30,13 +77,36 @@ async def main():
     await site.start()
     print("✅ API HTTP lista en http://localhost:8080")
     
+    # El modelo de voz se carga en segundo plano; la API no lo espera.
+    # warm_up no propaga errores: quedan en el status() del registro (/health)
+    warm_up_task = None
+    if config.VOSK_WARMUP:
+        warm_up_task = asyncio.create_task(get_vosk_model_registry().warm_up())
+    
+    # Sincronización periódica con el servidor central (si está configurado)
+    sync_task = None
+    if config.SYNC_UPSTREAM_URL:
+        sync_task = asyncio.create_task(app["sync_service"].run_forever())
+    
     try:
         print("🔌 Conectando al servidor de signaling...")
         await sio.connect("http://host.docker.internal:3000")
     except Exception as e:
         print(f"❌ Error al conectar con signaling: {e}")
     
-    await sio.wait()
+    try:
+        await sio.wait()
+    finally:
+        if warm_up_task:
+            warm_up_task.cancel()
+        if sync_task:
+            sync_task.cancel()
+        await rtc.session_manager.close_all()
+        shutdown_recognition_executor()
+        shutdown_jpeg_encoder()
+        shutdown_db_executor()
+        flush_session_context_caches()
+        await runner.cleanup()
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -0,0 +1,22 @@
+from .audio_buffer import PcmChunkRing, frame_samples
+from .vad import EnergyVadGate
+from .image_encoder import JpegEncoder, CaptureResult, get_jpeg_encoder
+from .frame_scoring import SharpFrameSelector, sharpness_score
+from .audio_recorder import AudioDebugRecorder, create_audio_recorder
+from .pipeline import MediaPipeline, Stage, Fanout
+
+__all__ = [
+    'PcmChunkRing',
+    'frame_samples',
+    'EnergyVadGate',
+    'JpegEncoder',
+    'CaptureResult',
+    'get_jpeg_encoder',
+    'SharpFrameSelector',
+    'sharpness_score',
+    'AudioDebugRecorder',
+    'create_audio_recorder',
+    'MediaPipeline',
+    'Stage',
+    'Fanout'
+]
@@ -0,0 +1,90 @@
+import numpy as np
+
+
+def frame_samples(frame):
+    """Vista int16 mono sobre las muestras de un av.AudioFrame, sin copiar cuando es posible.
+
+    - s16 mono: vista directa sobre el plano del frame.
+    - s16 estéreo (empaquetado o planar): downmix entero (L + R) >> 1.
+    - Otros formatos: conversión vía to_ndarray().
+    """
+    fmt = frame.format.name
+    channels = len(frame.layout.channels)
+    samples = frame.samples
+
+    if fmt == "s16":
+        # Los planos pueden traer padding al final: limitar por número de muestras
+        data = np.frombuffer(frame.planes[0], dtype=np.int16, count=samples * channels)
+        if channels == 1:
+            return data
+        interleaved = data.reshape(samples, channels)
+        return _downmix(interleaved[:, 0], interleaved[:, 1])
+
+    if fmt == "s16p":
+        left = np.frombuffer(frame.planes[0], dtype=np.int16, count=samples)
+        if channels == 1:
+            return left
+        right = np.frombuffer(frame.planes[1], dtype=np.int16, count=samples)
+        return _downmix(left, right)
+
+    chunk = frame.to_ndarray()
+    if chunk.ndim > 1:
+        chunk = chunk.reshape(-1) if chunk.shape[0] == 1 else chunk[0]
+    if chunk.dtype != np.int16:
+        if chunk.dtype.kind == "f":
+            chunk = np.clip(chunk, -1.0, 1.0) * 32767
+        chunk = chunk.astype(np.int16)
+    return chunk
+
+
+def _downmix(left, right):
+    mixed = np.add(left, right, dtype=np.int32)
+    np.right_shift(mixed, 1, out=mixed)
+    return mixed.astype(np.int16)
+
+
+class PcmChunkRing:
+    """Ring buffer preasignado de chunks PCM int16 para el recognizer.
+
+    Las muestras se copian una sola vez, dentro de un slot de tamaño fijo. Cuando
+    un slot se llena, `write` devuelve un memoryview sobre él que puede encolarse
+    sin más copias; el slot no se reutiliza hasta dar la vuelta al ring, por eso
+    `slots` debe cubrir los chunks en cola más el que se decodifica.
+    """
+
+    def __init__(self, chunk_samples, slots):
+        self.chunk_samples = chunk_samples
+        self.slots = slots
+        self._data = np.zeros((slots, chunk_samples), dtype=np.int16)
+        self._slot = 0
+        self._fill = 0
+
+    def __len__(self):
+        """Muestras acumuladas en el slot actual."""
+        return self._fill
+
+    def write(self, samples):
+        """Copia muestras en el ring y devuelve la lista de chunks completos (memoryviews)."""
+        ready = []
+        offset = 0
+        total = len(samples)
+        while offset < total:
+            n = min(self.chunk_samples - self._fill, total - offset)
+            self._data[self._slot, self._fill:self._fill + n] = samples[offset:offset + n]
+            self._fill += n
+            offset += n
+            if self._fill == self.chunk_samples:
+                ready.append(self._view(self._slot, self.chunk_samples))
+                self._slot = (self._slot + 1) % self.slots
+                self._fill = 0
+        return ready
+
+    def drain(self):
+        """Devuelve el chunk parcial actual (puede estar vacío) y reinicia el slot."""
+        view = self._view(self._slot, self._fill)
+        self._slot = (self._slot + 1) % self.slots
+        self._fill = 0
+        return view
+
+    def _view(self, slot, length):
+        return memoryview(self._data[slot, :length]).cast("B")
@@ -0,0 +1,247 @@
+import os
+import queue
+import re
+import threading
+import time
+import wave
+
+import numpy as np
+
+from app import config
+
+# formato -> (extensión, contenedor de PyAV, códec); "wav" usa el módulo wave
+RECORDER_FORMATS = {
+    "wav": ("wav", None, None),
+    "flac": ("flac", "flac", "flac"),
+    "opus": ("opus", "ogg", "libopus"),
+}
+
+_EXTENSIONS = tuple(f".{extension}" for extension, _, _ in RECORDER_FORMATS.values())
+
+_CLOSE = object()
+
+
+class _WavSegment:
+    def __init__(self, path, sample_rate):
+        self._file = wave.open(path, "wb")
+        self._file.setnchannels(1)
+        self._file.setsampwidth(2)
+        self._file.setframerate(sample_rate)
+
+    def write(self, pcm):
+        self._file.writeframes(pcm)
+
+    def close(self):
+        self._file.close()
+
+
+class _EncodedSegment:
+    """Segmento comprimido (FLAC u Opus) codificado con PyAV."""
+
+    def __init__(self, path, sample_rate, container_format, codec):
+        import av
+
+        self._av = av
+        self._sample_rate = sample_rate
+        self._container = av.open(path, "w", format=container_format)
+        self._stream = self._container.add_stream(codec, rate=sample_rate)
+        self._stream.layout = "mono"
+        self._pts = 0
+
+    def write(self, pcm):
+        samples = np.frombuffer(pcm, dtype=np.int16).reshape(1, -1)
+        frame = self._av.AudioFrame.from_ndarray(samples, format="s16", layout="mono")
+        frame.sample_rate = self._sample_rate
+        frame.pts = self._pts
+        self._pts += samples.shape[1]
+        for packet in self._stream.encode(frame):
+            self._container.mux(packet)
+
+    def close(self):
+        for packet in self._stream.encode(None):
+            self._container.mux(packet)
+        self._container.close()
+
+
+class AudioDebugRecorder:
+    """Grabación de depuración del audio de una sesión, escrita en un hilo propio.
+
+    write() solo copia el PCM a una cola acotada y nunca bloquea el event loop;
+    si el hilo escritor se atrasa, los bloques nuevos se descartan y se cuentan
+    en `dropped`. Los archivos se separan por sesión y rotan al superar
+    `max_bytes` de PCM o `max_seconds` de audio.
+
+    Antes de abrir cada archivo se borran las grabaciones más antiguas del
+    directorio (de cualquier sesión) hasta que queden menos de `max_files` y
+    ocupen como mucho `max_total_bytes`; 0 desactiva cada límite.
+    """
+
+    def __init__(self, directory, session_id, sample_rate, fmt="wav",
+                 max_bytes=50 * 1024 * 1024, max_seconds=600, queue_size=500,
+                 max_files=0, max_total_bytes=0):
+        if fmt not in RECORDER_FORMATS:
+            raise ValueError(f"Formato de grabación no soportado: {fmt}")
+        self.directory = directory
+        self.session_id = re.sub(r"[^A-Za-z0-9_.-]", "_", str(session_id))
+        self.sample_rate = sample_rate
+        self.format = fmt
+        self.max_bytes = max_bytes
+        self.max_seconds = max_seconds
+        self.max_files = max_files
+        self.max_total_bytes = max_total_bytes
+        self.files = []
+        self._segment_count = 0
+        self.dropped = 0
+        self.error = None
+
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._segment = None
+        self._segment_bytes = 0
+        self._closed = False
+        os.makedirs(directory, exist_ok=True)
+        self._thread = threading.Thread(
+            target=self._run, name=f"audio-recorder-{self.session_id}", daemon=True
+        )
+        self._thread.start()
+
+    def write(self, samples):
+        """Encola una copia del PCM int16 mono (bytes, memoryview o array)."""
+        if self._closed:
+            return
+        try:
+            self._queue.put_nowait(bytes(samples))
+        except queue.Full:
+            self.dropped += 1
+
+    def saturated(self):
+        return self._queue.full()
+
+    def close(self):
+        """Termina de escribir lo encolado y cierra el archivo actual (no bloquea)."""
+        if self._closed:
+            return
+        self._closed = True
+        # La señal de cierre debe entrar aunque la cola esté llena
+        while True:
+            try:
+                self._queue.put_nowait(_CLOSE)
+                return
+            except queue.Full:
+                try:
+                    self._queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+    def join(self, timeout=None):
+        self._thread.join(timeout)
+
+    def stats(self):
+        return {
+            "format": self.format,
+            "files": list(self.files),
+            "queued": self._queue.qsize(),
+            "dropped": self.dropped,
+            "error": self.error,
+        }
+
+    # Hilo escritor
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is _CLOSE:
+                break
+            if self.error is not None:
+                continue
+            try:
+                self._write(item)
+            except Exception as e:
+                # Un error de disco no debe afectar a la sesión: se deja de grabar
+                self.error = str(e)
+                print(f"⚠️ Grabación de depuración detenida ({self.session_id}): {e}")
+                self._close_segment()
+        self._close_segment()
+
+    def _write(self, pcm):
+        if self._segment is None or self._should_rotate():
+            self._close_segment()
+            self._open_segment()
+        self._segment.write(pcm)
+        self._segment_bytes += len(pcm)
+
+    def _should_rotate(self):
+        if self.max_bytes and self._segment_bytes >= self.max_bytes:
+            return True
+        return bool(self.max_seconds) and self._segment_bytes >= self.max_seconds * self.sample_rate * 2
+
+    def _open_segment(self):
+        extension, container_format, codec = RECORDER_FORMATS[self.format]
+        self._enforce_retention()
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        path = os.path.join(
+            self.directory, f"{self.session_id}_{stamp}_{self._segment_count + 1:03d}.{extension}"
+        )
+        if container_format is None:
+            self._segment = _WavSegment(path, self.sample_rate)
+        else:
+            self._segment = _EncodedSegment(path, self.sample_rate, container_format, codec)
+        self._segment_bytes = 0
+        self._segment_count += 1
+        self.files.append(path)
+        print(f"🎙️ Grabando audio de depuración en: {path}")
+
+    def _enforce_retention(self):
+        if not self.max_files and not self.max_total_bytes:
+            return
+        recordings = []
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if not entry.name.endswith(_EXTENSIONS):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                recordings.append((stat.st_mtime, entry.path, stat.st_size))
+        recordings.sort()
+        total = sum(size for _, _, size in recordings)
+        # Dejar sitio para el archivo que se va a abrir
+        while recordings and (
+            (self.max_files and len(recordings) >= self.max_files)
+            or (self.max_total_bytes and total > self.max_total_bytes)
+        ):
+            _, path, size = recordings.pop(0)
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                # Otra sesión ya lo borró
+                pass
+            total -= size
+            if path in self.files:
+                self.files.remove(path)
+            print(f"🧹 Grabación de depuración eliminada por retención: {path}")
+
+    def _close_segment(self):
+        if self._segment is not None:
+            try:
+                self._segment.close()
+            except Exception as e:
+                print(f"⚠️ Error cerrando la grabación de depuración: {e}")
+            self._segment = None
+
+
+def create_audio_recorder(session_id, sample_rate=None):
+    """Grabador de depuración según la configuración, o None si está desactivado."""
+    if not config.AUDIO_DEBUG_RECORDING:
+        return None
+    return AudioDebugRecorder(
+        config.AUDIO_DEBUG_DIR,
+        session_id,
+        sample_rate or config.VOSK_SAMPLE_RATE,
+        fmt=config.AUDIO_DEBUG_FORMAT,
+        max_bytes=int(config.AUDIO_DEBUG_MAX_MB * 1024 * 1024),
+        max_seconds=config.AUDIO_DEBUG_MAX_SECONDS,
+        queue_size=config.AUDIO_DEBUG_QUEUE_SIZE,
+        max_files=config.AUDIO_DEBUG_MAX_FILES,
+        max_total_bytes=int(config.AUDIO_DEBUG_MAX_TOTAL_MB * 1024 * 1024),
+    )
@@ -0,0 +1,66 @@
+from collections import deque
+import time
+
+import cv2
+import numpy as np
+
+# Formatos cuyo primer plano es la luminancia (Y): sirve como escala de grises sin convertir
+_LUMA_FORMATS = {"yuv420p", "yuvj420p", "yuv422p", "yuvj422p", "yuv444p", "yuvj444p", "nv12", "nv21", "gray"}
+
+
+def luma_view(frame):
+    """Vista uint8 (alto x ancho) sobre la luminancia del frame, sin copiar si es YUV."""
+    if frame.format.name in _LUMA_FORMATS:
+        plane = frame.planes[0]
+        rows = np.frombuffer(plane, dtype=np.uint8).reshape(-1, plane.line_size)
+        return rows[:frame.height, :frame.width]
+    return frame.to_ndarray(format="gray")
+
+
+def sharpness_score(frame, target_width=320):
+    """Varianza del Laplaciano sobre la luminancia reducida (~target_width px de ancho)."""
+    luma = luma_view(frame)
+    step = max(1, luma.shape[1] // target_width)
+    small = np.ascontiguousarray(luma[::step, ::step])
+    return float(cv2.Laplacian(small, cv2.CV_32F).var())
+
+
+class SharpFrameSelector:
+    """Ventana de frames recientes puntuados por nitidez para elegir el mejor al capturar.
+
+    Solo se puntúa uno de cada `stride` frames y se conservan los de los últimos
+    `window_ms`, así el costo en recv() es una reducción y un Laplaciano pequeños.
+    """
+
+    def __init__(self, window_ms=300, stride=2, max_frames=8):
+        self.window = window_ms / 1000
+        self.stride = max(1, stride)
+        self._frames = deque(maxlen=max(1, max_frames))
+        self._count = 0
+
+    def push(self, frame, timestamp=None):
+        self._count += 1
+        if self._count % self.stride:
+            return
+        timestamp = timestamp if timestamp is not None else time.time()
+        try:
+            score = sharpness_score(frame)
+        except Exception as e:
+            print(f"⚠️ No se pudo puntuar el frame: {e}")
+            return
+        self._frames.append((timestamp, score, frame))
+
+    def __len__(self):
+        return len(self._frames)
+
+    def best(self, now=None):
+        """Devuelve (frame, timestamp, score) del frame más nítido de la ventana, o None."""
+        now = now if now is not None else time.time()
+        recent = [entry for entry in self._frames if now - entry[0] <= self.window]
+        if not recent:
+            return None
+        timestamp, score, frame = max(recent, key=lambda entry: entry[1])
+        return frame, timestamp, score
+
+    def clear(self):
+        self._frames.clear()
@@ -0,0 +1,112 @@
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import os
+import time
+
+import cv2
+
+from app import config
+from app.utils.metrics import REGISTRY
+
+_CAPTURE_SECONDS = REGISTRY.histogram(
+    "capture_frame_seconds", "Tiempo de guardar una captura, por fase", ("phase",)
+)
+_CAPTURE_PHASES = {phase: _CAPTURE_SECONDS.labels(phase) for phase in ("convert", "encode", "write", "total")}
+
+
+class CaptureResult:
+    """Resultado de guardar una captura, con los tiempos de cada etapa en ms."""
+
+    __slots__ = ("path", "width", "height", "convert_ms", "encode_ms", "write_ms", "total_ms")
+
+    def __init__(self, path, width, height, convert_ms, encode_ms, write_ms, total_ms):
+        self.path = path
+        self.width = width
+        self.height = height
+        self.convert_ms = convert_ms
+        self.encode_ms = encode_ms
+        self.write_ms = write_ms
+        self.total_ms = total_ms
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class JpegEncoder:
+    """Convierte y codifica frames a JPEG en un pool de hilos, fuera del event loop."""
+
+    def __init__(self, max_workers=None, quality=None):
+        self.quality = quality or config.CAPTURE_JPEG_QUALITY
+        self.pool = ThreadPoolExecutor(
+            max_workers=max_workers or config.CAPTURE_ENCODER_WORKERS,
+            thread_name_prefix="jpeg"
+        )
+
+    async def save(self, frame, filepath):
+        """Convierte el frame a BGR, lo codifica y escribe el archivo; devuelve un CaptureResult."""
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+
+        (height, width), buffer, convert_ms, encode_ms = await loop.run_in_executor(self.pool, self._encode, frame)
+        write_start = time.perf_counter()
+        await loop.run_in_executor(self.pool, _write_file, filepath, buffer)
+        write_ms = (time.perf_counter() - write_start) * 1000
+        total_ms = (time.perf_counter() - start) * 1000
+
+        for phase, ms in (("convert", convert_ms), ("encode", encode_ms), ("write", write_ms), ("total", total_ms)):
+            _CAPTURE_PHASES[phase].observe(ms / 1000)
+
+        return CaptureResult(
+            path=filepath,
+            width=width,
+            height=height,
+            convert_ms=round(convert_ms, 1),
+            encode_ms=round(encode_ms, 1),
+            write_ms=round(write_ms, 1),
+            total_ms=round(total_ms, 1),
+        )
+
+    def _encode(self, frame):
+        start = time.perf_counter()
+        image = frame.to_ndarray(format="bgr24")
+        converted = time.perf_counter()
+        ok, buffer = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+        if not ok:
+            raise RuntimeError("No se pudo codificar el frame a JPEG")
+        encoded = time.perf_counter()
+        return image.shape[:2], buffer, (converted - start) * 1000, (encoded - converted) * 1000
+
+    def shutdown(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _write_file(filepath, buffer):
+    # Escribir a un temporal y renombrar: nunca se publica una imagen a medias
+    tmp_path = f"{filepath}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(buffer)
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        # No dejar temporales huérfanos junto a las capturas
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+_encoder = None
+
+
+def get_jpeg_encoder():
+    """Devuelve el encoder JPEG compartido por todas las sesiones."""
+    global _encoder
+    if _encoder is None:
+        _encoder = JpegEncoder()
+    return _encoder
+
+
+def shutdown_jpeg_encoder():
+    global _encoder
+    if _encoder is not None:
+        _encoder.shutdown()
+        _encoder = None
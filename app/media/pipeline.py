@@ -0,0 +1,139 @@
+import inspect
+import time
+
+from app.utils.latency import LatencyHistogram
+from app.utils.metrics import REGISTRY
+
+# Políticas ante una etapa saturada
+BLOCK = "block"   # esperar a la etapa (backpressure hacia el productor)
+DROP = "drop"     # descartar el elemento y contarlo
+
+
+_FRAMES_RECEIVED = REGISTRY.counter(
+    "media_frames_received_total", "Frames recibidos por cada pipeline de medios", ("pipeline",)
+)
+_FRAMES_DROPPED = REGISTRY.counter(
+    "media_frames_dropped_total", "Elementos descartados por una etapa saturada", ("pipeline", "stage")
+)
+_STAGE_SECONDS = REGISTRY.histogram(
+    "media_stage_seconds", "Tiempo de cada etapa de un pipeline de medios", ("pipeline", "stage")
+)
+
+
+class Fanout(list):
+    """Varios elementos de salida de una etapa; cada uno sigue por el resto del pipeline."""
+
+
+class Stage:
+    """Etapa de un MediaPipeline.
+
+    process() recibe un elemento y devuelve el siguiente, None para cortar la
+    cadena o un Fanout con varios elementos. Puede ser síncrona o async. Con
+    política DROP el pipeline descarta el elemento cuando saturated() es True,
+    en vez de esperar a la etapa; si la etapa es derivada (`tap`, solo efectos
+    secundarios) el elemento sigue por las etapas siguientes.
+    """
+
+    name = "stage"
+    tap = False
+
+    def __init__(self, policy=BLOCK):
+        if policy not in (BLOCK, DROP):
+            raise ValueError(f"Política desconocida: {policy}")
+        self.policy = policy
+
+    def process(self, item):
+        return item
+
+    def saturated(self, item):
+        return False
+
+    def close(self):
+        pass
+
+    def stats(self):
+        return None
+
+
+class _StageMetrics:
+    __slots__ = ("calls", "dropped", "latency", "dropped_total", "seconds")
+
+    def __init__(self, pipeline, stage):
+        self.calls = 0
+        self.dropped = 0
+        self.latency = LatencyHistogram()
+        # Series exportadas en /metrics (acumuladas entre sesiones)
+        self.dropped_total = _FRAMES_DROPPED.labels(pipeline, stage)
+        self.seconds = _STAGE_SECONDS.labels(pipeline, stage)
+
+
+class MediaPipeline:
+    """Cadena de etapas con tiempo por etapa y políticas de descarte.
+
+    El tiempo de una etapa async incluye su espera por backpressure, que es
+    justamente lo que retrasa al productor.
+    """
+
+    def __init__(self, name, stages):
+        self.name = name
+        self.stages = [stage for stage in stages if stage is not None]
+        self._async = [inspect.iscoroutinefunction(stage.process) for stage in self.stages]
+        self._metrics = [_StageMetrics(name, stage.name) for stage in self.stages]
+        self._received = _FRAMES_RECEIVED.labels(name)
+
+    def stage(self, name):
+        return next((stage for stage in self.stages if stage.name == name), None)
+
+    async def push(self, item):
+        self._received.inc()
+        await self._run(0, item)
+
+    async def _run(self, index, item):
+        stages = self.stages
+        while index < len(stages):
+            stage = stages[index]
+            metrics = self._metrics[index]
+            if stage.policy == DROP and stage.saturated(item):
+                metrics.dropped += 1
+                metrics.dropped_total.inc()
+                if stage.tap:
+                    index += 1
+                    continue
+                return
+
+            start = time.perf_counter()
+            out = stage.process(item)
+            if self._async[index]:
+                out = await out
+            elapsed = time.perf_counter() - start
+            metrics.latency.observe(elapsed)
+            metrics.seconds.observe(elapsed)
+            metrics.calls += 1
+
+            if out is None:
+                return
+            index += 1
+            if isinstance(out, Fanout):
+                for sub_item in out:
+                    await self._run(index, sub_item)
+                return
+            item = out
+
+    def close(self):
+        for stage in self.stages:
+            try:
+                stage.close()
+            except Exception as e:
+                print(f"⚠️ Error cerrando la etapa {stage.name} de {self.name}: {e}")
+
+    def stats(self):
+        return {
+            stage.name: {
+                "policy": stage.policy,
+                "calls": metrics.calls,
+                "dropped": metrics.dropped,
+                "latency": metrics.latency.stats(),
+                "stage": stage.stats(),
+            }
+            for stage, metrics in zip(self.stages, self._metrics)
+        }
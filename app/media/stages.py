@@ -0,0 +1,263 @@
+import time
+
+from av import AudioResampler
+
+from .audio_buffer import frame_samples
+from .pipeline import Stage, Fanout, BLOCK, DROP
+
+# Marca emitida por VadStage al terminar una frase; RecognitionStage la convierte en flush
+END_OF_SPEECH = object()
+
+
+# ============ AUDIO ============
+
+class DedupStage(Stage):
+    """Descarta frames repetidos (mismo pts)."""
+
+    name = "dedup"
+
+    def __init__(self):
+        super().__init__()
+        self.last_pts = None
+        self.frames = 0
+        self.duplicates = 0
+
+    def process(self, frame):
+        if frame.pts == self.last_pts:
+            self.duplicates += 1
+            return None
+        self.last_pts = frame.pts
+        self.frames += 1
+        return frame
+
+    def stats(self):
+        return {"frames": self.frames, "duplicates": self.duplicates}
+
+
+class ResampleStage(Stage):
+    """Convierte el audio a `sample_rate` mono s16 si el formato de entrada no coincide."""
+
+    name = "resample"
+
+    def __init__(self, sample_rate):
+        super().__init__()
+        self.sample_rate = sample_rate
+        self.resampler = None
+        self.input_sample_rate = None
+        self._first_resample_done = False
+        self._empty_warning_shown = False
+        self._error_shown = False
+
+    def process(self, frame):
+        # Detectar la tasa de muestreo de entrada
+        if self.input_sample_rate is None:
+            self.input_sample_rate = frame.sample_rate
+            channel_names = [str(ch) for ch in frame.layout.channels]
+            print(f"🎵 Tasa de muestreo detectada: {self.input_sample_rate}Hz")
+            print(f"🎵 Canales detectados: {len(channel_names)} - {channel_names}")
+
+            if self.input_sample_rate != self.sample_rate or len(channel_names) != 1:
+                self.resampler = AudioResampler(format='s16', layout='mono', rate=self.sample_rate)
+                print(f"🔄 Resampler creado: {self.input_sample_rate}Hz ({len(channel_names)} canales) → {self.sample_rate}Hz (1 canal)")
+            else:
+                print(f"✅ Audio ya está en formato correcto: {self.sample_rate}Hz mono")
+
+        if not self.resampler:
+            return frame
+
+        try:
+            resampled_frames = self.resampler.resample(frame)
+        except Exception as e:
+            if not self._error_shown:
+                self._error_shown = True
+                print(f"⚠️ Error en resampling: {e}")
+                import traceback
+                traceback.print_exc()
+            return None
+
+        if not resampled_frames:
+            if not self._empty_warning_shown:
+                self._empty_warning_shown = True
+                print("⚠️ Resampler retornó frames vacíos")
+            return None
+
+        resampled = resampled_frames[0]
+        if not self._first_resample_done:
+            self._first_resample_done = True
+            print(f"✅ Primer frame resampled exitosamente: {resampled.samples} muestras, "
+                  f"{resampled.sample_rate}Hz, {len(resampled.layout.channels)} canal(es)")
+        return resampled
+
+    def stats(self):
+        return {"input_sample_rate": self.input_sample_rate, "resampling": self.resampler is not None}
+
+
+class FlattenStage(Stage):
+    """Vista int16 mono sobre el frame (sin copias para s16)."""
+
+    name = "flatten"
+
+    def __init__(self, log_every=100):
+        super().__init__()
+        self.log_every = log_every
+        self.frames = 0
+
+    def process(self, frame):
+        samples = frame_samples(frame)
+        self.frames += 1
+        if self.log_every and self.frames % self.log_every == 0:
+            print(f"🎤 Frame {self.frames}: {samples.nbytes} bytes")
+        return samples
+
+
+class RecorderStage(Stage):
+    """Deriva una copia del PCM al grabador de depuración; el audio sigue su camino."""
+
+    name = "recorder"
+    # Etapa derivada: si se descarta, el elemento continúa por las siguientes
+    tap = True
+
+    def __init__(self, recorder, policy=DROP):
+        super().__init__(policy)
+        self.recorder = recorder
+
+    def process(self, samples):
+        self.recorder.write(samples)
+        return samples
+
+    def saturated(self, item):
+        return self.recorder.saturated()
+
+    def close(self):
+        self.recorder.close()
+
+    def stats(self):
+        return self.recorder.stats()
+
+
+class ChunkStage(Stage):
+    """Acumula el PCM en el ring y emite cada chunk completo."""
+
+    name = "buffer"
+
+    def __init__(self, ring):
+        super().__init__()
+        self.ring = ring
+
+    def process(self, samples):
+        chunks = self.ring.write(samples)
+        return Fanout(chunks) if chunks else None
+
+
+class VadStage(Stage):
+    """Compuerta VAD: deja pasar los chunks con voz y marca el fin de cada frase."""
+
+    name = "vad"
+
+    def __init__(self, vad):
+        super().__init__()
+        self.vad = vad
+
+    def process(self, chunk):
+        chunks, end_of_speech = self.vad.process(chunk)
+        if end_of_speech:
+            chunks = list(chunks) + [END_OF_SPEECH]
+        return Fanout(chunks) if chunks else None
+
+    def stats(self):
+        return self.vad.stats()
+
+
+class RecognitionStage(Stage):
+    """Encola los chunks en el RecognitionStream y entrega cada future a `sink`.
+
+    Con política BLOCK el loop de audio espera si la cola del recognizer está
+    llena; con DROP el chunk se descarta. El fin de frase nunca se descarta.
+    """
+
+    name = "recognition"
+
+    def __init__(self, stream, sink, policy=BLOCK):
+        super().__init__(policy)
+        self.stream = stream
+        self.sink = sink
+
+    async def process(self, item):
+        # Hora de llegada del audio, antes de una posible espera por backpressure
+        arrived = time.monotonic()
+        if item is END_OF_SPEECH:
+            # Sin el silencio posterior Vosk no detecta el endpoint: cerrar la frase
+            future = await self.stream.flush()
+        else:
+            future = await self.stream.feed(item)
+        self.sink(future, arrived)
+        return None
+
+    def saturated(self, item):
+        return item is not END_OF_SPEECH and self.stream.saturated()
+
+
+# ============ VIDEO ============
+
+class FrameDecimationStage(Stage):
+    """Deja pasar uno de cada `stride` frames mientras `active()` sea False (reposo)."""
+
+    name = "frame_decimation"
+
+    def __init__(self, stride, active):
+        super().__init__()
+        self.stride = max(1, stride)
+        self.active = active
+        self._idle = 0
+        self.dropped = 0
+
+    def process(self, item):
+        if self.active():
+            self._idle = 0
+            return item
+        self._idle += 1
+        if (self._idle - 1) % self.stride:
+            self.dropped += 1
+            return None
+        return item
+
+    def stats(self):
+        return {"stride": self.stride, "dropped": self.dropped}
+
+
+class FrameCacheStage(Stage):
+    """Conserva el último frame recibido y su hora de llegada."""
+
+    name = "frame_cache"
+
+    def __init__(self, log_every=300):
+        super().__init__()
+        self.log_every = log_every
+        self.frame = None
+        self.time = 0
+        self.count = 0
+
+    def process(self, item):
+        self.frame, self.time = item
+        self.count += 1
+        if self.log_every and self.count % self.log_every == 0:
+            print(f"📹 Frames procesados: {self.count}")
+        return item
+
+
+class FrameScoringStage(Stage):
+    """Puntúa la nitidez de los frames para la captura en ráfaga mientras `active()` sea True."""
+
+    name = "frame_scoring"
+    tap = True
+
+    def __init__(self, selector, active=None):
+        super().__init__()
+        self.selector = selector
+        self.active = active
+
+    def process(self, item):
+        if self.active is None or self.active():
+            frame, received_at = item
+            self.selector.push(frame, received_at)
+        return item
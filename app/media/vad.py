@@ -0,0 +1,112 @@
+from collections import deque
+
+import numpy as np
+
+
+class EnergyVadGate:
+    """Compuerta de voz por energía sobre los chunks que van al recognizer.
+
+    Cada chunk se divide en ventanas cortas (20 ms por defecto) y se clasifica
+    como voz si la ventana más energética supera el umbral, que se adapta al
+    piso de ruido medido en los chunks de silencio. Los chunks de silencio se
+    descartan, salvo:
+
+    - pre-roll: los últimos `preroll_chunks` silencios se envían antes del
+      primer chunk de voz, para no cortar el inicio de las palabras;
+    - hangover: tras la voz se envían `hangover_chunks` chunks más, y al
+      terminarlos se indica fin de habla para que el recognizer cierre la frase.
+    """
+
+    def __init__(self, sample_rate, window_ms=20, min_rms=300.0, noise_ratio=2.5,
+                 hangover_chunks=2, preroll_chunks=1):
+        self.window = max(1, int(sample_rate * window_ms / 1000))
+        self.min_rms = min_rms
+        self.noise_ratio = noise_ratio
+        self.hangover_chunks = hangover_chunks
+        self._preroll = deque(maxlen=preroll_chunks) if preroll_chunks > 0 else None
+        self._noise_floor = None
+        self._hangover_left = 0
+        self.in_speech = False
+
+        self.speech_chunks = 0
+        self.silence_chunks = 0
+        self.forwarded_chunks = 0
+        self.skipped_chunks = 0
+
+    @property
+    def threshold(self):
+        if self._noise_floor is None:
+            return self.min_rms
+        return max(self.min_rms, self._noise_floor * self.noise_ratio)
+
+    def energy(self, chunk):
+        """RMS de la ventana más energética del chunk (int16 PCM, bytes o array)."""
+        samples = np.frombuffer(chunk, dtype=np.int16)
+        windows = len(samples) // self.window
+        if windows == 0:
+            if len(samples) == 0:
+                return 0.0
+            windows, width = 1, len(samples)
+        else:
+            width = self.window
+        frames = samples[:windows * width].reshape(windows, width).astype(np.float32)
+        mean_square = np.einsum("ij,ij->i", frames, frames) / width
+        return float(np.sqrt(mean_square.max()))
+
+    def process(self, chunk):
+        """Clasifica un chunk y devuelve (chunks a enviar, fin_de_habla)."""
+        rms = self.energy(chunk)
+
+        if rms >= self.threshold:
+            self.speech_chunks += 1
+            out = []
+            if self._preroll:
+                out.extend(self._preroll)
+                self._preroll.clear()
+            out.append(chunk)
+            self.in_speech = True
+            self._hangover_left = self.hangover_chunks
+            self.forwarded_chunks += len(out)
+            return out, False
+
+        self.silence_chunks += 1
+        self._update_noise_floor(rms)
+
+        if self.in_speech:
+            if self._hangover_left > 0:
+                self._hangover_left -= 1
+                self.forwarded_chunks += 1
+                if self._hangover_left == 0:
+                    self.in_speech = False
+                    return [chunk], True
+                return [chunk], False
+            self.in_speech = False
+            self._keep_preroll(chunk)
+            return [], True
+
+        self._keep_preroll(chunk)
+        return [], False
+
+    def _keep_preroll(self, chunk):
+        self.skipped_chunks += 1
+        if self._preroll is not None:
+            self._preroll.append(chunk)
+
+    def _update_noise_floor(self, rms):
+        if self._noise_floor is None:
+            self._noise_floor = rms
+        else:
+            self._noise_floor = 0.95 * self._noise_floor + 0.05 * rms
+
+    def stats(self):
+        total = self.speech_chunks + self.silence_chunks
+        return {
+            "speech_chunks": self.speech_chunks,
+            "silence_chunks": self.silence_chunks,
+            "speech_ratio": round(self.speech_chunks / total, 3) if total else 0.0,
+            "silence_ratio": round(self.silence_chunks / total, 3) if total else 0.0,
+            "forwarded_chunks": self.forwarded_chunks,
+            "skipped_chunks": self.skipped_chunks,
+            "noise_floor_rms": round(self._noise_floor, 1) if self._noise_floor is not None else None,
+            "threshold_rms": round(self.threshold, 1),
+        }
@@ -1,5 +1,8 @@
 from .database import (
     DatabaseManager,
+    get_engine,
+    dispose_engines,
+    normalize_uuid,
     Inventory,
     Space,
     Element,
@@ -7,15 +10,22 @@ from .database import (
     Image,
     Video,
     SessionContext,
+    PeerSessionContext,
+    SyncState,
 )
 
 __all__ = [
     'DatabaseManager',
+    'get_engine',
+    'dispose_engines',
+    'normalize_uuid',
     'Inventory',
     'Space',
     'Element',
     'Attribute',
     'Image',
     'Video',
-    'SessionContext'
+    'SessionContext',
+    'PeerSessionContext',
+    'SyncState'
 ]
\ No newline at end of file
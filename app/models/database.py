@@ -1,15 +1,79 @@
-from sqlalchemy import create_engine, Column, String, DateTime, Boolean, ForeignKey, Text, Integer
+from sqlalchemy import create_engine, event, Column, String, DateTime, Boolean, ForeignKey, Text, Integer, Index, LargeBinary
+from sqlalchemy.types import TypeDecorator
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
 from datetime import datetime
+import threading
 import uuid
 
+from app import config
+
 Base = declarative_base()
 
+
+class UUIDBinary(TypeDecorator):
+    """UUID guardado como BLOB de 16 bytes (o como texto) y expuesto en Python como texto.
+
+    El BLOB ocupa menos de la mitad que el texto de 36 caracteres en cada tabla,
+    clave foránea e índice. El orden de los bytes coincide con el del texto
+    hexadecimal, así que la paginación por (updated_at, id) no cambia. Con
+    DB_UUID_STORAGE=text se guarda el texto canónico, como antes de la migración 2;
+    al arrancar, convert_uuid_storage convierte los valores guardados en el otro
+    formato. Un valor que no es un UUID (ni 16 bytes) no se puede guardar ni
+    comparar: lanza ValueError, así que los ids recibidos de fuera se validan
+    antes con normalize_uuid.
+    """
+
+    impl = LargeBinary(16)
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if config.DB_UUID_STORAGE == "text":
+            return dialect.type_descriptor(String(36))
+        return dialect.type_descriptor(LargeBinary(16))
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return value
+        if isinstance(value, bytes):
+            if len(value) != 16:
+                raise ValueError(f"Un UUID binario debe tener 16 bytes, no {len(value)}")
+            value = uuid.UUID(bytes=value)
+        value = normalize_uuid(value)
+        if config.DB_UUID_STORAGE == "text":
+            return value
+        return uuid.UUID(value).bytes
+
+    def process_result_value(self, value, dialect):
+        if isinstance(value, bytes) and len(value) == 16:
+            return str(uuid.UUID(bytes=value))
+        return value
+
+
+def normalize_uuid(value):
+    """Forma canónica de un id UUID (texto o uuid.UUID); ValueError si no es un UUID."""
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    try:
+        return str(uuid.UUID(str(value)))
+    except (TypeError, ValueError, AttributeError):
+        raise ValueError(f"Id no válido: {value!r}")
+
+
+def _new_id():
+    return str(uuid.uuid4())
+
+
 class Inventory(Base):
     __tablename__ = 'inventories'
+    __table_args__ = (
+        # Clave natural: un inventario por propiedad, tipo y evento
+        Index('uq_inventories_natural_key', 'property_id', 'inventory_type_id', 'event_id', unique=True),
+        Index('ix_inventories_updated_at_id', 'updated_at', 'id'),
+        Index('ix_inventories_synced_updated_at', 'synced', 'updated_at'),
+    )
     
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(UUIDBinary, primary_key=True, default=_new_id)
     origin_id = Column(Integer, unique=False, nullable=True)
     property_id = Column(Integer, nullable=False)
     inventory_type_id = Column(Integer, nullable=False)
@@ -25,10 +89,14 @@ class Inventory(Base):
 
 class Space(Base):
     __tablename__ = 'spaces'
+    __table_args__ = (
+        Index('uq_spaces_inventory_name', 'inventory_id', 'name', unique=True),
+        Index('ix_spaces_synced_updated_at', 'synced', 'updated_at'),
+    )
     
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(UUIDBinary, primary_key=True, default=_new_id)
     origin_id = Column(Integer, unique=False, nullable=True)
-    inventory_id = Column(String, ForeignKey('inventories.id'), nullable=False)
+    inventory_id = Column(UUIDBinary, ForeignKey('inventories.id'), nullable=False)
     name = Column(String, nullable=False)
     description = Column(Text)
     action = Column(String, default='create')
@@ -45,10 +113,14 @@ class Space(Base):
 
 class Element(Base):
     __tablename__ = 'elements'
+    __table_args__ = (
+        Index('uq_elements_space_name', 'space_id', 'name', unique=True),
+        Index('ix_elements_synced_updated_at', 'synced', 'updated_at'),
+    )
     
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(UUIDBinary, primary_key=True, default=_new_id)
     origin_id = Column(Integer, unique=False, nullable=True)
-    space_id = Column(String, ForeignKey('spaces.id'), nullable=False)
+    space_id = Column(UUIDBinary, ForeignKey('spaces.id'), nullable=False)
     name = Column(String, nullable=False)
     description = Column(Text)
     amount = Column(Integer, default=1)
@@ -66,10 +138,14 @@ class Element(Base):
 
 class Attribute(Base):
     __tablename__ = 'attributes'
+    __table_args__ = (
+        Index('ix_attributes_element_id', 'element_id'),
+        Index('ix_attributes_synced_updated_at', 'synced', 'updated_at'),
+    )
     
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(UUIDBinary, primary_key=True, default=_new_id)
     origin_id = Column(Integer, unique=False, nullable=True)
-    element_id = Column(String, ForeignKey('elements.id'), nullable=False)
+    element_id = Column(UUIDBinary, ForeignKey('elements.id'), nullable=False)
     key = Column(String, nullable=False)
     value = Column(String, nullable=False)
     action = Column(String, default='create')
@@ -83,11 +159,16 @@ class Attribute(Base):
 
 class Image(Base):
     __tablename__ = 'images'
+    __table_args__ = (
+        Index('ix_images_space_id', 'space_id'),
+        Index('ix_images_element_id', 'element_id'),
+        Index('ix_images_synced_updated_at', 'synced', 'updated_at'),
+    )
     
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(UUIDBinary, primary_key=True, default=_new_id)
     origin_id = Column(Integer, unique=False, nullable=True)
-    space_id = Column(String, ForeignKey('spaces.id'), nullable=False)
-    element_id = Column(String, ForeignKey('elements.id'), nullable=True)
+    space_id = Column(UUIDBinary, ForeignKey('spaces.id'), nullable=False)
+    element_id = Column(UUIDBinary, ForeignKey('elements.id'), nullable=True)
     path = Column(String, nullable=True)
     path_synced = Column(String, nullable=True)
     description = Column(Text)
@@ -103,10 +184,14 @@ class Image(Base):
 
 class Video(Base):
     __tablename__ = 'videos'
+    __table_args__ = (
+        Index('ix_videos_space_id', 'space_id'),
+        Index('ix_videos_synced_updated_at', 'synced', 'updated_at'),
+    )
     
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(UUIDBinary, primary_key=True, default=_new_id)
     origin_id = Column(Integer, unique=False, nullable=True)
-    space_id = Column(String, ForeignKey('spaces.id'), nullable=False)
+    space_id = Column(UUIDBinary, ForeignKey('spaces.id'), nullable=False)
     path = Column(String, nullable=False)
     path_synced = Column(String, nullable=True)
     description = Column(Text, nullable=True)
@@ -122,18 +207,103 @@ class SessionContext(Base):
     __tablename__ = "session_context"
 
     id = Column(Integer, primary_key=True)
-    current_inventory_id = Column(Integer, nullable=True)
-    current_space_id = Column(Integer, nullable=True)
-    current_element_id = Column(Integer, nullable=True)
+    current_inventory_id = Column(UUIDBinary, nullable=True)
+    current_space_id = Column(UUIDBinary, nullable=True)
+    current_element_id = Column(UUIDBinary, nullable=True)
+
+
+class PeerSessionContext(Base):
+    """Contexto de navegación de un inspector conectado (session_context es el de la API).
+
+    Tabla aparte: create_all la crea también en bases de datos existentes, sin migración.
+    """
+    __tablename__ = "peer_session_context"
+    __table_args__ = (
+        Index('uq_peer_session_context_sender_id', 'sender_id', unique=True),
+    )
+
+    id = Column(Integer, primary_key=True)
+    sender_id = Column(String, nullable=False)
+    current_inventory_id = Column(UUIDBinary, nullable=True)
+    current_space_id = Column(UUIDBinary, nullable=True)
+    current_element_id = Column(UUIDBinary, nullable=True)
+
+
+class SyncState(Base):
+    __tablename__ = "sync_state"
+
+    # Nombre de la entidad sincronizada ('inventories', 'spaces', ...)
+    entity = Column(String, primary_key=True)
+    # Mayor clave (updated_at, id) ya enviada: lo que quede después se vuelve a sincronizar.
+    # El id desempata registros con el mismo updated_at a ambos lados de un corte de lote
+    high_water_mark = Column(DateTime, nullable=True)
+    high_water_id = Column(UUIDBinary, nullable=True)
+    last_synced_at = Column(DateTime, nullable=True)
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    # WAL: las lecturas no bloquean a la escritura ni viceversa
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={int(config.DB_BUSY_TIMEOUT_MS)}")
+    cursor.execute(f"PRAGMA mmap_size={int(config.DB_MMAP_SIZE)}")
+    cursor.execute(f"PRAGMA cache_size={int(config.DB_CACHE_SIZE)}")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
+
+_engines = {}
+_engines_lock = threading.Lock()
+
+
+def get_engine(db_path):
+    """Engine compartido por proceso para cada archivo SQLite, con tablas ya creadas."""
+    engine = _engines.get(db_path)
+    if engine is not None:
+        return engine
+
+    with _engines_lock:
+        engine = _engines.get(db_path)
+        if engine is None:
+            engine = create_engine(
+                f'sqlite:///{db_path}',
+                echo=False,
+                pool_size=config.DB_POOL_SIZE,
+                max_overflow=config.DB_MAX_OVERFLOW,
+                pool_pre_ping=False,
+                connect_args={
+                    # Las conexiones del pool se usan desde el loop y desde hilos
+                    "check_same_thread": False,
+                    "timeout": config.DB_BUSY_TIMEOUT_MS / 1000,
+                },
+            )
+            event.listen(engine, "connect", _set_sqlite_pragmas)
+            from .migrations import create_schema, run_migrations, convert_uuid_storage
+            create_schema(engine)
+            # Índices y restricciones nuevos para bases de datos ya existentes
+            run_migrations(engine)
+            convert_uuid_storage(engine, config.DB_UUID_STORAGE)
+            _engines[db_path] = engine
+        return engine
+
+
+def dispose_engines():
+    with _engines_lock:
+        for engine in _engines.values():
+            engine.dispose()
+        _engines.clear()
 
 
 class DatabaseManager:
     def __init__(self, db_path='inventory.db'):
-        self.engine = create_engine(f'sqlite:///{db_path}', echo=False)
-        self.Session = sessionmaker(bind=self.engine)
+        self.engine = get_engine(db_path)
+        # expire_on_commit=False: los objetos devueltos no se recargan tras el commit
+        self.Session = sessionmaker(bind=self.engine, expire_on_commit=False)
         
     def create_tables(self):
-        Base.metadata.create_all(self.engine)
+        from .migrations import create_schema
+        create_schema(self.engine)
         
     def get_session(self):
         return self.Session()
@@ -0,0 +1,206 @@
+"""Migraciones ligeras para archivos inventory.db existentes.
+
+create_all solo crea tablas que faltan: no agrega índices ni columnas a tablas
+ya creadas. Cada migración se ejecuta una vez, en orden, y la versión aplicada
+se guarda en `PRAGMA user_version` del propio archivo SQLite.
+"""
+import uuid
+
+from sqlalchemy import text
+from sqlalchemy.schema import CreateTable
+
+
+def _merge_duplicates(conn, table, key_columns, children):
+    """Fusiona filas duplicadas por clave natural: conserva la más antigua y re-apunta a sus hijos.
+
+    `children` es una lista de (tabla_hija, columna_fk).
+    """
+    keys = ", ".join(key_columns)
+    groups = conn.execute(text(
+        f"SELECT {keys} FROM {table} GROUP BY {keys} HAVING COUNT(*) > 1"
+    )).fetchall()
+
+    merged = 0
+    for group in groups:
+        where = " AND ".join(f"{column} = :k{i}" for i, column in enumerate(key_columns))
+        params = {f"k{i}": value for i, value in enumerate(group)}
+        ids = [row[0] for row in conn.execute(
+            text(f"SELECT id FROM {table} WHERE {where} ORDER BY created_at, rowid"), params
+        )]
+        keep, duplicates = ids[0], ids[1:]
+        for duplicate in duplicates:
+            for child_table, fk in children:
+                conn.execute(
+                    text(f"UPDATE {child_table} SET {fk} = :keep WHERE {fk} = :dup"),
+                    {"keep": keep, "dup": duplicate}
+                )
+            for column in ("current_inventory_id", "current_space_id", "current_element_id"):
+                conn.execute(
+                    text(f"UPDATE session_context SET {column} = :keep WHERE {column} = :dup"),
+                    {"keep": keep, "dup": duplicate}
+                )
+            conn.execute(text(f"DELETE FROM {table} WHERE id = :dup"), {"dup": duplicate})
+            merged += 1
+    if merged:
+        print(f"🧹 Migración: {merged} duplicados fusionados en {table}")
+
+
+def _add_natural_keys_and_indexes(conn):
+    # Primero fusionar duplicados: padres antes que hijos, porque fusionar
+    # inventarios puede dejar espacios repetidos dentro del inventario conservado
+    _merge_duplicates(conn, "inventories", ("property_id", "inventory_type_id", "event_id"),
+                      [("spaces", "inventory_id")])
+    _merge_duplicates(conn, "spaces", ("inventory_id", "name"),
+                      [("elements", "space_id"), ("images", "space_id"), ("videos", "space_id")])
+    _merge_duplicates(conn, "elements", ("space_id", "name"),
+                      [("attributes", "element_id"), ("images", "element_id")])
+
+    statements = [
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_inventories_natural_key "
+        "ON inventories (property_id, inventory_type_id, event_id)",
+        "CREATE INDEX IF NOT EXISTS ix_inventories_updated_at_id ON inventories (updated_at, id)",
+        "CREATE INDEX IF NOT EXISTS ix_inventories_synced_updated_at ON inventories (synced, updated_at)",
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_spaces_inventory_name ON spaces (inventory_id, name)",
+        "CREATE INDEX IF NOT EXISTS ix_spaces_synced_updated_at ON spaces (synced, updated_at)",
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_elements_space_name ON elements (space_id, name)",
+        "CREATE INDEX IF NOT EXISTS ix_elements_synced_updated_at ON elements (synced, updated_at)",
+        "CREATE INDEX IF NOT EXISTS ix_attributes_element_id ON attributes (element_id)",
+        "CREATE INDEX IF NOT EXISTS ix_attributes_synced_updated_at ON attributes (synced, updated_at)",
+        "CREATE INDEX IF NOT EXISTS ix_images_space_id ON images (space_id)",
+        "CREATE INDEX IF NOT EXISTS ix_images_element_id ON images (element_id)",
+        "CREATE INDEX IF NOT EXISTS ix_images_synced_updated_at ON images (synced, updated_at)",
+        "CREATE INDEX IF NOT EXISTS ix_videos_space_id ON videos (space_id)",
+        "CREATE INDEX IF NOT EXISTS ix_videos_synced_updated_at ON videos (synced, updated_at)",
+    ]
+    for statement in statements:
+        conn.execute(text(statement))
+    conn.execute(text("ANALYZE"))
+
+
+def _uuid_text_to_blob(value):
+    if not isinstance(value, str):
+        return value
+    try:
+        return uuid.UUID(value).bytes
+    except ValueError:
+        return value
+
+
+def _uuid_blob_to_text(value):
+    if isinstance(value, bytes) and len(value) == 16:
+        return str(uuid.UUID(bytes=value))
+    return value
+
+
+def _rebuild_table(conn, table):
+    """Reconstruye la tabla con el esquema actual del modelo (procedimiento de SQLite).
+
+    Las columnas UUID se convierten de texto a BLOB de 16 bytes al copiar.
+    """
+    from .database import UUIDBinary
+
+    name = table.name
+    columns = [column.name for column in table.columns]
+    select = ", ".join(
+        f"uuid_to_blob({column.name})" if isinstance(column.type, UUIDBinary) else column.name
+        for column in table.columns
+    )
+    ddl = str(CreateTable(table).compile(conn)).replace(
+        f"CREATE TABLE {name} ", f"CREATE TABLE {name}__new ", 1
+    )
+
+    conn.execute(text(f"DROP TABLE IF EXISTS {name}__new"))
+    conn.execute(text(ddl))
+    conn.execute(text(
+        f"INSERT INTO {name}__new ({', '.join(columns)}) SELECT {select} FROM {name}"
+    ))
+    conn.execute(text(f"DROP TABLE {name}"))
+    conn.execute(text(f"ALTER TABLE {name}__new RENAME TO {name}"))
+    for index in table.indexes:
+        index.create(conn)
+
+
+def _compact_uuid_keys(conn):
+    from .database import Base
+
+    # Las claves foráneas no están activas en estas conexiones, así que el orden
+    # no importa; uuid_to_blob vive solo en la conexión de esta migración
+    conn.connection.dbapi_connection.create_function(
+        "uuid_to_blob", 1, _uuid_text_to_blob, deterministic=True
+    )
+    for name in ("inventories", "spaces", "elements", "attributes", "images", "videos", "session_context"):
+        _rebuild_table(conn, Base.metadata.tables[name])
+    conn.execute(text("ANALYZE"))
+
+
+def _add_sync_high_water_id(conn):
+    columns = {row[1] for row in conn.execute(text("PRAGMA table_info(sync_state)"))}
+    if "high_water_id" not in columns:
+        conn.execute(text("ALTER TABLE sync_state ADD COLUMN high_water_id BLOB"))
+
+
+# (versión, descripción, función); agregar nuevas migraciones al final
+MIGRATIONS = [
+    (1, "claves naturales únicas e índices de búsqueda", _add_natural_keys_and_indexes),
+    (2, "UUID como BLOB de 16 bytes e ids de contexto con el tipo correcto", _compact_uuid_keys),
+    (3, "id de desempate en el high-water mark de sincronización", _add_sync_high_water_id),
+]
+
+
+def convert_uuid_storage(engine, storage):
+    """Convierte los UUID guardados en el otro formato al de `storage` ('blob' o 'text').
+
+    No es una migración numerada: DB_UUID_STORAGE se puede cambiar en cualquier
+    momento (también para volver a ids de texto) y al arrancar se convierten los
+    valores pendientes. Recorre cada columna UUID una vez por arranque.
+    """
+    from .database import Base, UUIDBinary
+
+    stored, convert = ("text", _uuid_text_to_blob) if storage == "blob" else ("blob", _uuid_blob_to_text)
+    converted = 0
+    with engine.begin() as conn:
+        conn.connection.dbapi_connection.create_function(
+            "convert_uuid", 1, convert, deterministic=True
+        )
+        for table in Base.metadata.sorted_tables:
+            for column in table.columns:
+                if not isinstance(column.type, UUIDBinary):
+                    continue
+                converted += conn.execute(text(
+                    f"UPDATE {table.name} SET {column.name} = convert_uuid({column.name}) "
+                    f"WHERE typeof({column.name}) = '{stored}'"
+                )).rowcount
+    if converted:
+        print(f"🛠️ {converted} UUID convertidos a {storage}")
+
+
+def create_schema(engine):
+    """create_all; una base de datos creada desde cero queda en la última versión.
+
+    Sus tablas ya tienen el esquema actual, así que no hay migraciones que aplicar.
+    """
+    from .database import Base
+
+    with engine.connect() as conn:
+        existing = {row[0] for row in conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'table'"))}
+    # sqlite_stat1 (de ANALYZE) puede quedar tras un drop_all: solo cuentan las tablas del modelo
+    fresh = not existing & set(Base.metadata.tables)
+    Base.metadata.create_all(engine)
+    if fresh:
+        with engine.begin() as conn:
+            conn.execute(text(f"PRAGMA user_version = {int(MIGRATIONS[-1][0])}"))
+
+
+def run_migrations(engine):
+    """Aplica en orden las migraciones pendientes, cada una en su propia transacción."""
+    with engine.connect() as conn:
+        current = conn.execute(text("PRAGMA user_version")).scalar() or 0
+
+    for version, description, migrate in MIGRATIONS:
+        if version <= current:
+            continue
+        print(f"🛠️ Aplicando migración {version}: {description}")
+        with engine.begin() as conn:
+            migrate(conn)
+            conn.execute(text(f"PRAGMA user_version = {int(version)}"))
+        current = version
@@ -1,57 +1,77 @@
-import cv2
 from aiortc import VideoStreamTrack
-from vosk import Model, KaldiRecognizer
 import os
 from aiortc.mediastreams import MediaStreamTrack, MediaStreamError
-import json
 import time
 import asyncio
-import wave
-import tempfile
-import numpy as np
-from av import AudioResampler
 from .services.inventory_service import InventoryService
-from .services.name_extraction_service import NameExtractionService
-from app.utils.serializers import to_dict_model
+from .services.command_registry import get_command_registry
+from .services.recognition_service import get_recognition_executor
+from .services.speech_model_service import get_vosk_model_registry
+from .services.speech_grammar import get_speech_grammar
+from app import config
+from app.media.audio_buffer import PcmChunkRing
+from app.media.vad import EnergyVadGate
+from app.media.image_encoder import get_jpeg_encoder
+from app.media.frame_scoring import SharpFrameSelector
+from app.media.audio_recorder import create_audio_recorder
+from app.media.pipeline import MediaPipeline
+from app.media.stages import (
+    DedupStage, ResampleStage, FlattenStage, RecorderStage, ChunkStage, VadStage,
+    RecognitionStage, FrameDecimationStage, FrameCacheStage, FrameScoringStage
+)
+from app.utils.latency import LatencyWindow
+from app.utils.metrics import REGISTRY
 
-MODEL_PATH = "/usr/local/lib/python3.11/site-packages/vosk_model/vosk-model-small-es-0.42"
-print(f"DEBUG: ¿Existe el modelo? {os.path.isdir(MODEL_PATH)}")
+_COMMAND_LATENCY_SECONDS = REGISTRY.histogram(
+    "command_latency_seconds", "Desde el fin de habla hasta ejecutar el comando", ("intent",)
+)
 
 # Vosk requiere específicamente 16kHz
-VOSK_SAMPLE_RATE = 16000
-
-if not os.path.exists(MODEL_PATH):
-    raise Exception(f"Modelo Vosk no encontrado en: {MODEL_PATH}. ¡Descárgalo y descomprímelo!")
-
-try:
-    VOSK_MODEL = Model(MODEL_PATH)
-    print("✅ Modelo Vosk cargado correctamente.")
-except Exception as e:
-    print(f"Error cargando el modelo Vosk: {e}")
-    VOSK_MODEL = None
+VOSK_SAMPLE_RATE = config.VOSK_SAMPLE_RATE
 
 
 class VideoProcessorTrack(VideoStreamTrack):
-    def __init__(self, track):
+    def __init__(self, track, lazy=False):
         super().__init__()
         self.track = track
-        self.count = 0
-        self._last_frame = None
-        self._last_frame_time = 0
+        # En modo perezoso solo se puntúan frames mientras hay una captura pendiente
+        self.lazy = lazy
+        self._capture_pending = False
+        self._burst_ready = asyncio.Event()
         self._last_capture_time = 0
         self._capture_cooldown = 2.0
+        self.last_capture = None
+        
+        # Ventana de frames recientes puntuados por nitidez (captura en ráfaga)
+        self.frame_selector = SharpFrameSelector(
+            window_ms=config.CAPTURE_BURST_WINDOW_MS,
+            stride=config.CAPTURE_BURST_STRIDE,
+            max_frames=config.CAPTURE_BURST_MAX_FRAMES
+        ) if config.CAPTURE_BURST_ENABLED else None
+        self._burst_min_frames = min(
+            max(1, config.CAPTURE_BURST_MIN_FRAMES), config.CAPTURE_BURST_MAX_FRAMES
+        )
+        
+        # Etapas por frame: descarte en reposo, último frame recibido y puntuación de
+        # nitidez. El frame se guarda en su formato nativo; la conversión a BGR
+        # ocurre solo al capturar
+        active = lambda: self._capture_pending or not self.lazy
+        self.frame_cache = FrameCacheStage()
+        self.pipeline = MediaPipeline("video", [
+            FrameDecimationStage(config.VIDEO_IDLE_FRAME_STRIDE, active) if self.lazy else None,
+            self.frame_cache,
+            FrameScoringStage(self.frame_selector, active=active) if self.frame_selector else None,
+        ])
+
+    @property
+    def count(self):
+        return self.frame_cache.count
 
     async def recv(self):
         frame = await self.track.recv()
-        
-        # Actualizar frame y timestamp inmediatamente
-        self._last_frame = frame
-        self._last_frame_time = time.time()
-        self.count += 1
-        
-        # Log reducido
-        if self.count % 300 == 0:
-            print(f"📹 Frames procesados: {self.count}")
+        await self.pipeline.push((frame, time.time()))
+        if self._capture_pending and len(self.frame_selector) >= self._burst_min_frames:
+            self._burst_ready.set()
         
         # Retornar el frame original sin modificaciones
         return frame
@@ -66,12 +86,39 @@ class VideoProcessorTrack(VideoStreamTrack):
             print(f"⚠️ Captura en cooldown. Espera {remaining:.1f}s")
             return None
         
-        if self._last_frame is None:
+        if self.frame_cache.frame is None:
             print("⚠️ No hay frames de video para capturar.")
             return None
         
+        # Reservar el cooldown antes de esperar para evitar capturas duplicadas
+        self._last_capture_time = current_time
+        
+        # En modo perezoso los frames no se puntúan en reposo: abrir la ventana de ráfaga
+        # ahora; termina al juntar suficientes frames puntuados o al cumplirse la ventana
+        if self.lazy and self.frame_selector:
+            self.frame_selector.clear()
+            self._burst_ready.clear()
+            self._capture_pending = True
+            try:
+                await asyncio.wait_for(self._burst_ready.wait(), self.frame_selector.window)
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                self._capture_pending = False
+            current_time = time.time()
+        
+        # Tomar la referencia ahora: recv() sigue reemplazando el frame mientras se codifica
+        frame = self.frame_cache.frame
+        frame_time = self.frame_cache.time
+        
+        # Preferir el frame más nítido de la ventana reciente (evita fotos movidas)
+        best = self.frame_selector.best(current_time) if self.frame_selector else None
+        if best:
+            frame, frame_time, score = best
+            print(f"🔍 Frame más nítido de la ráfaga (score {score:.0f})")
+        
         # Verificar que el frame no sea muy antiguo (máximo 200ms)
-        frame_age = current_time - self._last_frame_time
+        frame_age = current_time - frame_time
         if frame_age > 0.2:
             print(f"⚠️ Advertencia: El frame tiene {frame_age*1000:.0f}ms de antigüedad")
         else:
@@ -85,188 +132,196 @@ class VideoProcessorTrack(VideoStreamTrack):
         filename = f"capture_{timestamp}.jpg"
         filepath = os.path.join(images_dir, filename)
 
-        # Convertir frame a imagen de alta calidad
-        cv2_image = self._last_frame.to_ndarray(format="bgr24")
-        
-        # Obtener resolución original
-        height, width = cv2_image.shape[:2]
+        # Conversión a BGR, JPEG y escritura en el pool de encoding (fuera del event loop)
+        try:
+            result = await get_jpeg_encoder().save(frame, filepath)
+        except Exception as e:
+            print(f"❌ Error guardando captura: {e}")
+            return None
+        self.last_capture = result
         
         # Verificar si la resolución es muy baja
-        if width < 640 or height < 480:
-            print(f"⚠️ ADVERTENCIA: Resolución muy baja detectada ({width}x{height})")
+        if result.width < 640 or result.height < 480:
+            print(f"⚠️ ADVERTENCIA: Resolución muy baja detectada ({result.width}x{result.height})")
             print(f"⚠️ Verifica las constraints de video en Flutter")
-        
-        # Guardar con máxima calidad JPEG (95%)
-        cv2.imwrite(filepath, cv2_image, [cv2.IMWRITE_JPEG_QUALITY, 95])
-        
-        # Actualizar tiempo de última captura
-        self._last_capture_time = current_time
 
-        print(f"📸 Frame guardado en {filepath} ({width}x{height})")
+        print(
+            f"📸 Frame guardado en {filepath} ({result.width}x{result.height}) "
+            f"en {result.total_ms:.0f}ms (conversión {result.convert_ms:.0f}ms, "
+            f"JPEG {result.encode_ms:.0f}ms, escritura {result.write_ms:.0f}ms)"
+        )
         return filepath
 
 
 class AudioProcessorTrack(MediaStreamTrack):
     kind = "audio"
     
-    def __init__(self, track, video_processor, sio_server):
+    def __init__(self, track, video_processor, sio_server, inventory_service=None,
+                 session_id=None, recorder=None):
         super().__init__()
         self.track = track
         self.video_processor = video_processor
         self.sio = sio_server
-        self.last_pts = None
         self.stop_event = asyncio.Event()
         
-        self.recognizer = KaldiRecognizer(VOSK_MODEL, VOSK_SAMPLE_RATE)
+        # Modo gramática: la búsqueda se limita a los comandos y a los nombres conocidos
+        self.grammar = get_speech_grammar()
+        self._grammar_version = self.grammar.version if self.grammar else None
+        self.recognizer = get_vosk_model_registry().create_recognizer(
+            VOSK_SAMPLE_RATE, grammar=self.grammar.to_json() if self.grammar else None
+        )
         self.recognizer.SetWords(True)  # Obtener palabras individuales
         
-        # Resampler para convertir audio a 16kHz mono
-        self.resampler = None
-        self.input_sample_rate = None
+        # Compuerta VAD: los chunks de silencio no llegan a Vosk
+        self.vad = EnergyVadGate(
+            VOSK_SAMPLE_RATE,
+            min_rms=config.VAD_MIN_RMS,
+            noise_ratio=config.VAD_NOISE_RATIO,
+            hangover_chunks=config.VAD_HANGOVER_CHUNKS,
+            preroll_chunks=config.VAD_PREROLL_CHUNKS
+        ) if config.VAD_ENABLED else None
+        
+        # Ring preasignado de chunks de ~0.3 s: cubre la cola del recognizer,
+        # el chunk en decodificación, el que se está llenando y el pre-roll del VAD
+        self.audio_buffer = PcmChunkRing(
+            chunk_samples=int(VOSK_SAMPLE_RATE * 0.3),
+            slots=get_recognition_executor().queue_size + 2 + (config.VAD_PREROLL_CHUNKS if self.vad else 0)
+        )
         
-        # Buffer de audio acumulado
-        self.audio_buffer = bytearray()
+        # Grabación de depuración opcional (hilo propio, archivos por sesión)
+        self.recorder = recorder if recorder is not None else create_audio_recorder(
+            session_id or id(self), VOSK_SAMPLE_RATE
+        )
         
-        # 📂 Crear archivo temporal para depuración
-        self.temp_audio_path = os.path.join(tempfile.gettempdir(), "debug_audio.wav")
-        self.wav_file = wave.open(self.temp_audio_path, "wb")
-        self.wav_file.setnchannels(1)  # Mono
-        self.wav_file.setsampwidth(2)  # 16 bits
-        self.wav_file.setframerate(VOSK_SAMPLE_RATE)
-
-        print(f"🎙️ Grabando audio recibido en: {self.temp_audio_path}")
+        # Gramática de comandos compilada una vez; cada intención tiene su manejador
+        self.commands = get_command_registry()
+        self._command_handlers = {
+            "capture_photo": self._on_capture_photo,
+            "enter_space": self._on_enter_space,
+            "enter_elements": self._on_enter_elements,
+            "enter_element": self._on_enter_element,
+            "start_recording": self._on_start_recording,
+            "stop_recording": self._on_stop_recording,
+        }
+        self.inventory_service = inventory_service or InventoryService()
         
-        self.name_extractor = NameExtractionService()
-        self.inventory_service = InventoryService()
+        # Confirmación temprana de comandos desde resultados parciales
+        self.early_commit = config.COMMAND_EARLY_COMMIT
+        self.early_commits = 0
+        self._early_intent = None
+        self._early_candidate = None
+        self._early_hits = 0
+        self.command_latency = LatencyWindow()
+        
+        # Reconocimiento en el pool compartido; los resultados llegan como futures en orden
+        self.recognition = get_recognition_executor().create_stream(self.recognizer)
+        self._pending_results = asyncio.Queue()
+        self._dispatch_task = asyncio.ensure_future(self._dispatch_results())
+        
+        # dedup → resample a 16 kHz mono → vista int16 → [grabación] → chunks de ~0.3 s
+        # → [VAD] → Vosk; las etapas opcionales dependen de la configuración
+        self.pipeline = MediaPipeline("audio", [
+            DedupStage(),
+            ResampleStage(VOSK_SAMPLE_RATE),
+            FlattenStage(),
+            RecorderStage(self.recorder) if self.recorder is not None else None,
+            ChunkStage(self.audio_buffer),
+            VadStage(self.vad) if self.vad is not None else None,
+            RecognitionStage(
+                self.recognition,
+                lambda future, arrived: self._pending_results.put_nowait((future, arrived)),
+                policy=config.RECOGNITION_OVERLOAD_POLICY
+            ),
+        ])
         
         # Ejecutar bucle asíncrono
         asyncio.ensure_future(self._run_loop())
 
-    def _resample_audio(self, frame):
-        """Resamplea el audio a 16kHz mono si es necesario."""
-        # Detectar la tasa de muestreo de entrada
-        if self.input_sample_rate is None:
-            self.input_sample_rate = frame.sample_rate
-            num_channels = frame.layout.channels
-            channel_names = [str(ch) for ch in frame.layout.channels]
-            print(f"🎵 Tasa de muestreo detectada: {self.input_sample_rate}Hz")
-            print(f"🎵 Canales detectados: {len(channel_names)} - {channel_names}")
-            
-            # Si no es 16kHz mono, crear resampler
-            if self.input_sample_rate != VOSK_SAMPLE_RATE or len(channel_names) != 1:
-                self.resampler = AudioResampler(
-                    format='s16',
-                    layout='mono',
-                    rate=VOSK_SAMPLE_RATE
-                )
-                print(f"🔄 Resampler creado: {self.input_sample_rate}Hz ({len(channel_names)} canales) → {VOSK_SAMPLE_RATE}Hz (1 canal)")
-            else:
-                print(f"✅ Audio ya está en formato correcto: {VOSK_SAMPLE_RATE}Hz mono")
-        
-        # Aplicar resampling si es necesario
-        if self.resampler:
+    async def _dispatch_results(self):
+        """Espera los resultados del recognizer en orden y ejecuta los comandos detectados."""
+        last_partial = ""
+        # Llegada del último chunk que cambió el texto reconocido (≈ fin del habla)
+        speech_end = None
+        while True:
+            future, fed_at = await self._pending_results.get()
             try:
-                resampled_frames = self.resampler.resample(frame)
-                if resampled_frames and len(resampled_frames) > 0:
-                    resampled = resampled_frames[0]
-                    # Debug del primer frame procesado
-                    if not hasattr(self, '_first_resample_done'):
-                        self._first_resample_done = True
-                        arr = resampled.to_ndarray()
-                        print(f"✅ Primer frame resampled exitosamente:")
-                        print(f"   - Shape: {arr.shape}")
-                        print(f"   - Dtype: {arr.dtype}")
-                        print(f"   - Sample rate: {resampled.sample_rate}Hz")
-                        print(f"   - Canales: {len(resampled.layout.channels)}")
-                    return resampled
+                # asyncio.wait no cancela el future si se cancela esta tarea
+                await asyncio.wait([future])
+                if future.cancelled():
+                    continue
+                result = future.result()
+                if result.text and result.text != last_partial:
+                    speech_end = fed_at
+                if result.final:
+                    if result.text:
+                        print(f"🗣️ TEXTO FINAL: '{result.text}'")
+                        await self._process_command(result.text, speech_end)
+                    self._reset_early_commit()
+                    speech_end = None
+                    self._sync_grammar()
                 else:
-                    if not hasattr(self, '_empty_warning_shown'):
-                        self._empty_warning_shown = True
-                        print("⚠️ Resampler retornó frames vacíos")
-                    return None
+                    if result.text and result.text != last_partial:
+                        print(f"🗣️ Parcial: '{result.text}'")
+                    if self.early_commit:
+                        await self._check_early_commit(result.text, speech_end)
+                last_partial = "" if result.final else result.text
             except Exception as e:
-                if not hasattr(self, '_resample_error_shown'):
-                    self._resample_error_shown = True
-                    print(f"⚠️ Error en resampling: {e}")
-                    import traceback
-                    traceback.print_exc()
-                return None
-        
-        return frame
+                print(f"⚠️ Error en reconocimiento: {e}")
+                import traceback
+                traceback.print_exc()
+            finally:
+                self._pending_results.task_done()
+
+    async def _check_early_commit(self, partial, speech_end):
+        """Ejecuta un comando sin slot cuando varios parciales seguidos lo confirman."""
+        if self._early_intent is not None:
+            return
+        match = self.commands.parse(partial) if partial else None
+        if match is None or not self.commands.allows_early_commit(match.intent):
+            self._early_candidate, self._early_hits = None, 0
+            return
+        if match.intent == self._early_candidate:
+            self._early_hits += 1
+        else:
+            self._early_candidate, self._early_hits = match.intent, 1
+        if self._early_hits >= config.COMMAND_EARLY_COMMIT_PARTIALS:
+            print(f"⚡ Comando '{match.intent}' confirmado por resultado parcial")
+            self._early_intent = match.intent
+            self.early_commits += 1
+            await self._execute_command(match, partial, speech_end)
+
+    def _reset_early_commit(self):
+        self._early_intent = None
+        self._early_candidate = None
+        self._early_hits = 0
+
+    def _sync_grammar(self):
+        """Programa la gramática más reciente en el recognizer si cambiaron los nombres."""
+        if self.grammar is not None and self.grammar.version != self._grammar_version:
+            self._grammar_version = self.grammar.version
+            self.recognition.set_grammar(self.grammar.to_json())
+
+    def pipeline_stats(self):
+        return self.pipeline.stats()
+
+    def vad_stats(self):
+        return self.vad.stats() if self.vad else None
+
+    def command_stats(self):
+        return {
+            "early_commit": self.early_commit,
+            "early_commits": self.early_commits,
+            "speech_to_command": self.command_latency.stats(),
+        }
 
     async def _run_loop(self):
         """Consume audio continuamente y detecta comandos de voz."""
         print("🎧 Iniciando procesamiento continuo de audio...")
         
-        # Umbral de buffer: ~0.3 segundos de audio
-        buffer_threshold = int(VOSK_SAMPLE_RATE * 2 * 0.3)
-        frame_count = 0
-
         while not self.stop_event.is_set():
             try:
                 frame = await self.track.recv()
-
-                # Evitar frames duplicados
-                if frame.pts == self.last_pts:
-                    continue
-                self.last_pts = frame.pts
-                frame_count += 1
-
-                # Resamplear el audio a 16kHz mono
-                resampled_frame = self._resample_audio(frame)
-                if resampled_frame is None:
-                    continue
-
-                # Convertir a bytes
-                chunk = resampled_frame.to_ndarray()
-                
-                # Aplanar correctamente si es 2D: (1, N) o (N, 1) → (N,)
-                if len(chunk.shape) > 1:
-                    # Si es (1, N), aplanar a (N,)
-                    if chunk.shape[0] == 1:
-                        chunk = chunk.flatten()
-                    # Si es (N, M) con M > 1 (estéreo), promediar canales
-                    elif chunk.shape[1] > 1:
-                        chunk = chunk.mean(axis=1).astype(np.int16)
-                    else:
-                        chunk = chunk.flatten()
-                
-                # Asegurar que sea int16
-                if chunk.dtype != np.int16:
-                    chunk = chunk.astype(np.int16)
-                
-                audio_data = chunk.tobytes()
-                
-                # Debug cada 100 frames
-                if frame_count % 100 == 0:
-                    print(f"🎤 Frame {frame_count}: {len(audio_data)} bytes")
-                
-                # Guardar para depuración
-                self.wav_file.writeframes(audio_data)
-                
-                # Acumular en buffer
-                self.audio_buffer.extend(audio_data)
-
-                # Procesar cuando tengamos suficiente audio
-                if len(self.audio_buffer) >= buffer_threshold:
-                    buffer_to_process = bytes(self.audio_buffer)
-                    
-                    # Enviar al recognizer
-                    if self.recognizer.AcceptWaveform(buffer_to_process):
-                        result = json.loads(self.recognizer.Result())
-                        text = result.get("text", "").strip().lower()
-                        if text:
-                            print(f"🗣️ TEXTO FINAL: '{text}'")
-                            await self._process_command(text)
-                    else:
-                        # Resultado parcial
-                        partial = json.loads(self.recognizer.PartialResult())
-                        partial_text = partial.get("partial", "").strip().lower()
-                        if partial_text and frame_count % 50 == 0:
-                            print(f"🗣️ Parcial: '{partial_text}'")
-                    
-                    # Limpiar buffer después de procesar
-                    self.audio_buffer.clear()
+                await self.pipeline.push(frame)
                     
                 # Pequeña pausa para no bloquear el video
                 await asyncio.sleep(0.001)
@@ -280,93 +335,119 @@ class AudioProcessorTrack(MediaStreamTrack):
                 traceback.print_exc()
                 await asyncio.sleep(0.1)
 
-        # Procesar audio residual
-        if self.audio_buffer:
-            self.recognizer.AcceptWaveform(bytes(self.audio_buffer))
-            final_result = json.loads(self.recognizer.FinalResult())
-            text = final_result.get("text", "").strip().lower()
-            if text:
-                print(f"🗣️ TEXTO FINAL (residual): '{text}'")
-                await self._process_command(text)
+        # Procesar audio residual (después de los chunks ya encolados)
+        try:
+            final_result = await self.recognition.finish(self.audio_buffer.drain())
+            await self._pending_results.join()
+            if final_result.text:
+                print(f"🗣️ TEXTO FINAL (residual): '{final_result.text}'")
+                await self._process_command(final_result.text)
+        except Exception as e:
+            print(f"⚠️ Error procesando audio residual: {e}")
+        finally:
+            self._dispatch_task.cancel()
+            await self.recognition.close()
 
+        frame_count = self.pipeline.stage("dedup").frames
         print(f"🎧 AudioProcessorTrack: Loop finalizado. Total frames procesados: {frame_count}")
-        self.wav_file.close()
-        print(f"🎙️ Archivo de depuración guardado en: {self.temp_audio_path}")
+        self.pipeline.close()
 
 
     def stop(self):
         """Detiene el bucle de audio."""
         self.stop_event.set()
 
-    async def _process_command(self, command):
-        if any(keyword in command for keyword in ["tomar foto", "capturar", "saca foto", "fotografía", "foto"]):
-            print("📸 Comando de captura detectado.")
-            
-            if self.video_processor is None:
-                print("❌ Error: No hay VideoProcessorTrack disponible")
-                await self.sio.emit("command_executed", {
-                    "action": "error",
-                    "message": "No video processor available"
-                })
-                return
-            
-            captured_image_path = await self.video_processor.capture_frame()
-            if captured_image_path:
-                self.inventory_service.save_image(captured_image_path)
-                await self.sio.emit("command_executed", {
-                    "action": "photo_captured",
-                    "path": captured_image_path
-                })
-            else:
-                await self.sio.emit("command_executed", {
-                    "action": "error",
-                    "message": "Failed to capture frame"
-                })
-                
-        elif any(keyword in command for keyword in ["ingresar a espacio", "entrar al espacio", "abrir espacio"]):
-            print("Comando 'Ingresar a espacio detectado.'")
-            space_name = self.name_extractor.extract_space_name(command)
-            space = self.inventory_service.enter_space(space_name)
-            try:
-                await self.sio.emit("command_executed", {"action": "enter_space", "space": space})
-                print("✅ Evento emitido correctamente")
-            except Exception as e:
-                print("❌ Error al emitir evento:", str(e))
-            
-        elif any(keyword in command for keyword in ["el espacio tiene"]):
-            print("Comando 'El espacio tiene elementos' detectado.'")
-            elements = self.name_extractor.extract_elements_from_command(command)
-            print("Elementos detectados:", elements)
-            
-            created_elements = []
-            for el in elements:
-                element = self.inventory_service.enter_element(el["name"], description=el.get("color"), amount=el["amount"])
-                created_elements.append(element)
-                
-            await self.sio.emit("command_executed", {"action": "enter_elements", "elements": [to_dict_model(e) for e in created_elements]})
-            
-        elif any(keyword in command for keyword in ["ingresar a elemento", "entrar al elemento", "abrir elemento"]):
-            print("Comando 'Ingresar a elemento detectado.'")
-            element_name = self.name_extractor.extract_element_name(command)
-            element = self.inventory_service.enter_element(element_name)
-            
-            await self.sio.emit("command_executed", {"action": "enter_element", "element": element})
-            print("✅ Evento emitido correctamente")
-        
-        elif any(keyword in command for keyword in ["iniciar grabación", "empezar a grabar", "comenzar grabación"]):
-            print("🎬 Comando 'Iniciar Grabación' detectado.")
-            await self.sio.emit("command_executed", {"action": "start_recording"})
-        
-        elif any(keyword in command for keyword in ["detener grabación", "parar grabación", "terminar grabación"]):
-            print("⏹️ Comando 'Detener Grabación' detectado.")
-            await self.sio.emit("command_executed", {"action": "stop_recording"})
-        
-        else:
+    async def _process_command(self, command, speech_end=None):
+        match = self.commands.parse(command)
+        if match is not None and match.intent == self._early_intent:
+            # Ya se ejecutó desde un resultado parcial de esta misma frase
+            print(f"⏩ Comando '{match.intent}' ya ejecutado, se omite el resultado final")
+            return
+        await self._execute_command(match, command, speech_end)
+
+    async def _execute_command(self, match, command, speech_end=None):
+        handler = self._command_handlers.get(match.intent) if match else None
+        if handler is None:
             print(f"❓ Comando no reconocido: '{command}'")
             await self.sio.emit("command_executed", {
                 "action": "command_not_recognized", 
                 "command": command
             })
+            return
+        await handler(match)
+        if speech_end is not None:
+            # Desde el último audio con palabras nuevas hasta emitir command_executed
+            latency = time.monotonic() - speech_end
+            self.command_latency.add(latency)
+            _COMMAND_LATENCY_SECONDS.labels(match.intent).observe(latency)
+
+    async def _on_capture_photo(self, match):
+        print("📸 Comando de captura detectado.")
+        
+        if self.video_processor is None:
+            print("❌ Error: No hay VideoProcessorTrack disponible")
+            await self.sio.emit("command_executed", {
+                "action": "error",
+                "message": "No video processor available"
+            })
+            return
+        
+        captured_image_path = await self.video_processor.capture_frame()
+        if captured_image_path:
+            self.inventory_service.save_image(captured_image_path)
+            await self.sio.emit("command_executed", {
+                "action": "photo_captured",
+                "path": captured_image_path,
+                "capture_ms": self.video_processor.last_capture.total_ms
+            })
+        else:
+            await self.sio.emit("command_executed", {
+                "action": "error",
+                "message": "Failed to capture frame"
+            })
+
+    async def _on_enter_space(self, match):
+        print("Comando 'Ingresar a espacio detectado.'")
+        space = self.inventory_service.enter_space(match.slots["space_name"])
+        if self.grammar is not None:
+            self.grammar.add_names(match.slots["space_name"])
+        try:
+            await self.sio.emit("command_executed", {"action": "enter_space", "space": space})
+            print("✅ Evento emitido correctamente")
+        except Exception as e:
+            print("❌ Error al emitir evento:", str(e))
+
+    async def _on_enter_elements(self, match):
+        print("Comando 'El espacio tiene elementos' detectado.'")
+        elements = match.slots["elements"] or []
+        print("Elementos detectados:", elements)
+        
+        created_elements = []
+        for el in elements:
+            element = self.inventory_service.enter_element(el["name"], description=el.get("color"), amount=el["amount"])
+            created_elements.append(element)
+        if self.grammar is not None:
+            self.grammar.add_names(*(el["name"] for el in elements))
+            
+        # enter_element ya devuelve dicts serializados
+        await self.sio.emit("command_executed", {"action": "enter_elements", "elements": created_elements})
+
+    async def _on_enter_element(self, match):
+        print("Comando 'Ingresar a elemento detectado.'")
+        element = self.inventory_service.enter_element(match.slots["element_name"])
+        if self.grammar is not None:
+            self.grammar.add_names(match.slots["element_name"])
+        
+        await self.sio.emit("command_executed", {"action": "enter_element", "element": element})
+        print("✅ Evento emitido correctamente")
+
+    async def _on_start_recording(self, match):
+        print("🎬 Comando 'Iniciar Grabación' detectado.")
+        await self.sio.emit("command_executed", {"action": "start_recording"})
+
+    async def _on_stop_recording(self, match):
+        print("⏹️ Comando 'Detener Grabación' detectado.")
+        await self.sio.emit("command_executed", {"action": "stop_recording"})
 
     async def recv(self):
         """Método requerido por MediaStreamTrack, no usado aquí."""
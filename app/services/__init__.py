@@ -1,4 +1,20 @@
 from .inventory_service import InventoryService
+from .async_inventory_service import AsyncInventoryService
 from .name_extraction_service import NameExtractionService
+from .command_registry import CommandRegistry, get_command_registry
+from .recognition_service import RecognitionExecutor, get_recognition_executor
+from .speech_model_service import VoskModelRegistry, get_vosk_model_registry
+from .sync_service import SyncService
 
-__all__ = ['InventoryService', 'NameExtractionService']
\ No newline at end of file
+__all__ = [
+    'InventoryService',
+    'AsyncInventoryService',
+    'NameExtractionService',
+    'CommandRegistry',
+    'get_command_registry',
+    'RecognitionExecutor',
+    'get_recognition_executor',
+    'VoskModelRegistry',
+    'get_vosk_model_registry',
+    'SyncService'
+]
\ No newline at end of file
@@ -0,0 +1,92 @@
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import functools
+
+from app import config
+from .inventory_service import InventoryService
+
+
+class AsyncInventoryService:
+    """Fachada asíncrona de InventoryService: cada llamada corre en el pool de base de datos.
+
+    Las lecturas pueden ejecutarse en paralelo; los métodos que cambian el contexto
+    actual (inventario/espacio/elemento) se serializan para no mezclar su estado.
+    """
+
+    def __init__(self, inventory_service: InventoryService, executor=None):
+        self.inventory_service = inventory_service
+        self.executor = executor or get_db_executor()
+        self._context_lock = asyncio.Lock()
+
+    async def _run(self, fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(fn, *args, **kwargs))
+
+    async def _run_exclusive(self, fn, *args, **kwargs):
+        async with self._context_lock:
+            return await self._run(fn, *args, **kwargs)
+
+    async def enter_inventory(self, property_id, inventory_type_id, event_id, session_id=None):
+        def enter():
+            # Crear el contexto de una sesión nueva lee la base de datos: también en el pool
+            service = self.inventory_service.for_session(session_id)
+            return service.enter_inventory(property_id, inventory_type_id, event_id)
+        return await self._run_exclusive(enter)
+
+    async def enter_space(self, space_name, description=None):
+        return await self._run_exclusive(self.inventory_service.enter_space, space_name, description)
+
+    async def enter_element(self, element_name, description=None, amount=1):
+        return await self._run_exclusive(
+            self.inventory_service.enter_element, element_name, description=description, amount=amount
+        )
+
+    async def get_inventories(self):
+        return await self._run(self.inventory_service.get_inventories)
+
+    async def list_inventories(self, **kwargs):
+        return await self._run(self.inventory_service.list_inventories, **kwargs)
+
+    async def iter_inventories(self, **kwargs):
+        """Versión asíncrona de iter_inventories: cada lote se lee en el pool de base de datos."""
+        batches = self.inventory_service.iter_inventories(**kwargs)
+        try:
+            while True:
+                batch = await self._run(next, batches, None)
+                if batch is None:
+                    break
+                yield batch
+        finally:
+            # Cerrar el generador (y su sesión) en el pool, no en el event loop
+            await self._run(batches.close)
+
+    async def get_inventory(self, inventory_id):
+        return await self._run(self.inventory_service.get_inventory, inventory_id)
+
+    async def get_context(self, session_id=None):
+        """Contexto de la sesión indicada (o el por defecto); LookupError si la sesión no existe."""
+        service = self.inventory_service.for_session(session_id, create=False)
+        if service is None:
+            raise LookupError(f"Sesión desconocida: {session_id}")
+        return await self._run(service.get_context)
+
+
+_executor = None
+
+
+def get_db_executor():
+    """Pool de hilos compartido para las consultas a la base de datos."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=config.DB_EXECUTOR_WORKERS,
+            thread_name_prefix="db"
+        )
+    return _executor
+
+
+def shutdown_db_executor():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
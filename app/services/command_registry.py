@@ -0,0 +1,157 @@
+import re
+import threading
+
+from .name_extraction_service import NameExtractionService
+
+
+class CommandMatch:
+    """Resultado de parse(): intención reconocida y sus slots ya normalizados."""
+
+    __slots__ = ("intent", "slots", "text")
+
+    def __init__(self, intent, slots, text):
+        self.intent = intent
+        self.slots = slots
+        self.text = text
+
+    def __repr__(self):
+        return f"CommandMatch(intent={self.intent!r}, slots={self.slots!r})"
+
+
+class Intent:
+    __slots__ = ("name", "triggers", "slot", "parse", "early_commit")
+
+    def __init__(self, name, triggers, slot=None, parse=None, early_commit=False):
+        self.name = name
+        self.triggers = tuple(triggers)
+        self.slot = slot
+        self.parse = parse
+        # Sin slot que esperar: puede ejecutarse desde un resultado parcial
+        self.early_commit = early_commit and slot is None
+
+
+def _phrase_pattern(phrase):
+    # parse() recibe el texto en minúsculas: sin IGNORECASE el motor compara literales
+    return r"\s+".join(re.escape(word) for word in phrase.lower().split())
+
+
+class CommandRegistry:
+    """Gramática de comandos de voz: cada intención con sus frases disparadoras y su slot.
+
+    Todas las frases se compilan en una sola expresión regular y parse() recorre
+    la transcripción una vez, devolviendo la intención y sus slots juntos. Si
+    aparecen disparadores de varias intenciones gana la registrada primero, igual
+    que en la antigua cadena if/elif. El slot es el texto que sigue a la frase
+    disparadora; `parse` lo normaliza (nombre limpio, lista de elementos, ...).
+    """
+
+    def __init__(self):
+        self._intents = []
+        self._pattern = None
+        self._lock = threading.Lock()
+
+    def register(self, name, triggers, slot=None, parse=None, early_commit=False):
+        """Agrega una intención; la expresión combinada se recompila en el próximo parse().
+
+        `early_commit` permite ejecutarla desde resultados parciales (solo sin slot).
+        """
+        with self._lock:
+            if any(intent.name == name for intent in self._intents):
+                raise ValueError(f"Intención ya registrada: {name}")
+            self._intents.append(Intent(name, triggers, slot=slot, parse=parse, early_commit=early_commit))
+            self._pattern = None
+
+    def allows_early_commit(self, name):
+        return any(intent.name == name and intent.early_commit for intent in self._intents)
+
+    @property
+    def intents(self):
+        return tuple(intent.name for intent in self._intents)
+
+    def phrases(self):
+        """Todas las frases disparadoras, en orden de prioridad."""
+        return [trigger for intent in self._intents for trigger in intent.triggers]
+
+    def _compile(self):
+        alternatives = []
+        for index, intent in enumerate(self._intents):
+            # Las frases más largas primero: "tomar foto" antes que "foto"
+            triggers = sorted(intent.triggers, key=len, reverse=True)
+            body = "|".join(_phrase_pattern(t) for t in triggers)
+            alternatives.append(f"(?P<i{index}>{body})")
+        return re.compile("|".join(alternatives))
+
+    def _compiled(self):
+        pattern = self._pattern
+        if pattern is None:
+            with self._lock:
+                if self._pattern is None:
+                    self._pattern = self._compile()
+                pattern = self._pattern
+        return pattern
+
+    def parse(self, text):
+        """Devuelve el CommandMatch de mayor prioridad presente en `text`, o None."""
+        text = text.lower().strip()
+        best_index = None
+        best_match = None
+        for match in self._compiled().finditer(text):
+            index = int(match.lastgroup[1:])
+            if best_index is None or index < best_index:
+                best_index, best_match = index, match
+                if index == 0:
+                    break
+
+        if best_match is None:
+            return None
+
+        intent = self._intents[best_index]
+        slots = {}
+        if intent.slot:
+            value = text[best_match.end():].strip() or None
+            if value is not None and intent.parse is not None:
+                value = intent.parse(value)
+            slots[intent.slot] = value
+        return CommandMatch(intent.name, slots, text)
+
+
+def build_default_registry(name_extractor=None):
+    """Comandos de voz de la aplicación, en orden de prioridad."""
+    extractor = name_extractor or NameExtractionService()
+    registry = CommandRegistry()
+    registry.register(
+        "capture_photo", ["tomar foto", "capturar", "saca foto", "fotografía", "foto"], early_commit=True
+    )
+    registry.register(
+        "enter_space", ["ingresar a espacio", "entrar al espacio", "abrir espacio"],
+        slot="space_name", parse=extractor.normalize_name
+    )
+    registry.register(
+        "enter_elements", ["el espacio tiene"],
+        slot="elements", parse=extractor.extract_elements_from_command
+    )
+    registry.register(
+        "enter_element", ["ingresar a elemento", "entrar al elemento", "abrir elemento"],
+        slot="element_name", parse=extractor.normalize_name
+    )
+    registry.register(
+        "start_recording", ["iniciar grabación", "empezar a grabar", "comenzar grabación"], early_commit=True
+    )
+    registry.register(
+        "stop_recording", ["detener grabación", "parar grabación", "terminar grabación"], early_commit=True
+    )
+    return registry
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_command_registry():
+    """Registro de comandos compartido por todas las sesiones."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = build_default_registry()
+    return _registry
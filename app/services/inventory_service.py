@@ -1,47 +1,88 @@
-from app.models.database import DatabaseManager, Inventory, Space, Element, Attribute, Image, Video, SessionContext
+from app.models.database import normalize_uuid, DatabaseManager, Inventory, Space, Element, Attribute, Image, Video, SyncState
 from datetime import datetime
 import os
-import cv2
-from app.utils.serializers import to_dict_model
-from sqlalchemy.orm import joinedload
 from app.utils.serializers import to_dict_model
+from sqlalchemy import and_, or_, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload, selectinload, load_only
+from app.utils.pagination import encode_cursor, decode_cursor
+from app import config
+from app.utils.metrics import REGISTRY, timed
+from .session_context_cache import get_session_context_cache, find_session_context_cache, release_session_context_cache
+
+# Relaciones incluidas por nivel de profundidad en list_inventories
+INVENTORY_TREE_BY_DEPTH = {
+    0: {},
+    1: {"spaces": {}},
+    2: {"spaces": {"elements": {}, "images": {}, "videos": {}}},
+    3: {"spaces": {"elements": {"attributes": {}, "images": {}}, "images": {}, "videos": {}}},
+}
+
+INVENTORY_LIST_MAX_LIMIT = 500
+
+_DB_QUERY_SECONDS = REGISTRY.histogram(
+    "db_query_seconds", "Tiempo de cada método de InventoryService", ("method",)
+)
+# Mide la llamada completa (sesión, consultas y commit), etiquetada con el nombre del método
+_db_timed = timed(_DB_QUERY_SECONDS)
+
 
 class InventoryService:
-    def __init__(self, db_path='/app/data/inventory.db'):
-        self.db_manager = DatabaseManager(db_path)
-        self.db_manager.create_tables()
-        self.current_inventory_id = None
-        self.current_space_id = None
-        self.current_element_id = None
+    def __init__(self, db_path=None, session_id=None):
+        # El engine (y la creación de tablas) se comparte entre todas las instancias
+        self.db_path = db_path or config.DB_PATH
+        self.db_manager = DatabaseManager(self.db_path)
+        # Contexto de navegación propio de cada inspector (session_id = senderId);
+        # sin session_id se usa el contexto por defecto de la API
+        self.session_id = session_id
+        self.context = get_session_context_cache(self.db_manager, session_id)
         
-        self.load_context()
+    def for_session(self, session_id, create=True):
+        """InventoryService sobre el contexto de `session_id`; con create=False, None si no existe."""
+        if session_id is None:
+            return self
+        if not create and find_session_context_cache(self.db_manager, session_id) is None:
+            return None
+        return InventoryService(self.db_path, session_id=session_id)
+    
+    def close_session(self):
+        """Libera el contexto de la sesión y borra su fila (no bloquea)."""
+        release_session_context_cache(self.db_manager, self.session_id)
         
+    @property
+    def current_inventory_id(self):
+        return self.context.inventory_id
+    
+    @property
+    def current_space_id(self):
+        return self.context.space_id
+    
+    @property
+    def current_element_id(self):
+        return self.context.element_id
+        
+    @_db_timed
     def enter_inventory(self, property_id, inventory_type_id, event_id):
         session = self.db_manager.get_session()
         try:
-            inventory = session.query(Inventory).filter_by(
+            inventory = self._get_or_create(
+                session, Inventory,
                 property_id=property_id,
                 inventory_type_id=inventory_type_id,
                 event_id=event_id
-            ).first()
-            
-            if not inventory:
-                inventory = Inventory(
-                    property_id=property_id,
-                    inventory_type_id=inventory_type_id,
-                    event_id=event_id
-                )
-                session.add(inventory)
-                session.commit()
+            )
                 
-            self.reset_current_status()
-            self.current_inventory_id = inventory.id
-            self.save_context()
+            self.context.update(
+                inventory_id=inventory.id,
+                space_id=None, space_name=None,
+                element_id=None, element_name=None
+            )
             
             return to_dict_model(inventory)
         finally:
             session.close()
     
+    @_db_timed
     def get_inventories(self):
         session = self.db_manager.get_session()
         try:
@@ -62,7 +103,141 @@ class InventoryService:
         finally:
             session.close()
             
+    @_db_timed
+    def get_vocabulary_names(self):
+        """Nombres distintos de espacios y elementos, para la gramática del reconocedor."""
+        session = self.db_manager.get_session()
+        try:
+            names = set()
+            for column in (Space.name, Element.name):
+                names.update(name for (name,) in session.query(column).distinct())
+            return names
+        finally:
+            session.close()
+            
+    @_db_timed
+    def list_inventories(self, limit=100, cursor=None, property_id=None, event_id=None,
+                         synced=None, updated_since=None, depth=3, fields=None):
+        """Página de inventarios ordenada por (updated_at, id) con filtros y proyección.
+
+        Devuelve (inventarios, next_cursor); next_cursor es None en la última página.
+        """
+        limit = max(1, min(int(limit), INVENTORY_LIST_MAX_LIMIT))
+        if depth not in INVENTORY_TREE_BY_DEPTH:
+            raise ValueError(f"depth debe estar entre 0 y {max(INVENTORY_TREE_BY_DEPTH)}")
+        
+        columns = Inventory.__table__.columns
+        if fields is not None:
+            unknown = [f for f in fields if f not in columns]
+            if unknown:
+                raise ValueError(f"Campos desconocidos: {', '.join(unknown)}")
+            # La clave primaria siempre se devuelve: sin ella el cliente no puede referirse a la fila
+            fields = ["id", *(f for f in fields if f != "id")]
+        
+        session = self.db_manager.get_session()
+        try:
+            query = session.query(Inventory)
+            
+            if fields is not None:
+                # id y updated_at se cargan siempre: forman el cursor
+                loaded = set(fields) | {"id", "updated_at"}
+                query = query.options(load_only(*(getattr(Inventory, name) for name in loaded)))
+            
+            # selectinload respeta el LIMIT (joinedload sobre colecciones lo desvirtúa)
+            tree = INVENTORY_TREE_BY_DEPTH[depth]
+            query = query.options(*self._inventory_tree_loaders(depth))
+            
+            query = query.filter(*self._inventory_filters(property_id, event_id, synced, updated_since))
+            
+            if cursor:
+                cursor_updated_at, cursor_id = decode_cursor(cursor)
+                try:
+                    cursor_id = normalize_uuid(cursor_id)
+                except ValueError:
+                    raise ValueError("Cursor inválido")
+                query = query.filter(or_(
+                    Inventory.updated_at > cursor_updated_at,
+                    and_(Inventory.updated_at == cursor_updated_at, Inventory.id > cursor_id)
+                ))
+            
+            rows = (
+                query.order_by(Inventory.updated_at, Inventory.id)
+                .limit(limit + 1)
+                .all()
+            )
+            
+            has_more = len(rows) > limit
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1].updated_at, rows[-1].id) if has_more else None
+            
+            result = [to_dict_model(inv, include=tree, fields=fields) for inv in rows]
+            return result, next_cursor
+        finally:
+            session.close()
+            
+    def iter_inventories(self, batch_size=200, depth=3, property_id=None, event_id=None,
+                         synced=None, updated_since=None):
+        """Genera lotes de inventarios serializados leyendo con un cursor del servidor.
+
+        Cada lote se carga con yield_per (sus relaciones con selectinload); el
+        identity map guarda referencias débiles, así que los objetos de un lote se
+        liberan al pasar al siguiente y la memoria no crece con la base de datos.
+        """
+        if depth not in INVENTORY_TREE_BY_DEPTH:
+            raise ValueError(f"depth debe estar entre 0 y {max(INVENTORY_TREE_BY_DEPTH)}")
+        tree = INVENTORY_TREE_BY_DEPTH[depth]
+        
+        session = self.db_manager.get_session()
+        try:
+            statement = (
+                select(Inventory)
+                .where(*self._inventory_filters(property_id, event_id, synced, updated_since))
+                .options(*self._inventory_tree_loaders(depth))
+                .order_by(Inventory.updated_at, Inventory.id)
+                .execution_options(yield_per=batch_size)
+            )
+            for partition in session.execute(statement).scalars().partitions():
+                yield [to_dict_model(inv, include=tree) for inv in partition]
+        finally:
+            session.close()
+            
+    @staticmethod
+    def _inventory_filters(property_id=None, event_id=None, synced=None, updated_since=None):
+        criteria = []
+        if property_id is not None:
+            criteria.append(Inventory.property_id == property_id)
+        if event_id is not None:
+            criteria.append(Inventory.event_id == event_id)
+        if synced is not None:
+            criteria.append(Inventory.synced == synced)
+        if updated_since is not None:
+            criteria.append(Inventory.updated_at >= updated_since)
+        return criteria
+            
+    @staticmethod
+    def _inventory_tree_loaders(depth):
+        spaces = selectinload(Inventory.spaces)
+        loaders = []
+        if depth >= 1:
+            loaders.append(spaces)
+        if depth >= 2:
+            loaders += [
+                spaces.selectinload(Space.elements),
+                spaces.selectinload(Space.images),
+                spaces.selectinload(Space.videos),
+            ]
+        if depth >= 3:
+            elements = spaces.selectinload(Space.elements)
+            loaders += [
+                elements.selectinload(Element.attributes),
+                elements.selectinload(Element.images),
+            ]
+        return loaders
+            
+    @_db_timed
     def get_inventory(self, inventory_id):
+        """Inventario con sus relaciones; ValueError si el id no es un UUID, LookupError si no existe."""
+        inventory_id = normalize_uuid(inventory_id)
         session = self.db_manager.get_session()
         try:
             inventory = (
@@ -79,7 +254,7 @@ class InventoryService:
             )
             
             if not inventory:
-                raise ValueError(f"No se encontró inventario con id {inventory_id}")
+                raise LookupError(f"No se encontró inventario con id {inventory_id}")
             
             result = to_dict_model(inventory, include_relationships=True)
             return result
@@ -87,29 +262,24 @@ class InventoryService:
             session.close()
             
     # ============ SPACES ============    
+    @_db_timed
     def enter_space(self, space_name, description=None):
         if not self.current_inventory_id:
             raise ValueError("Debe crear o seleccionar un inventario primero")
         
         session = self.db_manager.get_session()
         try:
-            space = session.query(Space).filter_by(
+            space = self._get_or_create(
+                session, Space,
+                defaults={'description': description},
                 inventory_id=self.current_inventory_id,
                 name=space_name
-            ).first()
-            
-            if not space:
-                space = Space(
-                    inventory_id=self.current_inventory_id,
-                    name=space_name,
-                    description=description
-                )
-                session.add(space)
-                session.commit()
+            )
             
-            self.current_space_id = space.id
-            self.current_element_id = None
-            self.save_context()
+            self.context.update(
+                space_id=space.id, space_name=space.name,
+                element_id=None, element_name=None
+            )
             
             print("Espacio json: ", to_dict_model(space))
             
@@ -117,6 +287,7 @@ class InventoryService:
         finally:
             session.close()
     
+    @_db_timed
     def get_spaces(self, inventory_id=None):
         inv_id = inventory_id or self.current_inventory_id
         if not inv_id:
@@ -129,30 +300,22 @@ class InventoryService:
             session.close()
             
     # ============ ELEMENTS ============    
+    @_db_timed
     def enter_element(self, element_name, description=None, amount=1):
         if not self.current_space_id:
             raise ValueError("Debe ingresar a un espacio primero")
         
+        space_id = self.current_space_id
         session = self.db_manager.get_session()
         try:
-            ctx = session.query(SessionContext).first()
-            element = session.query(Element).filter_by(
-                space_id=ctx.current_space_id,
+            element = self._get_or_create(
+                session, Element,
+                defaults={'description': description, 'amount': amount},
+                space_id=space_id,
                 name=element_name
-            ).first()
-            
-            if not element:
-                element = Element(
-                    space_id=ctx.current_space_id,
-                    name=element_name,
-                    description=description,
-                    amount=amount
-                )
-                session.add(element)
-                session.commit()
+            )
             
-            self.current_element_id = element.id
-            self.save_context()
+            self.context.update(element_id=element.id, element_name=element.name)
             
             print("Element json: ", to_dict_model(element))
             
@@ -160,6 +323,7 @@ class InventoryService:
         finally:
             session.close()
     
+    @_db_timed
     def get_elements(self, space_id=None):
         spac_id = space_id or self.current_space_id
         if not spac_id:
@@ -172,6 +336,7 @@ class InventoryService:
             session.close()
             
     # ============ ATTRIBUTES ============    
+    @_db_timed
     def enter_attribute(self, key, value):
         if not self.current_element_id:
             raise ValueError("Debe ingresar a un elemento primero")
@@ -189,6 +354,7 @@ class InventoryService:
         finally:
             session.close()
     
+    @_db_timed
     def get_attributes(self, element_id=None):
         elem_id = element_id or self.current_element_id
         if not elem_id:
@@ -201,22 +367,23 @@ class InventoryService:
             session.close()
     
     # ============ IMAGES ============
+    @_db_timed
     def save_image(self, image_path, description=None):
-        session = self.db_manager.get_session()
-        ctx = session.query(SessionContext).first()
-        spac_id = ctx.current_space_id
+        ctx = self.context.snapshot()
+        spac_id = ctx["space_id"]
         
         if not spac_id:
             raise ValueError("Debe ingresar a un espacio primero")
           
-        elem_id = ctx.current_element_id
+        elem_id = ctx["element_id"]
         if not elem_id:
             raise ValueError("Debe ingresar a un elemento primero")
         
+        session = self.db_manager.get_session()
         try:
             image = Image(
-                space_id=ctx.current_space_id,
-                element_id=ctx.current_element_id,
+                space_id=spac_id,
+                element_id=elem_id,
                 path=image_path,
                 description=description
             )
@@ -226,6 +393,7 @@ class InventoryService:
         finally:
             session.close()
     
+    @_db_timed
     def get_images(self, element_id=None):
         elem_id = element_id or self.current_element_id
         if not elem_id:
@@ -238,6 +406,7 @@ class InventoryService:
             session.close()
             
     # ============ VIDEOS ============
+    @_db_timed
     def save_video(self, video_data, description=None, video_folder='videos'):
         if not self.current_space_id:
             raise ValueError("Debe ingresar a un espacio primero")
@@ -275,6 +444,7 @@ class InventoryService:
         finally:
             session.close()
     
+    @_db_timed
     def get_videos(self, space_id=None):
         spac_id = space_id or self.current_space_id
         if not spac_id:
@@ -287,6 +457,7 @@ class InventoryService:
             session.close()
     
     # ============ SINCRONIZACIÓN ============
+    @_db_timed
     def get_pending_sync(self):
         session = self.db_manager.get_session()
         try:
@@ -302,20 +473,133 @@ class InventoryService:
         finally:
             session.close()
     
+    @_db_timed
     def mark_as_synced(self, model, ids):
         """Marca registros como sincronizados"""
         session = self.db_manager.get_session()
         try:
             session.query(model).filter(model.id.in_(ids)).update(
-                {'synced': True}, 
+                # Conservar updated_at: el onupdate lo haría parecer modificado otra vez
+                {'synced': True, 'updated_at': model.updated_at},
+                synchronize_session=False
+            )
+            session.commit()
+        finally:
+            session.close()
+            
+    @_db_timed
+    def get_pending_sync_batch(self, model, batch_size, high_water_mark=None, after=None):
+        """Lote de registros pendientes de `model` ordenado por (updated_at, id).
+
+        Pendiente = synced=False o con clave (updated_at, id) posterior al
+        high-water mark, que es una clave (updated_at, id) o (updated_at, None).
+        `after` es la clave (updated_at, id) del último registro del lote anterior.
+        Devuelve (registros serializados, clave del último registro o None).
+        """
+        session = self.db_manager.get_session()
+        try:
+            pending = model.synced == False  # noqa: E712
+            if high_water_mark is not None:
+                mark_updated_at, mark_id = high_water_mark
+                if mark_id is None:
+                    # Marca guardada antes de existir high_water_id
+                    modified = model.updated_at > mark_updated_at
+                else:
+                    modified = or_(
+                        model.updated_at > mark_updated_at,
+                        and_(model.updated_at == mark_updated_at, model.id > mark_id)
+                    )
+                pending = or_(pending, modified)
+            query = session.query(model).filter(pending)
+            
+            if after is not None:
+                after_updated_at, after_id = after
+                query = query.filter(or_(
+                    model.updated_at > after_updated_at,
+                    and_(model.updated_at == after_updated_at, model.id > after_id)
+                ))
+            
+            rows = query.order_by(model.updated_at, model.id).limit(batch_size).all()
+            last_key = (rows[-1].updated_at, rows[-1].id) if rows else None
+            return [to_dict_model(row) for row in rows], last_key
+        finally:
+            session.close()
+            
+    @_db_timed
+    def mark_batch_synced(self, model, entity, ids, high_water_mark, origin_ids=None):
+        """Marca el lote como sincronizado y avanza el high-water mark en una sola transacción.
+
+        `high_water_mark` es la clave (updated_at, id) del último registro del lote.
+        """
+        session = self.db_manager.get_session()
+        try:
+            session.query(model).filter(model.id.in_(ids)).update(
+                {'synced': True, 'updated_at': model.updated_at},
                 synchronize_session=False
             )
+            # Solo ids del propio lote: el servidor central no puede tocar otras filas
+            batch_ids = set(ids)
+            for local_id, origin_id in (origin_ids or {}).items():
+                if local_id not in batch_ids:
+                    continue
+                session.query(model).filter(model.id == local_id).update(
+                    {'origin_id': origin_id, 'updated_at': model.updated_at},
+                    synchronize_session=False
+                )
+            
+            state = session.get(SyncState, entity)
+            if state is None:
+                state = SyncState(entity=entity)
+                session.add(state)
+            if high_water_mark is not None and high_water_mark[0] is not None:
+                current = (state.high_water_mark, state.high_water_id)
+                if current[0] is None or high_water_mark > (current[0], current[1] or ""):
+                    state.high_water_mark, state.high_water_id = high_water_mark
+            state.last_synced_at = datetime.utcnow()
+            
             session.commit()
+        except Exception:
+            session.rollback()
+            raise
         finally:
             session.close()
             
+    @_db_timed
+    def get_sync_high_water_mark(self, entity):
+        session = self.db_manager.get_session()
+        try:
+            state = session.get(SyncState, entity)
+            if state is None or state.high_water_mark is None:
+                return None
+            return state.high_water_mark, state.high_water_id
+        finally:
+            session.close()
     
     # ============ UTILS ============
+    @staticmethod
+    def _get_or_create(session, model, defaults=None, **keys):
+        """Busca por clave natural y crea si no existe.
+
+        La restricción única de la clave es la que decide: si otra sesión insertó
+        la misma fila entre la búsqueda y el commit, el IntegrityError se resuelve
+        releyendo la fila ganadora.
+        """
+        instance = session.query(model).filter_by(**keys).first()
+        if instance:
+            return instance
+        
+        instance = model(**keys, **(defaults or {}))
+        session.add(instance)
+        try:
+            session.commit()
+            return instance
+        except IntegrityError:
+            session.rollback()
+            instance = session.query(model).filter_by(**keys).first()
+            if instance is None:
+                raise
+            return instance
+        
     def get_current_status(self):
         return {
             'inventory_id': self.current_inventory_id,
@@ -324,58 +608,47 @@ class InventoryService:
         }
         
     def reset_current_status(self):
-        self.current_inventory_id = None
-        self.current_space_id = None
-        self.current_element_id = None
+        self.context.update(
+            inventory_id=None,
+            space_id=None, space_name=None,
+            element_id=None, element_name=None
+        )
         
         
     # ============ SESSION CONTEXT ============
+    @_db_timed
     def save_context(self):
-        session = self.db_manager.get_session()
-        try:
-            ctx = session.query(SessionContext).first()
-            if not ctx:
-                ctx = SessionContext()
-                session.add(ctx)
-            
-            ctx.current_inventory_id = self.current_inventory_id
-            ctx.current_space_id = self.current_space_id
-            ctx.current_element_id = self.current_element_id
-            session.commit()
-        finally:
-            session.close()
+        """Persiste de inmediato los cambios pendientes del contexto."""
+        self.context.flush()
                        
+    @_db_timed
     def load_context(self):
-        session = self.db_manager.get_session()
-        try:
-            ctx = session.query(SessionContext).first()
-            print('Session context: ', {
-                "inventory_id": ctx.current_inventory_id if ctx else None,
-                "space_id":  ctx.current_space_id if ctx else None,
-                "element_id": ctx.current_element_id if ctx else None
-            })
-            if ctx:
-                self.current_inventory_id = ctx.current_inventory_id
-                self.current_space_id = ctx.current_space_id
-                self.current_element_id = ctx.current_element_id
-            else:
-                self.reset_current_status()
-        finally:
-            session.close()
+        self.context.reload()
             
+    @_db_timed
     def get_context(self):
-        session = self.db_manager.get_session()
-        try:
-            ctx = session.query(SessionContext).first()
-            space = session.get(Space, ctx.current_space_id) if ctx.current_space_id else None
-            element = session.get(Element, ctx.current_element_id) if ctx.current_element_id else None
-            
-            return {
-                "inventory_id": ctx.current_inventory_id if ctx else None,
-                "space_name": space.name if space else None,
-                "element_name": element.name if element else None,
-            }
-                
-        finally:
-            session.close()
+        # Copia consistente: update() puede cambiar el contexto desde el event loop
+        ctx = self.context.snapshot()
+        space_id, element_id = ctx["space_id"], ctx["element_id"]
+        space_name, element_name = ctx["space_name"], ctx["element_name"]
+        
+        # Los nombres solo se consultan si no están en memoria (p. ej. tras reiniciar)
+        if (space_id and space_name is None) or (element_id and element_name is None):
+            session = self.db_manager.get_session()
+            try:
+                if space_id and space_name is None:
+                    space = session.get(Space, space_id)
+                    space_name = space.name if space else None
+                if element_id and element_name is None:
+                    element = session.get(Element, element_id)
+                    element_name = element.name if element else None
+            finally:
+                session.close()
+            self.context.remember_names(space_id, space_name, element_id, element_name)
+        
+        return {
+            "inventory_id": ctx["inventory_id"],
+            "space_name": space_name,
+            "element_name": element_name,
+        }
         
\ No newline at end of file
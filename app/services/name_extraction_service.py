@@ -1,9 +1,38 @@
 import re
 from typing import Optional, List, Dict
 
+_CAPTURE_GROUP = re.compile(r"\((?!\?)")
+_TOKEN = re.compile(r"\w+")
+_PART_SEPARATOR = re.compile(r",| y ")
+_TRAILING_SUFFIXES = ('por favor', 'porfavor', 'gracias', 'ahora', 'ya', 'también', 'favor')
+_TRAILING_WORDS = re.compile(r"(?:\s*\b(?:" + "|".join(_TRAILING_SUFFIXES) + r"))+$")
+
+
+def _combine(patterns):
+  """Une una familia de patrones en una sola expresión que respeta su orden.
+
+  Cada alternativa es `.*?patrón` anclada al inicio: el motor agota la primera
+  antes de probar la siguiente, igual que el antiguo bucle de re.search. El grupo
+  de captura de cada patrón pasa a llamarse v0, v1, ... para leerlo con lastgroup.
+  """
+  alternatives = [
+    ".*?" + _CAPTURE_GROUP.sub(f"(?P<v{i}>", pattern, count=1)
+    for i, pattern in enumerate(patterns)
+  ]
+  return re.compile("(?:" + "|".join(alternatives) + ")", re.DOTALL)
+
+
+def _color_forms(color):
+  # "rojo" también aparece como roja/rojos/rojas; "azul" como azules
+  if color.endswith("o"):
+    stem = color[:-1]
+    return (color, stem + "a", stem + "os", stem + "as")
+  return (color, color + "s", color + "es")
+
+
 class NameExtractionService:
   def __init__(self):
-    self.connectors = ['de', 'del', 'la', 'el', 'los', 'las', 'con', 'y', 'a']
+    self.connectors = frozenset(['de', 'del', 'la', 'el', 'los', 'las', 'con', 'y', 'a'])
     self.color_words = ["rojo", "azul", "verde", "blanco", "negro", "gris", "amarillo"]
     self.number_words = {
       "un": 1, "una": 1, "uno": 1,
@@ -11,6 +40,10 @@ class NameExtractionService:
       "cinco": 5, "seis": 6, "siete": 7,
       "ocho": 8, "nueve": 9, "diez": 10
     }
+    # Forma flexionada -> color canónico, para buscar por token en O(1)
+    self.color_forms = {
+      form: color for color in self.color_words for form in _color_forms(color)
+    }
     self._setup_patterns()
     
   def _setup_patterns(self):        
@@ -72,84 +105,87 @@ class NameExtractionService:
       ]
     }
     
+    # Cada familia compilada una sola vez como una alternativa combinada
+    self._space_re = _combine(self.space_patterns)
+    self._element_re = _combine(self.element_patterns)
+    self._attribute_res = {
+      attribute: _combine(patterns)
+      for attribute, patterns in self.attribute_patterns.items()
+    }
+    
+  def vocabulary(self) -> set:
+    """Palabras que las extracciones reconocen por sí mismas (números, colores, conectores)."""
+    words = set(self.connectors) | set(self.number_words) | set(self.color_forms)
+    for phrase in _TRAILING_SUFFIXES:
+      words.update(phrase.split())
+    return words
+    
+  def _search(self, compiled, command):
+    match = compiled.match(command)
+    return match.group(match.lastgroup) if match else None
+    
   def extract_space_name(self, command: str) -> Optional[str]:
-    command = command.lower().strip()
-        
-    for pattern in self.space_patterns:
-      match = re.search(pattern, command, re.IGNORECASE)
-      if match:
-        space_name = match.group(1).strip()
-        space_name = self._clean_trailing_words(space_name)
-        
-        return self._capitalize_name(space_name)
+    space_name = self._search(self._space_re, command.lower().strip())
+    if space_name is None:
+      return None
     
-    return None
+    return self._capitalize_name(self._clean_trailing_words(space_name))
   
   def extract_element_name(self, command: str) -> Optional[str]:
-    command = command.lower().strip()
-    
-    for pattern in self.element_patterns:
-      match = re.search(pattern, command, re.IGNORECASE)
-      if match:
-        element_name = match.group(1).strip()
-        element_name = self._clean_trailing_words(element_name)
-        
-        return self._capitalize_name(element_name)
+    element_name = self._search(self._element_re, command.lower().strip())
+    if element_name is None:
+      return None
     
-    return None
+    return self._capitalize_name(self._clean_trailing_words(element_name))
+  
+  def normalize_name(self, name: str) -> Optional[str]:
+    name = self._clean_trailing_words(name.lower().strip())
+    return self._capitalize_name(name) if name else None
   
   def extract_elements_from_command(self, command: str) -> List[Dict]:
       command = command.lower().replace("el espacio tiene", "").strip()
 
-      parts = re.split(r",| y ", command)
       elements = []
 
-      for part in parts:
-        part = part.strip()
-        if not part:
+      for part in _PART_SEPARATOR.split(command):
+        tokens = _TOKEN.findall(part)
+        if not tokens:
             continue
 
-        amount_match = re.search(r"(\d+|un|una|uno|dos|tres|cuatro|cinco|seis|siete|ocho|nueve|diez)", part)
-        amount = 1
-        if amount_match:
-          val = amount_match.group(1)
-          amount = int(val) if val.isdigit() else self.number_words.get(val, 1)
-
+        # Cantidad: primer número (dígitos o palabra); nombre: primera palabra que no lo es
+        amount = None
+        name = None
         color = None
-        for c in self.color_words:
-          if c in part:
-            color = c
-            break
-
-        name_match = re.search(r"(?:\d+|un|una|uno|dos|tres|cuatro|cinco|seis|siete|ocho|nueve|diez)?\s*(\w+)", part)
-        name = name_match.group(1) if name_match else "elemento"
+        for token in tokens:
+          if amount is None and (token.isdigit() or token in self.number_words):
+            amount = int(token) if token.isdigit() else self.number_words[token]
+          elif name is None:
+            name = token
+          if color is None:
+            color = self.color_forms.get(token)
 
         elements.append({
-          "name": name,
-          "amount": amount,
+          "name": name or "elemento",
+          "amount": amount or 1,
           "color": color
         })
 
       return elements
   
   def extract_attribute(self, command: str, attribute_type: str) -> Optional[str]:
-    command = command.lower().strip()
-    if attribute_type not in self.attribute_patterns:
+    compiled = self._attribute_res.get(attribute_type)
+    if compiled is None:
       return None
     
-    patterns = self.attribute_patterns[attribute_type]
-    for pattern in patterns:
-      match = re.search(pattern, command, re.IGNORECASE)
-      if match:
-        value = match.group(1).strip()
-        value = self._clean_trailing_words(value)
-        
-        if attribute_type == 'cantidad':
-            return value
-        
-        return self._capitalize_name(value)
+    value = self._search(compiled, command.lower().strip())
+    if value is None:
+      return None
+    
+    value = self._clean_trailing_words(value)
+    if attribute_type == 'cantidad':
+        return value
     
-    return None
+    return self._capitalize_name(value)
   
   def _capitalize_name(self, name: str) -> str:
     words = name.split()
@@ -167,16 +203,10 @@ class NameExtractionService:
     
   
   def _clean_trailing_words(self, text: str) -> str:
-    trailing_words = [
-      'por favor', 'gracias', 'ahora', 'ya', 
-      'también', 'favor', 'porfavor'
-    ]
-    
+    # Palabras completas al final ("playa" conserva su "ya"), en cualquier orden;
+    # endswith descarta sin regex el caso común de que no haya ninguna
     text = text.strip()
-        
-    for word in trailing_words:
-      if text.lower().endswith(word):
-        text = text[:-len(word)].strip()
-    
+    if text.endswith(_TRAILING_SUFFIXES):
+      text = _TRAILING_WORDS.sub("", text).strip()
     return text
     
\ No newline at end of file
@@ -0,0 +1,182 @@
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import json
+import threading
+import time
+
+from app import config
+from app.utils.metrics import REGISTRY
+
+_DECODE_SECONDS = REGISTRY.histogram(
+    "vosk_decode_seconds", "Tiempo de decodificación de Vosk por chunk", ("op",)
+)
+_ACCEPT_SECONDS = _DECODE_SECONDS.labels("accept")
+_FINAL_SECONDS = _DECODE_SECONDS.labels("final")
+
+
+def _as_bytes(chunk):
+    # La API cffi de Vosk solo acepta bytes; la copia de un memoryview
+    # del ring se hace aquí, en el hilo del pool
+    return chunk if isinstance(chunk, bytes) else bytes(chunk)
+
+
+class RecognitionResult:
+    """Resultado de procesar un chunk de audio en el recognizer."""
+
+    __slots__ = ("final", "text", "decode_time")
+
+    def __init__(self, final, text, decode_time):
+        self.final = final
+        self.text = text
+        self.decode_time = decode_time
+
+
+class RecognitionStream:
+    """Cola acotada de chunks de una sesión hacia su KaldiRecognizer.
+
+    Los chunks se decodifican en orden, uno a la vez, en el pool compartido;
+    cada `feed` devuelve un future que se resuelve con el RecognitionResult.
+    """
+
+    def __init__(self, executor, recognizer, queue_size):
+        self.executor = executor
+        self.recognizer = recognizer
+        self._queue = asyncio.Queue(maxsize=queue_size)
+        # set_grammar corre en el event loop y _apply_pending_grammar en el pool
+        self._grammar_lock = threading.Lock()
+        self._pending_grammar = None
+        # (trabajo en el pool, future del llamador) del chunk en decodificación
+        self._in_flight = None
+        self._worker = asyncio.ensure_future(self._work())
+
+    async def feed(self, chunk):
+        """Encola un chunk (espera si la cola está llena) y devuelve un future con su resultado."""
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((self._accept, chunk, future))
+        return future
+
+    async def flush(self):
+        """Cierra la frase en curso (fin de habla) y devuelve un future con el resultado final."""
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((self._final, b"", future))
+        return future
+
+    async def finish(self, chunk=b""):
+        """Procesa el audio residual y devuelve el resultado final del recognizer."""
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((self._final, chunk, future))
+        return await future
+
+    def saturated(self):
+        """True si la cola está llena y el próximo feed tendría que esperar."""
+        return self._queue.full()
+
+    def set_grammar(self, grammar):
+        """Programa un cambio de gramática; se aplica tras el próximo resultado final.
+
+        Vosk ignora SetGrammar mientras hay una frase en curso, así que el cambio se
+        hace en el hilo del pool justo después de cerrar una frase.
+        """
+        with self._grammar_lock:
+            self._pending_grammar = grammar
+
+    async def close(self):
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        in_flight, self._in_flight = self._in_flight, None
+        if in_flight is not None:
+            job, future = in_flight
+            # Esperar a que el pool suelte el recognizer antes de que el llamador lo libere
+            await asyncio.wait([asyncio.wrap_future(job)])
+            if not future.done():
+                future.cancel()
+        # Liberar a quien siga esperando resultados de chunks no procesados
+        while not self._queue.empty():
+            _, _, future = self._queue.get_nowait()
+            if not future.done():
+                future.cancel()
+
+    async def _work(self):
+        while True:
+            fn, chunk, future = await self._queue.get()
+            try:
+                job = self.executor.pool.submit(fn, chunk)
+                self._in_flight = (job, future)
+                result = await asyncio.wrap_future(job)
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+            else:
+                if not future.done():
+                    future.set_result(result)
+            self._in_flight = None
+
+    # Métodos ejecutados en el pool (fuera del event loop)
+    def _accept(self, chunk):
+        start = time.perf_counter()
+        if self.recognizer.AcceptWaveform(_as_bytes(chunk)):
+            text = json.loads(self.recognizer.Result()).get("text", "")
+            final = True
+            self._apply_pending_grammar()
+        else:
+            text = json.loads(self.recognizer.PartialResult()).get("partial", "")
+            final = False
+        decode_time = time.perf_counter() - start
+        _ACCEPT_SECONDS.observe(decode_time)
+        return RecognitionResult(final, text.strip().lower(), decode_time)
+
+    def _final(self, chunk):
+        start = time.perf_counter()
+        if len(chunk):
+            self.recognizer.AcceptWaveform(_as_bytes(chunk))
+        text = json.loads(self.recognizer.FinalResult()).get("text", "")
+        self._apply_pending_grammar()
+        decode_time = time.perf_counter() - start
+        _FINAL_SECONDS.observe(decode_time)
+        return RecognitionResult(True, text.strip().lower(), decode_time)
+
+    def _apply_pending_grammar(self):
+        with self._grammar_lock:
+            grammar, self._pending_grammar = self._pending_grammar, None
+        if grammar is not None:
+            self.recognizer.SetGrammar(grammar)
+
+
+class RecognitionExecutor:
+    """Pool de hilos compartido por todas las sesiones para decodificar audio con Vosk."""
+
+    def __init__(self, max_workers=None, queue_size=None):
+        self.max_workers = max_workers or config.RECOGNITION_WORKERS
+        self.queue_size = queue_size or config.RECOGNITION_QUEUE_SIZE
+        self.pool = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix="vosk"
+        )
+        print(f"🧵 Executor de reconocimiento: {self.max_workers} hilos, cola de {self.queue_size} chunks")
+
+    def create_stream(self, recognizer):
+        return RecognitionStream(self, recognizer, self.queue_size)
+
+    def shutdown(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+_executor = None
+
+
+def get_recognition_executor():
+    """Devuelve el executor de reconocimiento del proceso, creándolo en el primer uso."""
+    global _executor
+    if _executor is None:
+        _executor = RecognitionExecutor()
+    return _executor
+
+
+def shutdown_recognition_executor():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown()
+        _executor = None
@@ -0,0 +1,226 @@
+from concurrent.futures import ThreadPoolExecutor
+import threading
+
+from app.models.database import SessionContext, PeerSessionContext
+
+
+class SessionContextCache:
+    """Contexto de navegación (inventario/espacio/elemento) en memoria con escritura diferida.
+
+    Hay un contexto por inspector, identificado por su `sender_id` (una fila de
+    peer_session_context); `sender_id=None` es el contexto por defecto de la API
+    sin sesión (la fila de session_context). Las lecturas se sirven desde
+    memoria. Cada cambio incrementa una versión y programa un flush en el hilo
+    escritor; varios cambios seguidos se agrupan en una sola escritura con el
+    estado más reciente.
+    """
+
+    def __init__(self, db_manager, sender_id=None):
+        self.db_manager = db_manager
+        self.sender_id = sender_id
+        self._model = SessionContext if sender_id is None else PeerSessionContext
+        self._lock = threading.RLock()
+        # Serializa las escrituras: un flush directo y uno del hilo escritor no insertan dos filas
+        self._write_lock = threading.Lock()
+        self._row_id = None
+        self._version = 0
+        self._persisted_version = 0
+        self._flush_scheduled = False
+        self._discarded = False
+
+        self.inventory_id = None
+        self.space_id = None
+        self.element_id = None
+        # Solo en memoria: evitan consultar nombres en get_context
+        self.space_name = None
+        self.element_name = None
+
+        self.reload()
+
+    def reload(self):
+        """Descarta el estado en memoria y lo vuelve a leer de la base de datos."""
+        session = self.db_manager.get_session()
+        try:
+            ctx = self._query(session).first()
+            print(f'Session context ({self.sender_id or "default"}): ', {
+                "inventory_id": ctx.current_inventory_id if ctx else None,
+                "space_id": ctx.current_space_id if ctx else None,
+                "element_id": ctx.current_element_id if ctx else None
+            })
+            with self._lock:
+                self._row_id = ctx.id if ctx else None
+                self.inventory_id = ctx.current_inventory_id if ctx else None
+                self.space_id = ctx.current_space_id if ctx else None
+                self.element_id = ctx.current_element_id if ctx else None
+                self.space_name = None
+                self.element_name = None
+                self._persisted_version = self._version
+        finally:
+            session.close()
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "inventory_id": self.inventory_id,
+                "space_id": self.space_id,
+                "element_id": self.element_id,
+                "space_name": self.space_name,
+                "element_name": self.element_name,
+            }
+
+    def remember_names(self, space_id, space_name, element_id, element_name):
+        """Guarda en memoria nombres consultados para esos ids.
+
+        Solo si el contexto sigue apuntando a los mismos ids: si otra llamada
+        cambió de espacio o elemento mientras tanto, el nombre leído ya no vale.
+        """
+        with self._lock:
+            if space_id is not None and self.space_id == space_id and self.space_name is None:
+                self.space_name = space_name
+            if element_id is not None and self.element_id == element_id and self.element_name is None:
+                self.element_name = element_name
+
+    @property
+    def persisted(self):
+        """True si el contexto ya tiene fila propia en la base de datos."""
+        return self._row_id is not None
+
+    def update(self, **changes):
+        """Aplica cambios (inventory_id, space_id, element_id, *_name) y programa su persistencia."""
+        with self._lock:
+            for key, value in changes.items():
+                if not hasattr(self, key) or key.startswith("_"):
+                    raise AttributeError(f"Campo de contexto desconocido: {key}")
+                setattr(self, key, value)
+            self._version += 1
+            if not self._flush_scheduled:
+                self._flush_scheduled = True
+                _get_writer().submit(self._flush_scheduled_write)
+
+    def flush(self):
+        """Persiste el estado actual si hay cambios pendientes (bloqueante)."""
+        with self._write_lock:
+            with self._lock:
+                if self._discarded or self._version == self._persisted_version:
+                    return
+                version = self._version
+                row_id = self._row_id
+                values = {
+                    "current_inventory_id": self.inventory_id,
+                    "current_space_id": self.space_id,
+                    "current_element_id": self.element_id,
+                }
+
+            session = self.db_manager.get_session()
+            try:
+                ctx = session.get(self._model, row_id) if row_id is not None else None
+                if ctx is None:
+                    ctx = SessionContext() if self.sender_id is None else PeerSessionContext(sender_id=self.sender_id)
+                    session.add(ctx)
+                for key, value in values.items():
+                    setattr(ctx, key, value)
+                session.commit()
+                with self._lock:
+                    self._row_id = ctx.id
+                    self._persisted_version = max(self._persisted_version, version)
+            finally:
+                session.close()
+
+    def discard(self):
+        """Descarta el contexto y programa el borrado de su fila (al cerrar la sesión)."""
+        with self._lock:
+            if self._discarded:
+                return
+            self._discarded = True
+        # En el mismo hilo escritor: el borrado va después de cualquier flush pendiente
+        _get_writer().submit(self._delete_row)
+
+    def _delete_row(self):
+        session = self.db_manager.get_session()
+        try:
+            self._query(session).delete()
+            session.commit()
+        except Exception as e:
+            print(f"⚠️ Error borrando el contexto de sesión {self.sender_id}: {e}")
+        finally:
+            session.close()
+
+    def _query(self, session):
+        if self.sender_id is None:
+            return session.query(SessionContext)
+        return session.query(PeerSessionContext).filter_by(sender_id=self.sender_id)
+
+    def _flush_scheduled_write(self):
+        with self._lock:
+            self._flush_scheduled = False
+        try:
+            self.flush()
+        except Exception as e:
+            print(f"⚠️ Error guardando el contexto de sesión: {e}")
+
+
+_writer = None
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def _get_writer():
+    # Un solo hilo: las escrituras de contexto nunca compiten entre sí
+    global _writer
+    if _writer is None:
+        _writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ctx-writer")
+    return _writer
+
+
+def get_session_context_cache(db_manager, sender_id=None):
+    """Caché del contexto de `sender_id` (o el contexto por defecto) en esa base de datos.
+
+    Un inspector sin contexto guardado empieza en el inventario del contexto por
+    defecto, que es el que fija la API cuando el cliente no indica su sesión.
+    """
+    key = (str(db_manager.engine.url), sender_id)
+    with _caches_lock:
+        cache = _caches.get(key)
+        if cache is not None:
+            return cache
+    default = get_session_context_cache(db_manager) if sender_id is not None else None
+    # La fila se lee fuera del lock global: reload() consulta la base de datos
+    candidate = SessionContextCache(db_manager, sender_id)
+    with _caches_lock:
+        # Si otro hilo creó el mismo contexto mientras tanto, gana el primero
+        cache = _caches.get(key)
+        if cache is not None:
+            return cache
+        _caches[key] = candidate
+        if default is not None and not candidate.persisted and default.inventory_id is not None:
+            # Por update(): la versión sube y el inventario inicial queda guardado
+            candidate.update(inventory_id=default.inventory_id)
+        return candidate
+
+
+def find_session_context_cache(db_manager, sender_id=None):
+    """Caché ya creada para `sender_id`, o None (no crea contextos nuevos)."""
+    with _caches_lock:
+        return _caches.get((str(db_manager.engine.url), sender_id))
+
+
+def release_session_context_cache(db_manager, sender_id):
+    """Olvida el contexto de un inspector y borra su fila (al cerrar su sesión)."""
+    if sender_id is None:
+        return
+    with _caches_lock:
+        cache = _caches.pop((str(db_manager.engine.url), sender_id), None)
+    if cache is not None:
+        cache.discard()
+
+
+def flush_session_context_caches():
+    """Persiste los cambios pendientes de todas las cachés (al apagar el proceso)."""
+    global _writer
+    with _caches_lock:
+        caches = list(_caches.values())
+    for cache in caches:
+        cache.flush()
+    if _writer is not None:
+        _writer.shutdown(wait=True)
+        _writer = None
@@ -0,0 +1,97 @@
+import asyncio
+import json
+import threading
+
+from app import config
+from .command_registry import get_command_registry
+from .name_extraction_service import NameExtractionService
+
+
+class SpeechGrammar:
+    """Lista de frases para el modo gramática de Vosk.
+
+    Combina las frases del registro de comandos, el vocabulario propio de la
+    extracción de nombres (números, colores, conectores) y los nombres de
+    espacios y elementos guardados. Cada cambio en los nombres incrementa
+    `version`; las sesiones comparan esa versión y aplican la nueva gramática a
+    su recognizer al terminar la frase en curso.
+    """
+
+    def __init__(self, command_registry=None, name_extractor=None, extra_words=None):
+        self.command_registry = command_registry or get_command_registry()
+        self.name_extractor = name_extractor or NameExtractionService()
+        self.extra_words = [w.lower() for w in (extra_words if extra_words is not None else config.VOSK_GRAMMAR_EXTRA_WORDS)]
+        self._lock = threading.Lock()
+        self._names = set()
+        self._loaded = False
+        self._version = 0
+        self._json = None
+        self._json_version = None
+
+    @property
+    def version(self):
+        return self._version
+
+    def load_names(self, inventory_service):
+        """Lee los nombres de la base de datos (bloqueante) y reemplaza los actuales."""
+        names = {name.lower().strip() for name in inventory_service.get_vocabulary_names() if name}
+        with self._lock:
+            self._loaded = True
+            if names != self._names:
+                self._names = names
+                self._version += 1
+
+    async def load_async(self, inventory_service, executor=None):
+        """Carga los nombres en el pool de base de datos, solo la primera vez."""
+        if self._loaded:
+            return
+        from .async_inventory_service import get_db_executor
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(executor or get_db_executor(), self.load_names, inventory_service)
+
+    def add_names(self, *names):
+        """Agrega nombres nuevos; devuelve True si la gramática cambió."""
+        names = {name.lower().strip() for name in names if name}
+        # La diferencia va dentro del lock: dos sesiones pueden agregar el mismo nombre
+        with self._lock:
+            new = names - self._names
+            if not new:
+                return False
+            self._names |= new
+            self._version += 1
+        return True
+
+    def phrases(self):
+        with self._lock:
+            names = sorted(self._names)
+        # Vosk acepta secuencias de las frases; cada palabra suelta permite
+        # combinar disparadores con nombres de varias palabras
+        words = set(self.name_extractor.vocabulary())
+        for phrase in self.command_registry.phrases() + names + self.extra_words:
+            words.update(phrase.split())
+        return self.command_registry.phrases() + names + self.extra_words + sorted(words) + ["[unk]"]
+
+    def to_json(self):
+        """Gramática serializada para KaldiRecognizer / SetGrammar (cacheada por versión)."""
+        version = self._version
+        if self._json_version != version:
+            self._json = json.dumps(self.phrases(), ensure_ascii=False)
+            self._json_version = version
+        return self._json
+
+    def stats(self):
+        with self._lock:
+            return {"version": self._version, "names": len(self._names), "loaded": self._loaded}
+
+
+_grammar = None
+
+
+def get_speech_grammar():
+    """Gramática compartida del proceso, o None si el modo gramática está desactivado."""
+    global _grammar
+    if not config.VOSK_GRAMMAR_ENABLED:
+        return None
+    if _grammar is None:
+        _grammar = SpeechGrammar()
+    return _grammar
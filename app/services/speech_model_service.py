@@ -0,0 +1,102 @@
+import asyncio
+import os
+import threading
+import time
+
+from app import config
+
+
+class VoskModelRegistry:
+    """Carga perezosa del modelo Vosk, compartido por todos los recognizers del proceso."""
+
+    def __init__(self, model_path=None):
+        self.model_path = model_path or config.VOSK_MODEL_PATH
+        self._model = None
+        self._lock = threading.Lock()
+        self._loading = False
+        self._load_time = None
+        self._loaded_at = None
+        self._error = None
+
+    @property
+    def is_ready(self):
+        return self._model is not None
+
+    def get_model(self):
+        """Devuelve el modelo, cargándolo en el primer uso (bloqueante)."""
+        if self._model is not None:
+            return self._model
+
+        with self._lock:
+            if self._model is not None:
+                return self._model
+
+            self._loading = True
+            self._error = None
+            start = time.perf_counter()
+            try:
+                if not os.path.isdir(self.model_path):
+                    raise FileNotFoundError(
+                        f"Modelo Vosk no encontrado en: {self.model_path}. ¡Descárgalo y descomprímelo!"
+                    )
+                from vosk import Model, KaldiRecognizer
+
+                model = Model(self.model_path)
+                # Warm-up: una decodificación corta de silencio carga las tablas del grafo
+                recognizer = KaldiRecognizer(model, config.VOSK_SAMPLE_RATE)
+                recognizer.AcceptWaveform(bytes(config.VOSK_SAMPLE_RATE // 5))
+                recognizer.FinalResult()
+
+                self._model = model
+                self._load_time = time.perf_counter() - start
+                self._loaded_at = time.time()
+                print(f"✅ Modelo Vosk cargado correctamente en {self._load_time:.2f}s.")
+                return model
+            except Exception as e:
+                self._error = str(e)
+                print(f"❌ Error cargando el modelo Vosk: {e}")
+                raise
+            finally:
+                self._loading = False
+
+    async def load_async(self):
+        """Carga el modelo en un hilo sin bloquear el event loop."""
+        if self._model is not None:
+            return self._model
+        return await asyncio.get_running_loop().run_in_executor(None, self.get_model)
+
+    async def warm_up(self):
+        """Precarga en segundo plano; los errores quedan registrados en status()."""
+        print(f"🔥 Precargando modelo Vosk desde {self.model_path}...")
+        try:
+            await self.load_async()
+        except Exception:
+            pass
+
+    def create_recognizer(self, sample_rate=None, grammar=None):
+        """Crea un recognizer; con `grammar` (JSON de frases) la búsqueda se limita a esas frases."""
+        from vosk import KaldiRecognizer
+        if grammar is not None:
+            return KaldiRecognizer(self.get_model(), sample_rate or config.VOSK_SAMPLE_RATE, grammar)
+        return KaldiRecognizer(self.get_model(), sample_rate or config.VOSK_SAMPLE_RATE)
+
+    def status(self):
+        return {
+            "ready": self.is_ready,
+            "loading": self._loading,
+            "model_path": self.model_path,
+            "load_time_seconds": round(self._load_time, 3) if self._load_time is not None else None,
+            "loaded_at": self._loaded_at,
+            "error": self._error,
+        }
+
+
+_registry = None
+
+
+def get_vosk_model_registry():
+    """Devuelve el registro de modelo del proceso."""
+    global _registry
+    if _registry is None:
+        _registry = VoskModelRegistry()
+    return _registry
@@ -0,0 +1,137 @@
+import asyncio
+import functools
+from datetime import datetime
+
+import aiohttp
+
+from app import config
+from app.models.database import Inventory, Space, Element, Attribute, Image, Video
+from app.utils.serializers import dumps_json
+from .async_inventory_service import get_db_executor
+from .inventory_service import InventoryService
+
+# Orden de dependencia: un hijo nunca se envía antes que su padre
+SYNC_ORDER = (
+    ('inventories', Inventory),
+    ('spaces', Space),
+    ('elements', Element),
+    ('attributes', Attribute),
+    ('images', Image),
+    ('videos', Video),
+)
+
+
+class SyncError(Exception):
+    pass
+
+
+class SyncService:
+    """Sincronización incremental por lotes hacia el servidor central.
+
+    Recorre las entidades en orden de dependencia, envía lotes acotados de
+    registros pendientes y, por cada lote aceptado, marca los registros como
+    sincronizados y avanza el high-water mark en una sola transacción. Un lote
+    fallido se reintenta con backoff; si se agotan los intentos la corrida se
+    detiene para no enviar hijos de registros que el servidor no recibió.
+    """
+
+    def __init__(self, inventory_service: InventoryService, upstream_url=None,
+                 batch_size=None, max_retries=None, retry_backoff=None, executor=None):
+        self.inventory_service = inventory_service
+        self.upstream_url = (upstream_url or config.SYNC_UPSTREAM_URL or "").rstrip("/")
+        self.batch_size = batch_size or config.SYNC_BATCH_SIZE
+        self.max_retries = max_retries if max_retries is not None else config.SYNC_MAX_RETRIES
+        self.retry_backoff = retry_backoff if retry_backoff is not None else config.SYNC_RETRY_BACKOFF
+        self.executor = executor or get_db_executor()
+        self._lock = asyncio.Lock()
+        self.last_run = None
+
+    async def _run_db(self, fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(fn, *args, **kwargs))
+
+    async def run_once(self):
+        """Ejecuta una corrida completa y devuelve sus estadísticas."""
+        if not self.upstream_url:
+            raise SyncError("SYNC_UPSTREAM_URL no está configurado")
+
+        async with self._lock:
+            started = datetime.utcnow()
+            stats = {"started_at": started.isoformat(), "entities": {}, "success": True, "error": None}
+            timeout = aiohttp.ClientTimeout(total=config.SYNC_REQUEST_TIMEOUT)
+            async with aiohttp.ClientSession(timeout=timeout) as http:
+                for entity, model in SYNC_ORDER:
+                    entity_stats = {"sent": 0, "batches": 0, "retries": 0}
+                    stats["entities"][entity] = entity_stats
+                    try:
+                        await self._sync_entity(http, entity, model, entity_stats)
+                    except SyncError as e:
+                        print(f"❌ Sincronización detenida en {entity}: {e}")
+                        stats["success"] = False
+                        stats["error"] = f"{entity}: {e}"
+                        break
+
+            stats["duration_seconds"] = round((datetime.utcnow() - started).total_seconds(), 3)
+            self.last_run = stats
+            return stats
+
+    async def _sync_entity(self, http, entity, model, entity_stats):
+        high_water_mark = await self._run_db(self.inventory_service.get_sync_high_water_mark, entity)
+        after = None
+        while True:
+            records, last_key = await self._run_db(
+                self.inventory_service.get_pending_sync_batch,
+                model, self.batch_size, high_water_mark=high_water_mark, after=after
+            )
+            if not records:
+                return
+
+            response = await self._send_with_retry(http, entity, records, entity_stats)
+            # El lote va ordenado por (updated_at, id): su última clave es el nuevo
+            # high-water mark, con el id como desempate entre registros del mismo instante
+            await self._run_db(
+                self.inventory_service.mark_batch_synced,
+                model, entity, [r["id"] for r in records], last_key,
+                origin_ids=response.get("origin_ids") if isinstance(response, dict) else None
+            )
+
+            entity_stats["sent"] += len(records)
+            entity_stats["batches"] += 1
+            print(f"🔄 {entity}: lote de {len(records)} sincronizado")
+
+            if len(records) < self.batch_size:
+                return
+            after = last_key
+
+    async def _send_with_retry(self, http, entity, records, entity_stats):
+        url = f"{self.upstream_url}/{entity}"
+        body = dumps_json({"entity": entity, "items": records})
+        attempt = 0
+        while True:
+            try:
+                async with http.post(url, data=body, headers={"Content-Type": "application/json"}) as resp:
+                    if resp.status >= 400:
+                        raise SyncError(f"HTTP {resp.status} de {url}")
+                    if resp.content_type == "application/json":
+                        return await resp.json()
+                    return {}
+            except (aiohttp.ClientError, asyncio.TimeoutError, SyncError) as e:
+                attempt += 1
+                if attempt > self.max_retries:
+                    raise SyncError(f"lote rechazado tras {attempt} intentos: {e}")
+                entity_stats["retries"] += 1
+                delay = self.retry_backoff * (2 ** (attempt - 1))
+                print(f"⚠️ Error enviando lote de {entity} (intento {attempt}): {e}. Reintentando en {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+    async def run_forever(self, interval=None):
+        """Corre la sincronización periódicamente hasta que se cancele la tarea."""
+        interval = interval or config.SYNC_INTERVAL_SECONDS
+        while True:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"❌ Error en la sincronización periódica: {e}")
+            await asyncio.sleep(interval)
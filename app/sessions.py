@@ -0,0 +1,253 @@
+from aiortc import RTCPeerConnection, RTCSessionDescription
+from aiortc.sdp import candidate_from_sdp
+from .processor import VideoProcessorTrack, AudioProcessorTrack
+from .services.inventory_service import InventoryService
+from .services.async_inventory_service import get_db_executor
+from .services.speech_model_service import get_vosk_model_registry
+from .services.speech_grammar import get_speech_grammar
+from app import config
+import asyncio
+import functools
+
+
+async def _consume_video_frames(video_processor):
+    """Consume frames continuamente del video processor para mantenerlo activo."""
+    frame_count = 0
+    try:
+        print("🎬 Iniciando consumo de frames de video...")
+        while True:
+            frame = await video_processor.recv()
+            frame_count += 1
+
+            # Log cada 300 frames (~10 segundos a 30fps)
+            if frame_count % 300 == 0:
+                print(f"📹 {frame_count} frames procesados")
+
+    except asyncio.CancelledError:
+        print(f"🔚 Consumo de video cancelado. Total frames procesados: {frame_count}")
+        raise
+    except Exception as e:
+        print(f"🔚 Fin del consumo de video: {e}")
+        print(f"📊 Total frames procesados: {frame_count}")
+
+
+class PeerSession:
+    """Sesión WebRTC de un inspector: peer connection, tracks y contexto de inventario propios."""
+
+    def __init__(self, sender_id, sio_server, on_closed=None):
+        self.sender_id = sender_id
+        self.sio = sio_server
+        self.pc = RTCPeerConnection()
+        self.video_processor = None
+        self.audio_processor = None
+        self.video_track_ready = asyncio.Event()
+        # Contexto de navegación propio: los inspectores no comparten espacio ni elemento.
+        # Se crea en el pool de base de datos al llegar el audio (leerlo consulta SQLite)
+        self.inventory_service = None
+        self._on_closed = on_closed
+        self._tasks = set()
+        self._closed = False
+
+        self.pc.on("connectionstatechange", self._on_connectionstatechange)
+        self.pc.on("track", self._on_track)
+
+    @property
+    def is_closed(self):
+        return self._closed or self.pc.connectionState in ("failed", "closed")
+
+    def _spawn(self, coro):
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def _on_connectionstatechange(self):
+        print(f"📡 [{self.sender_id}] Estado conexión:", self.pc.connectionState)
+        if self.pc.connectionState in ("failed", "closed"):
+            await self.close()
+
+    def _on_track(self, track):
+        print(f"🎯 [{self.sender_id}] Track recibido: {track.kind}")
+
+        if track.kind == "video":
+            print("📹 Stream de video recibido (iniciando procesamiento)")
+            self.video_processor = VideoProcessorTrack(track, lazy=config.VIDEO_LAZY_MODE)
+
+            # Reenviar el video al cliente solo si se pide: el sender re-codifica cada frame
+            if config.VIDEO_LOOPBACK:
+                self.pc.addTrack(self.video_processor)
+
+            # Iniciar tarea para consumir frames continuamente (mantiene recv() activo)
+            self._spawn(_consume_video_frames(self.video_processor))
+
+            # Señalar que el video está listo
+            self.video_track_ready.set()
+            print("✅ Video processor listo")
+
+        elif track.kind == "audio":
+            print("🎧 Stream de audio recibido")
+            # Si el video aún no llegó, initialize_audio_processor lo espera
+            self._spawn(self.initialize_audio_processor(track))
+
+    async def _open_inventory_service(self):
+        """InventoryService con el contexto propio del inspector, creado fuera del event loop."""
+        if self.inventory_service is None:
+            loop = asyncio.get_running_loop()
+            service = await loop.run_in_executor(
+                get_db_executor(), functools.partial(InventoryService, session_id=self.sender_id)
+            )
+            if self._closed:
+                # La sesión se cerró mientras se leía el contexto
+                service.close_session()
+                return None
+            self.inventory_service = service
+        return self.inventory_service
+
+    async def initialize_audio_processor(self, audio_track):
+        """Espera al video processor y luego inicializa el audio processor."""
+        print("⏳ Esperando a que el video processor esté listo...")
+        # Esperar máximo 5 segundos a que llegue el video track
+        try:
+            await asyncio.wait_for(self.video_track_ready.wait(), timeout=5.0)
+            print("✅ Video processor listo, inicializando audio processor...")
+        except asyncio.TimeoutError:
+            print("⚠️ Timeout esperando video track, continuando sin él...")
+
+        # El modelo Vosk se carga en un hilo si el warm-up aún no terminó
+        try:
+            await get_vosk_model_registry().load_async()
+        except Exception as e:
+            print(f"❌ [{self.sender_id}] Reconocimiento de voz no disponible: {e}")
+            return
+
+        try:
+            inventory_service = await self._open_inventory_service()
+        except Exception as e:
+            print(f"❌ [{self.sender_id}] No se pudo cargar el contexto de inventario: {e}")
+            return
+        if inventory_service is None:
+            return
+
+        # Modo gramática: los nombres guardados se leen una vez por proceso
+        grammar = get_speech_grammar()
+        if grammar is not None:
+            try:
+                await grammar.load_async(self.inventory_service)
+            except Exception as e:
+                print(f"⚠️ [{self.sender_id}] No se pudieron cargar los nombres de la gramática: {e}")
+
+        if self._closed:
+            return
+
+        self.audio_processor = AudioProcessorTrack(
+            track=audio_track,
+            video_processor=self.video_processor,
+            sio_server=self.sio,
+            inventory_service=self.inventory_service,
+            session_id=self.sender_id
+        )
+        print("✅ Audio processor inicializado correctamente")
+
+    async def handle_offer(self, data):
+        offer = RTCSessionDescription(sdp=data["sdp"]["sdp"], type=data["sdp"]["type"])
+        await self.pc.setRemoteDescription(offer)
+
+        answer = await self.pc.createAnswer()
+        await self.pc.setLocalDescription(answer)
+
+        await self.sio.emit("answer", {
+            "targetId": self.sender_id,
+            "sdp": {
+                "type": self.pc.localDescription.type,
+                "sdp": self.pc.localDescription.sdp
+            }
+        })
+        print(f"📤 [{self.sender_id}] Answer enviada")
+
+    async def add_ice_candidate(self, candidate):
+        parsed = candidate_from_sdp(candidate["candidate"])
+        parsed.sdpMid = candidate.get("sdpMid")
+        parsed.sdpMLineIndex = candidate.get("sdpMLineIndex")
+        await self.pc.addIceCandidate(parsed)
+
+    def stats(self):
+        return {
+            "sender_id": self.sender_id,
+            "connection_state": self.pc.connectionState,
+            "has_video": self.video_processor is not None,
+            "has_audio": self.audio_processor is not None,
+            "vad": self.audio_processor.vad_stats() if self.audio_processor else None,
+            "commands": self.audio_processor.command_stats() if self.audio_processor else None,
+            "pipelines": {
+                "audio": self.audio_processor.pipeline_stats() if self.audio_processor else None,
+                "video": self.video_processor.pipeline.stats() if self.video_processor else None,
+            },
+        }
+
+    async def close(self):
+        """Libera tracks, tareas y peer connection de la sesión."""
+        if self._closed:
+            return
+        self._closed = True
+        print(f"🧹 [{self.sender_id}] Cerrando sesión...")
+
+        if self.audio_processor:
+            self.audio_processor.stop()
+        if self.video_processor:
+            self.video_processor.stop()
+
+        for task in list(self._tasks):
+            task.cancel()
+        self.video_track_ready.clear()
+
+        await self.pc.close()
+        if self.inventory_service is not None:
+            self.inventory_service.close_session()
+
+        if self._on_closed:
+            self._on_closed(self)
+        print(f"✅ [{self.sender_id}] Sesión cerrada")
+
+
+class SessionManager:
+    """Registro de sesiones WebRTC activas indexadas por senderId."""
+
+    def __init__(self, sio_server):
+        self.sio = sio_server
+        self._sessions = {}
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def get(self, sender_id):
+        return self._sessions.get(sender_id)
+
+    def get_or_create(self, sender_id):
+        session = self._sessions.get(sender_id)
+        if session is not None and not session.is_closed:
+            return session
+
+        session = PeerSession(sender_id, self.sio, on_closed=self._discard)
+        self._sessions[sender_id] = session
+        print(f"🆕 Sesión creada para {sender_id} (activas: {len(self._sessions)})")
+        return session
+
+    def stats(self):
+        return [session.stats() for session in self._sessions.values()]
+
+    def _discard(self, session):
+        # Solo eliminar si el registro aún apunta a esta sesión (no a una más nueva)
+        if self._sessions.get(session.sender_id) is session:
+            del self._sessions[session.sender_id]
+        print(f"📊 Sesiones activas: {len(self._sessions)}")
+
+    async def close(self, sender_id):
+        session = self._sessions.get(sender_id)
+        if session:
+            await session.close()
+
+    async def close_all(self):
+        await asyncio.gather(
+            *(session.close() for session in list(self._sessions.values())),
+            return_exceptions=True
+        )
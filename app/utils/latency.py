@@ -0,0 +1,61 @@
+from bisect import bisect_left
+from collections import deque
+
+
+class LatencyWindow:
+    """Latencias recientes (en segundos) con resumen en milisegundos."""
+
+    def __init__(self, size=200):
+        self._samples = deque(maxlen=size)
+        self.count = 0
+        self.last = None
+
+    def add(self, seconds):
+        self._samples.append(seconds)
+        self.count += 1
+        self.last = seconds
+
+    def stats(self):
+        if not self._samples:
+            return {"count": self.count, "last_ms": None, "avg_ms": None, "p50_ms": None, "p95_ms": None}
+        ordered = sorted(self._samples)
+        n = len(ordered)
+        return {
+            "count": self.count,
+            "last_ms": round(self.last * 1000, 1),
+            "avg_ms": round(sum(ordered) / n * 1000, 1),
+            "p50_ms": round(ordered[n // 2] * 1000, 1),
+            "p95_ms": round(ordered[min(n - 1, int(n * 0.95))] * 1000, 1),
+        }
+
+
+# Límites superiores de los buckets, en segundos (como los histogramas de Prometheus)
+DEFAULT_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+class LatencyHistogram:
+    """Histograma acumulado de latencias con buckets fijos."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds):
+        # Primer bucket con límite >= seconds
+        self.counts[bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def stats(self):
+        cumulative = 0
+        buckets = {}
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            cumulative += count
+            buckets["+Inf" if bound == float("inf") else f"{bound * 1000:g}ms"] = cumulative
+        return {
+            "count": self.count,
+            "avg_ms": round(self.sum / self.count * 1000, 3) if self.count else None,
+            "buckets": buckets,
+        }
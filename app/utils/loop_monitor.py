@@ -0,0 +1,189 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+import traceback
+
+from .metrics import REGISTRY
+
+_LOOP_LAG_SECONDS = REGISTRY.histogram(
+    "event_loop_lag_seconds", "Retraso del event loop al despertar de un sleep",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+_LOOP_LAG_LAST = REGISTRY.gauge("event_loop_lag_last_seconds", "Último retraso medido del event loop")
+_LOOP_STALLS = REGISTRY.counter(
+    "event_loop_stalls_total", "Bloqueos del event loop por encima del umbral del watchdog"
+)
+
+# Frames de la pila que se conservan por muestra (los más internos)
+STACK_DEPTH = 12
+# Pilas distintas que se conservan como máximo en el ranking
+MAX_OFFENDERS = 200
+
+_APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _where(stack):
+    """Frame más interno del código de la app (o el más interno si no hay ninguno)."""
+    for filename, lineno, name in reversed(stack):
+        if filename.startswith(_APP_ROOT):
+            return f"{os.path.relpath(filename, os.path.dirname(_APP_ROOT))}:{lineno} ({name})"
+    filename, lineno, name = stack[-1]
+    return f"{filename}:{lineno} ({name})"
+
+
+class _Offender:
+    __slots__ = ("stack", "where", "samples", "blocked", "stalls", "max_stall")
+
+    def __init__(self, stack):
+        self.stack = stack
+        self.where = _where(stack)
+        self.samples = 0
+        self.blocked = 0.0
+        self.stalls = 0
+        self.max_stall = 0.0
+
+    def to_dict(self):
+        return {
+            "where": self.where,
+            "samples": self.samples,
+            "blocked_ms": round(self.blocked * 1000, 1),
+            "stalls": self.stalls,
+            "max_stall_ms": round(self.max_stall * 1000, 1),
+            "stack": [f"{filename}:{lineno} {name}" for filename, lineno, name in self.stack],
+        }
+
+
+class LoopLagMonitor:
+    """Mide cuánto tarda el event loop en despertar de un sleep de `interval` segundos.
+
+    El exceso sobre `interval` es el tiempo que otras callbacks retuvieron el loop
+    (con `interval` <= 0 no se mide). Con `stall_threshold` > 0 arranca un hilo watchdog que hace ping al
+    loop con call_soon_threadsafe: si el ping no se atiende en `stall_threshold`
+    segundos, muestrea la pila del hilo del loop cada `sample_interval` mientras
+    siga bloqueado y acumula las pilas responsables en un ranking. Al terminar
+    cada bloqueo se registra en el log dónde estaba el loop.
+    """
+
+    def __init__(self, interval=0.5, stall_threshold=0.1, sample_interval=0.02, top=10):
+        self.interval = interval
+        self.stall_threshold = stall_threshold
+        self.sample_interval = sample_interval
+        self.top = top
+        self.last = 0.0
+        self.stalls = 0
+        self._task = None
+        self._started = False
+
+        self._loop = None
+        self._loop_thread_id = None
+        self._offenders = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watchdog = None
+
+    def start(self):
+        if self._started:
+            return
+        self._started = True
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        # La medición de retraso y el watchdog se activan cada uno por su cuenta
+        if self.interval > 0:
+            self._task = asyncio.ensure_future(self._run())
+        if self.stall_threshold > 0:
+            self._stop.clear()
+            self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+            self._watchdog.start()
+
+    async def stop(self):
+        if not self._started:
+            return
+        self._started = False
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._watchdog = None
+
+    def offenders(self, top=None):
+        """Pilas que más tiempo retuvieron el loop, de mayor a menor."""
+        with self._lock:
+            ranked = sorted(self._offenders.values(), key=lambda o: o.blocked, reverse=True)
+            return [offender.to_dict() for offender in ranked[:top or self.top]]
+
+    def stats(self):
+        return {
+            "lag_ms": round(self.last * 1000, 1),
+            "stall_threshold_ms": round(self.stall_threshold * 1000, 1),
+            "stalls": self.stalls,
+            "top_offenders": self.offenders(),
+        }
+
+    async def _run(self):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.last = max(0.0, time.perf_counter() - start - self.interval)
+            _LOOP_LAG_SECONDS.observe(self.last)
+            _LOOP_LAG_LAST.set(self.last)
+
+    # Hilo watchdog
+    def _watch(self):
+        # Un ping cada medio umbral: se detecta cualquier bloqueo mayor que 1.5 umbrales
+        ping_interval = self.stall_threshold / 2
+        while not self._stop.wait(ping_interval):
+            beat = threading.Event()
+            pinged = time.monotonic()
+            try:
+                self._loop.call_soon_threadsafe(beat.set)
+            except RuntimeError:
+                # Loop cerrado
+                return
+            if beat.wait(self.stall_threshold):
+                continue
+            # El loop no atendió el ping a tiempo: muestrear dónde está mientras siga bloqueado
+            samples = {}
+            while True:
+                stack = self._sample()
+                if stack is not None:
+                    samples[stack] = samples.get(stack, 0) + 1
+                if beat.wait(self.sample_interval) or self._stop.is_set():
+                    break
+            # Cota inferior: el bloqueo pudo empezar antes del ping
+            self._record_stall(samples, time.monotonic() - pinged)
+
+    def _sample(self):
+        frame = sys._current_frames().get(self._loop_thread_id)
+        if frame is None:
+            return None
+        summary = traceback.extract_stack(frame, limit=STACK_DEPTH)
+        return tuple((entry.filename, entry.lineno, entry.name) for entry in summary)
+
+    def _record_stall(self, samples, stalled):
+        self.stalls += 1
+        _LOOP_STALLS.inc()
+        if not samples:
+            return
+        total = sum(samples.values())
+        with self._lock:
+            for stack, count in samples.items():
+                offender = self._offenders.get(stack)
+                if offender is None:
+                    if len(self._offenders) >= MAX_OFFENDERS:
+                        # Descartar la pila con menos tiempo acumulado
+                        weakest = min(self._offenders, key=lambda s: self._offenders[s].blocked)
+                        del self._offenders[weakest]
+                    offender = self._offenders[stack] = _Offender(stack)
+                offender.samples += count
+                # Repartir el bloqueo entre las pilas muestreadas durante él
+                offender.blocked += stalled * count / total
+                offender.stalls += 1
+                offender.max_stall = max(offender.max_stall, stalled)
+        culprit = max(samples, key=samples.get)
+        print(f"🐢 Event loop bloqueado {stalled * 1000:.0f} ms en {_where(culprit)}")
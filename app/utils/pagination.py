@@ -0,0 +1,18 @@
+import base64
+import json
+from datetime import datetime
+
+def encode_cursor(updated_at, record_id):
+  """Cursor opaco para paginación por clave (updated_at, id)."""
+  payload = {"u": updated_at.isoformat() if updated_at else None, "id": record_id}
+  raw = json.dumps(payload, separators=(",", ":")).encode()
+  return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor):
+  try:
+    padded = cursor + "=" * (-len(cursor) % 4)
+    payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    updated_at = datetime.fromisoformat(payload["u"]) if payload.get("u") else None
+    return updated_at, payload["id"]
+  except Exception:
+    raise ValueError("Cursor inválido")
@@ -1,7 +1,89 @@
-from datetime import datetime, date, time
+from operator import attrgetter
+from sqlalchemy import Date, DateTime, Time
 from sqlalchemy.orm import class_mapper
 
-def to_dict_model(model, include_relationships=False, visited=None):
+try:
+  import orjson
+except ImportError:  # pragma: no cover - orjson es opcional
+  orjson = None
+  import json
+
+_TEMPORAL_TYPES = (DateTime, Date, Time)
+
+
+class _ModelPlan:
+  """Plan de serialización precalculado para una clase de modelo."""
+
+  __slots__ = ("columns", "relationships")
+
+  def __init__(self, model_class):
+    table = model_class.__table__
+    # (nombre, getter, es_fecha) por columna, en el orden de la tabla
+    self.columns = tuple(
+      (column.name, attrgetter(column.name), isinstance(column.type, _TEMPORAL_TYPES))
+      for column in table.columns
+    )
+    self.relationships = tuple(
+      (relation.key, attrgetter(relation.key))
+      for relation in class_mapper(model_class).relationships
+    )
+
+
+_plans = {}
+
+
+def _plan_for(model_class):
+  plan = _plans.get(model_class)
+  if plan is None:
+    plan = _plans[model_class] = _ModelPlan(model_class)
+  return plan
+
+
+def compile_serializers(base):
+  """Precalcula los planes de todos los modelos mapeados en `base` (al arrancar)."""
+  for mapper in base.registry.mappers:
+    _plan_for(mapper.class_)
+
+
+def _columns_dict(model, plan, fields):
+  # Los atributos ya cargados viven en __dict__; el descriptor solo se usa si falta
+  # (atributo expirado o diferido), evitando el costo del instrumentado por columna
+  loaded = model.__dict__
+  data = {}
+  for name, getter, temporal in plan.columns:
+    if fields is not None and name not in fields:
+      continue
+    value = loaded[name] if name in loaded else getter(model)
+    if temporal and value is not None:
+      value = value.isoformat()
+    data[name] = value
+  return data
+
+
+def _serialize_tree(model, include, fields=None):
+  # Árbol explícito de relaciones: no puede haber ciclos, no hace falta `visited`
+  data = _columns_dict(model, _plan_for(type(model)), fields)
+  loaded = model.__dict__
+  for key, sub_include in include.items():
+    related_value = loaded[key] if key in loaded else getattr(model, key)
+    if isinstance(related_value, list):
+      data[key] = [_serialize_tree(item, sub_include) for item in related_value]
+    elif related_value is not None:
+      data[key] = _serialize_tree(related_value, sub_include)
+    else:
+      data[key] = None
+  return data
+
+
+def to_dict_model(model, include_relationships=False, visited=None, include=None, fields=None):
+  """Serializa un modelo a dict.
+
+  `include` limita las relaciones a un árbol explícito, p. ej.
+  {"spaces": {"elements": {}}}; `fields` limita las columnas del nivel actual.
+  """
+  if include is not None:
+    return _serialize_tree(model, include, fields)
+
   if visited is None:
     visited = set()
 
@@ -10,28 +92,29 @@ def to_dict_model(model, include_relationships=False, visited=None):
     return None
   visited.add(model_id)
 
-  data = {}
-
-  for column in model.__table__.columns:
-    value = getattr(model, column.name)
-    if isinstance(value, (datetime, date, time)):
-        data[column.name] = value.isoformat()
-    else:
-      data[column.name] = value
+  plan = _plan_for(type(model))
+  data = _columns_dict(model, plan, fields)
 
   if include_relationships:
-    mapper = class_mapper(type(model))
-    for relation in mapper.relationships:
-      related_value = getattr(model, relation.key)
+    loaded = model.__dict__
+    for key, getter in plan.relationships:
+      related_value = loaded[key] if key in loaded else getter(model)
       if related_value is not None:
         if isinstance(related_value, list):
-          data[relation.key] = [
+          data[key] = [
             to_dict_model(item, include_relationships, visited)
             for item in related_value
           ]
         else:
-          data[relation.key] = to_dict_model(
+          data[key] = to_dict_model(
             related_value, include_relationships, visited
           )
 
-  return data
\ No newline at end of file
+  return data
+
+
+def dumps_json(data) -> bytes:
+  """Serializa a JSON directamente en bytes (orjson si está instalado)."""
+  if orjson is not None:
+    return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+  return json.dumps(data, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
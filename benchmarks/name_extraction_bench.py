@@ -0,0 +1,87 @@
+"""Micro-benchmark de NameExtractionService: costo por comando de cada extracción.
+
+Uso (desde cualquier directorio):
+    python benchmarks/name_extraction_bench.py
+    python benchmarks/name_extraction_bench.py --compare <ref-de-git>
+
+Con --compare se mide además la versión del servicio en esa revisión (el
+"antes") y se imprime el factor de mejora de la versión actual.
+"""
+import argparse
+from pathlib import Path
+import subprocess
+import sys
+import timeit
+import types
+
+# Ejecutado como script, sys.path[0] es benchmarks/: el paquete app está en la raíz del repo
+REPO_ROOT = Path(__file__).resolve().parent.parent
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from app.services.name_extraction_service import NameExtractionService
+
+SERVICE_PATH = "app/services/name_extraction_service.py"
+
+CASES = [
+    ("extract_space_name", ("ingresar a espacio cocina principal por favor",)),
+    ("extract_space_name", ("ir al espacio habitación de huéspedes",)),
+    ("extract_space_name", ("no hay nada que extraer aquí",)),
+    ("extract_element_name", ("entrar al elemento mesa de centro",)),
+    ("extract_element_name", ("registrar el televisor de la sala ya",)),
+    ("extract_elements_from_command", ("el espacio tiene dos sillas rojas, una mesa y 3 cuadros",)),
+    ("extract_attribute", ("es de color azul marino", "color")),
+    ("extract_attribute", ("se encuentra en el segundo piso", "ubicación")),
+    ("extract_attribute", ("sin atributos reconocibles", "estado")),
+]
+
+
+def _load_revision(ref):
+    source = subprocess.run(
+        ["git", "show", f"{ref}:{SERVICE_PATH}"],
+        check=True, capture_output=True, text=True, cwd=REPO_ROOT
+    ).stdout
+    module = types.ModuleType(f"name_extraction_service@{ref}")
+    exec(compile(source, f"{ref}:{SERVICE_PATH}", "exec"), module.__dict__)
+    return module.NameExtractionService()
+
+
+def _measure(service, number):
+    """Microsegundos por llamada de cada caso."""
+    results = []
+    for method, args in CASES:
+        fn = getattr(service, method)
+        seconds = min(timeit.repeat(lambda: fn(*args), number=number, repeat=5))
+        results.append(seconds / number * 1e6)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--compare", metavar="REF", help="revisión de git usada como línea base")
+    parser.add_argument("--number", type=int, default=5000, help="llamadas por repetición")
+    args = parser.parse_args()
+
+    current = _measure(NameExtractionService(), args.number)
+    baseline = _measure(_load_revision(args.compare), args.number) if args.compare else None
+
+    header = f"{'caso':<32} {'actual µs':>10}"
+    if baseline:
+        header += f" {'base µs':>10} {'mejora':>8}"
+    print(header)
+    for i, (method, call_args) in enumerate(CASES):
+        label = f"{method.replace('extract_', '')}/{call_args[0]}"[:32]
+        row = f"{label:<32} {current[i]:>10.2f}"
+        if baseline:
+            row += f" {baseline[i]:>10.2f} {baseline[i] / current[i]:>7.1f}x"
+        print(row)
+
+    total = sum(current)
+    line = f"{'total':<32} {total:>10.2f}"
+    if baseline:
+        line += f" {sum(baseline):>10.2f} {sum(baseline) / total:>7.1f}x"
+    print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+import asyncio
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+
+from app.api.inventory_routes import InventoryAPI
+from app.services.async_inventory_service import AsyncInventoryService
+from app.services.inventory_service import InventoryService
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    # Un archivo por test: el engine y la caché de contexto se comparten por ruta
+    return str(tmp_path / "inventory.db")
+
+
+@pytest.fixture
+def inventory_service(db_path):
+    return InventoryService(db_path)
+
+
+@pytest.fixture
+def api_get(inventory_service):
+    """GET de cada ruta contra una InventoryAPI sobre `inventory_service`; devuelve [(status, json)]."""
+    def get(*paths):
+        async def scenario():
+            app = web.Application()
+            InventoryAPI(AsyncInventoryService(inventory_service)).setup_routes(app)
+            async with TestClient(TestServer(app)) as client:
+                results = []
+                for path in paths:
+                    response = await client.get(path)
+                    results.append((response.status, await response.json()))
+                return results
+        return asyncio.run(scenario())
+    return get
@@ -0,0 +1,92 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.services.async_inventory_service import AsyncInventoryService
+
+
+class _SlowInventoryService:
+    """InventoryService falso: cada llamada tarda 50 ms y registra cuántas corren a la vez."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.active = 0
+        self.max_active = 0
+        self.threads = set()
+
+    def _call(self, result):
+        with self._lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+            self.threads.add(threading.current_thread().name)
+        time.sleep(0.05)
+        with self._lock:
+            self.active -= 1
+        return result
+
+    def enter_space(self, space_name, description=None):
+        return self._call({"name": space_name})
+
+    def enter_element(self, element_name, description=None, amount=1):
+        return self._call({"name": element_name})
+
+    def get_inventory(self, inventory_id):
+        return self._call({"id": inventory_id})
+
+
+@pytest.fixture
+def executor():
+    executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="db-test")
+    yield executor
+    executor.shutdown(wait=True)
+
+
+def test_context_changes_run_one_at_a_time_in_the_pool(executor):
+    fake = _SlowInventoryService()
+    service = AsyncInventoryService(fake, executor=executor)
+
+    async def scenario():
+        return await asyncio.gather(
+            service.enter_space("cocina"),
+            service.enter_element("mesa"),
+            service.enter_space("baño"),
+        )
+
+    results = asyncio.run(scenario())
+
+    assert [result["name"] for result in results] == ["cocina", "mesa", "baño"]
+    assert fake.max_active == 1
+    assert all(name.startswith("db-test") for name in fake.threads)
+
+
+def test_reads_run_in_parallel(executor):
+    fake = _SlowInventoryService()
+    service = AsyncInventoryService(fake, executor=executor)
+
+    async def scenario():
+        return await asyncio.gather(*(service.get_inventory(index) for index in range(4)))
+
+    results = asyncio.run(scenario())
+
+    assert [result["id"] for result in results] == [0, 1, 2, 3]
+    assert fake.max_active > 1
+
+
+def test_concurrent_context_changes_keep_the_context_consistent(inventory_service, executor):
+    service = AsyncInventoryService(inventory_service, executor=executor)
+
+    async def scenario():
+        await service.enter_inventory(1, 2, 3)
+        spaces = await asyncio.gather(*(service.enter_space(f"espacio {index}") for index in range(5)))
+        return spaces, await service.get_context()
+
+    spaces, context = asyncio.run(scenario())
+
+    assert len({space["id"] for space in spaces}) == 5
+    assert all(space["inventory_id"] == spaces[0]["inventory_id"] for space in spaces)
+    # El último cambio encolado es el que queda como espacio actual
+    assert context["space_name"] == "espacio 4"
+    assert inventory_service.current_space_id == spaces[-1]["id"]
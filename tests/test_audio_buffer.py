@@ -0,0 +1,59 @@
+import av
+import numpy as np
+
+from app.media.audio_buffer import PcmChunkRing, frame_samples
+
+
+def _values(view):
+    return np.frombuffer(view, dtype=np.int16).tolist()
+
+
+def test_ring_emits_full_chunks_across_writes():
+    ring = PcmChunkRing(chunk_samples=4, slots=3)
+
+    assert ring.write(np.arange(3, dtype=np.int16)) == []
+    assert len(ring) == 3
+
+    chunks = ring.write(np.arange(3, 9, dtype=np.int16))
+
+    assert [_values(chunk) for chunk in chunks] == [[0, 1, 2, 3], [4, 5, 6, 7]]
+    assert len(ring) == 1
+
+
+def test_ring_chunks_are_views_valid_until_the_slot_is_reused():
+    ring = PcmChunkRing(chunk_samples=2, slots=2)
+
+    first = ring.write(np.array([1, 2], dtype=np.int16))[0]
+    ring.write(np.array([3, 4], dtype=np.int16))
+    assert _values(first) == [1, 2]
+
+    # Tercer chunk: vuelve al primer slot y sobrescribe su contenido
+    ring.write(np.array([5, 6], dtype=np.int16))
+    assert _values(first) == [5, 6]
+
+
+def test_drain_returns_the_partial_chunk():
+    ring = PcmChunkRing(chunk_samples=4, slots=2)
+    ring.write(np.array([7, 8], dtype=np.int16))
+
+    assert _values(ring.drain()) == [7, 8]
+    assert len(ring) == 0
+    assert _values(ring.drain()) == []
+
+
+def test_frame_samples_mono_is_a_view():
+    samples = np.arange(-5, 5, dtype=np.int16).reshape(1, -1)
+    frame = av.AudioFrame.from_ndarray(samples, format="s16", layout="mono")
+
+    assert frame_samples(frame).tolist() == samples[0].tolist()
+
+
+def test_frame_samples_downmixes_stereo():
+    left = np.array([100, -200, 30000], dtype=np.int16)
+    right = np.array([300, -400, 30000], dtype=np.int16)
+    packed = np.stack([left, right], axis=1).reshape(1, -1)
+    planar = np.stack([left, right])
+
+    expected = [200, -300, 30000]
+    assert frame_samples(av.AudioFrame.from_ndarray(packed, format="s16", layout="stereo")).tolist() == expected
+    assert frame_samples(av.AudioFrame.from_ndarray(planar, format="s16p", layout="stereo")).tolist() == expected
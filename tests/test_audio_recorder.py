@@ -0,0 +1,83 @@
+import os
+import wave
+
+import numpy as np
+
+from app.media.audio_recorder import AudioDebugRecorder
+
+SAMPLE_RATE = 16000
+
+
+def _block(samples=800):
+    return np.ones(samples, dtype=np.int16)
+
+
+def _record(recorder, blocks):
+    for block in blocks:
+        recorder.write(block)
+    recorder.close()
+    recorder.join(timeout=5)
+
+
+def test_segments_rotate_by_size(tmp_path):
+    recorder = AudioDebugRecorder(str(tmp_path), "sesión/1", SAMPLE_RATE, max_bytes=3200, max_seconds=0)
+
+    _record(recorder, [_block() for _ in range(5)])
+
+    # 1600 bytes por bloque: 2 + 2 + 1 bloques
+    assert len(recorder.files) == 3
+    frames = []
+    for path in recorder.files:
+        assert os.path.basename(path).startswith("sesi_n_1_")
+        with wave.open(path, "rb") as f:
+            assert f.getframerate() == SAMPLE_RATE
+            frames.append(f.getnframes())
+    assert frames == [1600, 1600, 800]
+    assert recorder.stats()["dropped"] == 0
+
+
+def test_segments_rotate_by_duration(tmp_path):
+    recorder = AudioDebugRecorder(str(tmp_path), "s", SAMPLE_RATE, max_bytes=0, max_seconds=0.1)
+
+    # 0.1 s = 1600 muestras = dos bloques por segmento
+    _record(recorder, [_block() for _ in range(4)])
+
+    assert len(recorder.files) == 2
+
+
+def test_writes_after_close_are_ignored(tmp_path):
+    recorder = AudioDebugRecorder(str(tmp_path), "s", SAMPLE_RATE)
+    _record(recorder, [_block()])
+
+    recorder.write(_block())
+
+    assert recorder.stats()["queued"] == 0
+    assert len(recorder.files) == 1
+
+
+def test_retention_keeps_newest_files(tmp_path):
+    for i, name in enumerate(["old_1.wav", "old_2.flac", "old_3.opus", "notas.txt"]):
+        path = tmp_path / name
+        path.write_bytes(b"x" * 1000)
+        os.utime(path, (1000 + i, 1000 + i))
+
+    recorder = AudioDebugRecorder(str(tmp_path), "s", SAMPLE_RATE, max_bytes=1600, max_seconds=0, max_files=3)
+    _record(recorder, [_block() for _ in range(2)])
+
+    # Dos segmentos nuevos: se borran las grabaciones más antiguas, no otros archivos
+    assert sorted(os.listdir(tmp_path)) == sorted(
+        ["old_3.opus", "notas.txt"] + [os.path.basename(p) for p in recorder.files]
+    )
+    assert len(recorder.files) == 2
+
+
+def test_retention_by_total_size(tmp_path):
+    for i in range(3):
+        path = tmp_path / f"old_{i}.wav"
+        path.write_bytes(b"x" * 1000)
+        os.utime(path, (1000 + i, 1000 + i))
+
+    recorder = AudioDebugRecorder(str(tmp_path), "s", SAMPLE_RATE, max_total_bytes=2000)
+    _record(recorder, [_block()])
+
+    assert sorted(os.listdir(tmp_path)) == sorted(["old_1.wav", "old_2.wav", os.path.basename(recorder.files[0])])
@@ -0,0 +1,203 @@
+import asyncio
+import time
+
+import pytest
+from aiortc.mediastreams import MediaStreamError
+
+from app import config
+from app import processor as processor_module
+from app.processor import AudioProcessorTrack
+from app.services.command_registry import build_default_registry
+from app.services.recognition_service import RecognitionResult
+
+
+@pytest.mark.parametrize("text, intent, slots", [
+    ("tomar foto", "capture_photo", {}),
+    ("por favor tomar foto ahora", "capture_photo", {}),
+    ("ingresar a espacio cocina principal", "enter_space", {"space_name": "Cocina Principal"}),
+    ("abrir elemento mesa de noche", "enter_element", {"element_name": "Mesa de Noche"}),
+    ("el espacio tiene dos sillas rojas y una mesa", "enter_elements", {"elements": [
+        {"name": "sillas", "amount": 2, "color": "rojo"},
+        {"name": "mesa", "amount": 1, "color": None},
+    ]}),
+    ("iniciar grabación", "start_recording", {}),
+    ("detener grabación", "stop_recording", {}),
+])
+def test_registry_parses_intents_and_slots(text, intent, slots):
+    match = build_default_registry().parse(text)
+
+    assert (match.intent, match.slots) == (intent, slots)
+
+
+def test_registry_ignores_unknown_phrases():
+    assert build_default_registry().parse("hola mundo") is None
+
+
+class _FakeRecognizer:
+    def SetWords(self, enabled):
+        pass
+
+    def AcceptWaveform(self, data):
+        return False
+
+    def PartialResult(self):
+        return '{"partial": ""}'
+
+    def FinalResult(self):
+        return '{"text": ""}'
+
+
+class _FakeModelRegistry:
+    def create_recognizer(self, sample_rate=None, grammar=None):
+        return _FakeRecognizer()
+
+
+class _EndedTrack:
+    async def recv(self):
+        raise MediaStreamError
+
+
+class _RecordingSio:
+    def __init__(self):
+        self.events = []
+
+    async def emit(self, event, data):
+        self.events.append((event, data))
+
+
+def _dispatch(inventory_service, monkeypatch, *commands):
+    """Procesa los comandos en un AudioProcessorTrack real (sin Vosk) y devuelve los eventos emitidos."""
+    monkeypatch.setattr(processor_module, "get_vosk_model_registry", lambda: _FakeModelRegistry())
+    sio = _RecordingSio()
+
+    async def scenario():
+        track = AudioProcessorTrack(
+            _EndedTrack(), video_processor=None, sio_server=sio,
+            inventory_service=inventory_service, recorder=None,
+        )
+        try:
+            for command in commands:
+                await track._process_command(command)
+        finally:
+            track.stop()
+            # Dejar que el loop de audio termine y cierre el stream de reconocimiento
+            await asyncio.sleep(0.05)
+        return sio.events
+
+    return asyncio.run(scenario())
+
+
+def test_enter_elements_creates_and_emits_every_element(inventory_service, monkeypatch):
+    inventory_service.enter_inventory(1, 2, 3)
+
+    events = _dispatch(
+        inventory_service, monkeypatch,
+        "ingresar a espacio cocina",
+        "el espacio tiene dos sillas rojas y una mesa",
+    )
+
+    assert [data["action"] for _, data in events] == ["enter_space", "enter_elements"]
+    elements = events[1][1]["elements"]
+    assert [(e["name"], e["amount"], e["description"]) for e in elements] == [
+        ("sillas", 2, "rojo"), ("mesa", 1, None),
+    ]
+    stored = inventory_service.get_elements()
+    assert sorted(element.name for element in stored) == ["mesa", "sillas"]
+
+
+def test_every_intent_dispatches_to_its_handler(inventory_service, monkeypatch):
+    inventory_service.enter_inventory(1, 2, 3)
+
+    events = _dispatch(
+        inventory_service, monkeypatch,
+        "tomar foto",
+        "ingresar a espacio sala",
+        "abrir elemento sofá",
+        "iniciar grabación",
+        "detener grabación",
+        "hola mundo",
+    )
+
+    assert all(event == "command_executed" for event, _ in events)
+    assert [data["action"] for _, data in events] == [
+        # Sin video processor la captura responde con error
+        "error", "enter_space", "enter_element", "start_recording", "stop_recording",
+        "command_not_recognized",
+    ]
+    assert events[2][1]["element"]["name"] == "Sofá"
+
+
+def _recognize(inventory_service, monkeypatch, *results):
+    """Entrega (final, texto) al despacho de resultados con confirmación temprana de 3 parciales.
+
+    Devuelve las acciones emitidas y el AudioProcessorTrack.
+    """
+    monkeypatch.setattr(processor_module, "get_vosk_model_registry", lambda: _FakeModelRegistry())
+    monkeypatch.setattr(config, "COMMAND_EARLY_COMMIT", True)
+    monkeypatch.setattr(config, "COMMAND_EARLY_COMMIT_PARTIALS", 3)
+    sio = _RecordingSio()
+
+    async def scenario():
+        track = AudioProcessorTrack(
+            _EndedTrack(), video_processor=None, sio_server=sio,
+            inventory_service=inventory_service, recorder=None,
+        )
+        # El loop de audio termina solo (track agotado): el despacho se prueba aparte
+        await asyncio.sleep(0.05)
+        track._dispatch_task = asyncio.ensure_future(track._dispatch_results())
+        try:
+            for final, text in results:
+                future = asyncio.get_running_loop().create_future()
+                future.set_result(RecognitionResult(final, text, 0.0))
+                track._pending_results.put_nowait((future, time.monotonic()))
+            await track._pending_results.join()
+        finally:
+            track._dispatch_task.cancel()
+        return [data["action"] for _, data in sio.events], track
+
+    return asyncio.run(scenario())
+
+
+def test_consecutive_matching_partials_commit_once(inventory_service, monkeypatch):
+    actions, track = _recognize(
+        inventory_service, monkeypatch,
+        (False, "iniciar"),
+        (False, "iniciar grabación"),
+        (False, "iniciar grabación"),
+        (False, "iniciar grabación"),
+        (False, "iniciar grabación ya"),
+        (True, "iniciar grabación ya"),
+    )
+
+    # Confirmado en el tercer parcial; ni el cuarto ni el resultado final lo repiten
+    assert actions == ["start_recording"]
+    assert track.early_commits == 1
+    assert track.command_latency.count == 1
+
+
+def test_intent_change_resets_the_partial_count(inventory_service, monkeypatch):
+    actions, track = _recognize(
+        inventory_service, monkeypatch,
+        (False, "iniciar grabación"),
+        (False, "iniciar grabación"),
+        (False, "detener grabación"),
+        (False, "detener grabación"),
+        (True, "detener grabación"),
+    )
+
+    # Ninguna intención llegó a tres parciales seguidos: solo la ejecuta el resultado final
+    assert actions == ["stop_recording"]
+    assert track.early_commits == 0
+
+
+def test_next_phrase_can_commit_early_again(inventory_service, monkeypatch):
+    actions, track = _recognize(
+        inventory_service, monkeypatch,
+        *[(False, "iniciar grabación")] * 3,
+        (True, "iniciar grabación"),
+        *[(False, "detener grabación")] * 3,
+        (True, "detener grabación"),
+    )
+
+    assert actions == ["start_recording", "stop_recording"]
+    assert track.early_commits == 2
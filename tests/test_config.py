@@ -0,0 +1,48 @@
+import importlib
+
+import pytest
+
+from app import config
+from app.media.audio_recorder import RECORDER_FORMATS
+from app.media.pipeline import BLOCK, DROP
+
+
+@pytest.fixture
+def reload_config(monkeypatch):
+    """Vuelve a leer config con el entorno del test y lo restaura al terminar."""
+    yield lambda: importlib.reload(config)
+    monkeypatch.undo()
+    importlib.reload(config)
+
+
+@pytest.mark.parametrize("raw, expected", [(None, BLOCK), ("", BLOCK), ("drop", DROP), (" DROP ", DROP)])
+def test_overload_policy_accepts_known_values(monkeypatch, raw, expected):
+    if raw is None:
+        monkeypatch.delenv("RECOGNITION_OVERLOAD_POLICY", raising=False)
+    else:
+        monkeypatch.setenv("RECOGNITION_OVERLOAD_POLICY", raw)
+
+    assert config._env_choice("RECOGNITION_OVERLOAD_POLICY", BLOCK, (BLOCK, DROP)) == expected
+
+
+def test_unknown_overload_policy_falls_back_with_warning(monkeypatch, capsys):
+    monkeypatch.setenv("RECOGNITION_OVERLOAD_POLICY", "dorp")
+
+    policy = config._env_choice("RECOGNITION_OVERLOAD_POLICY", BLOCK, (BLOCK, DROP))
+
+    assert policy == BLOCK
+    assert "RECOGNITION_OVERLOAD_POLICY" in capsys.readouterr().out
+
+
+@pytest.mark.parametrize("fmt", sorted(RECORDER_FORMATS))
+def test_audio_debug_format_accepts_every_recorder_format(monkeypatch, reload_config, fmt):
+    monkeypatch.setenv("AUDIO_DEBUG_FORMAT", fmt.upper())
+
+    assert reload_config().AUDIO_DEBUG_FORMAT == fmt
+
+
+def test_unknown_audio_debug_format_falls_back_to_wav(monkeypatch, reload_config, capsys):
+    monkeypatch.setenv("AUDIO_DEBUG_FORMAT", "mp3")
+
+    assert reload_config().AUDIO_DEBUG_FORMAT == "wav"
+    assert "AUDIO_DEBUG_FORMAT" in capsys.readouterr().out
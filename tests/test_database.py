@@ -0,0 +1,43 @@
+import pytest
+from sqlalchemy import text
+
+from app import config
+from app.models.database import dispose_engines, get_engine
+
+
+@pytest.fixture
+def engine(db_path, monkeypatch):
+    monkeypatch.setattr(config, "DB_BUSY_TIMEOUT_MS", 1234)
+    monkeypatch.setattr(config, "DB_MMAP_SIZE", 1024 * 1024)
+    monkeypatch.setattr(config, "DB_CACHE_SIZE", -2000)
+    yield get_engine(db_path)
+    dispose_engines()
+
+
+def _pragmas(conn):
+    return {
+        name: conn.execute(text(f"PRAGMA {name}")).scalar()
+        for name in ("journal_mode", "synchronous", "busy_timeout", "mmap_size", "cache_size", "temp_store")
+    }
+
+
+def test_every_pooled_connection_gets_the_pragmas(engine):
+    # Dos conexiones abiertas a la vez: la segunda es una conexión nueva del pool
+    with engine.connect() as first, engine.connect() as second:
+        settings = [_pragmas(first), _pragmas(second)]
+
+    # synchronous NORMAL = 1, temp_store MEMORY = 2
+    expected = {
+        "journal_mode": "wal", "synchronous": 1, "busy_timeout": 1234,
+        "mmap_size": 1024 * 1024, "cache_size": -2000, "temp_store": 2,
+    }
+    assert settings == [expected, expected]
+
+
+def test_engine_is_shared_per_path_and_has_the_schema(engine, db_path, tmp_path):
+    assert get_engine(db_path) is engine
+    assert get_engine(str(tmp_path / "otra.db")) is not engine
+
+    with engine.connect() as conn:
+        tables = {row[0] for row in conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'table'"))}
+    assert {"inventories", "spaces", "elements", "session_context", "sync_state"} <= tables
@@ -0,0 +1,67 @@
+import asyncio
+import json
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+
+from app.api.inventory_routes import InventoryAPI
+from app.services.async_inventory_service import AsyncInventoryService
+
+
+@pytest.fixture
+def small_batches(inventory_service, monkeypatch):
+    """Lotes de 2 inventarios en la exportación; devuelve los tamaños de lote leídos."""
+    sizes = []
+    iter_inventories = inventory_service.iter_inventories
+
+    def recording(**kwargs):
+        for batch in iter_inventories(batch_size=2, **kwargs):
+            sizes.append(len(batch))
+            yield batch
+
+    monkeypatch.setattr(inventory_service, "iter_inventories", recording)
+    return sizes
+
+
+def _export(inventory_service, query=""):
+    async def scenario():
+        app = web.Application()
+        InventoryAPI(AsyncInventoryService(inventory_service)).setup_routes(app)
+        async with TestClient(TestServer(app)) as client:
+            response = await client.get(f"/api/v1/inventories/export{query}")
+            return response.status, response.headers["Content-Type"], await response.text()
+    return asyncio.run(scenario())
+
+
+def test_json_export_stays_valid_across_batches(inventory_service, small_batches):
+    created = [inventory_service.enter_inventory(property_id, 1, 1)["id"] for property_id in range(5)]
+
+    status, content_type, body = _export(inventory_service, "?depth=0")
+
+    assert (status, content_type) == (200, "application/json")
+    assert small_batches == [2, 2, 1]
+    document = json.loads(body)
+    assert document["success"] is True and document["count"] == 5
+    assert sorted(inventory["id"] for inventory in document["inventories"]) == sorted(created)
+
+
+def test_ndjson_export_has_one_inventory_per_line(inventory_service, small_batches):
+    created = [inventory_service.enter_inventory(property_id, 1, 1)["id"] for property_id in range(4)]
+
+    status, content_type, body = _export(inventory_service, "?format=ndjson&depth=0")
+
+    assert (status, content_type) == (200, "application/x-ndjson")
+    assert small_batches == [2, 2]
+    assert body.endswith("\n")
+    lines = body.splitlines()
+    assert sorted(json.loads(line)["id"] for line in lines) == sorted(created)
+
+
+def test_empty_export_is_still_a_valid_document(inventory_service):
+    json_export = _export(inventory_service)
+    ndjson_export = _export(inventory_service, "?format=ndjson")
+
+    assert json_export[0] == 200
+    assert json.loads(json_export[2]) == {"success": True, "inventories": [], "count": 0}
+    assert ndjson_export[0] == 200 and ndjson_export[2] == ""
@@ -0,0 +1,62 @@
+import cv2
+import numpy as np
+from av import VideoFrame
+
+from app.media.frame_scoring import SharpFrameSelector, luma_view, sharpness_score
+
+
+def _frame(blur=0):
+    """Tablero de ajedrez en YUV; `blur` > 0 lo desenfoca con un kernel de ese tamaño."""
+    board = (np.indices((96, 128)).sum(axis=0) // 8 % 2 * 255).astype(np.uint8)
+    if blur:
+        board = cv2.blur(board, (blur, blur))
+    return VideoFrame.from_ndarray(cv2.cvtColor(board, cv2.COLOR_GRAY2BGR), format="bgr24").reformat(format="yuv420p")
+
+
+def test_luma_view_reads_the_y_plane_without_padding():
+    frame = _frame()
+
+    luma = luma_view(frame)
+
+    assert luma.shape == (96, 128)
+    # yuv420p como ndarray: las primeras `height` filas son el plano Y
+    assert np.array_equal(luma, frame.to_ndarray()[:96])
+
+
+def test_blur_lowers_the_score():
+    assert sharpness_score(_frame()) > sharpness_score(_frame(blur=5)) > sharpness_score(_frame(blur=15))
+
+
+def test_selector_picks_the_sharpest_frame_in_the_window():
+    selector = SharpFrameSelector(window_ms=300, stride=1, max_frames=8)
+    sharp = _frame()
+    for timestamp, frame in ((10.0, _frame(blur=9)), (10.1, sharp), (10.2, _frame(blur=5))):
+        selector.push(frame, timestamp)
+
+    frame, timestamp, score = selector.best(now=10.25)
+
+    assert frame is sharp and timestamp == 10.1
+    assert score == sharpness_score(sharp)
+
+
+def test_selector_ignores_frames_outside_the_window():
+    selector = SharpFrameSelector(window_ms=300, stride=1)
+    selector.push(_frame(), 10.0)
+    recent = _frame(blur=9)
+    selector.push(recent, 10.5)
+
+    assert selector.best(now=10.6)[0] is recent
+    assert selector.best(now=11.0) is None
+
+
+def test_selector_scores_one_frame_per_stride_and_keeps_at_most_max_frames():
+    selector = SharpFrameSelector(window_ms=1000, stride=3, max_frames=2)
+
+    for index in range(9):
+        selector.push(_frame(), 10.0 + index / 100)
+
+    # Se puntúan los frames 3, 6 y 9; solo quedan los dos últimos
+    assert len(selector) == 2
+    assert [timestamp for timestamp, _, _ in selector._frames] == [10.05, 10.08]
+    selector.clear()
+    assert selector.best(now=10.1) is None
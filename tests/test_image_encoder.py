@@ -0,0 +1,52 @@
+import asyncio
+
+import cv2
+import numpy as np
+import pytest
+from av import VideoFrame
+
+from app.media import image_encoder
+from app.media.image_encoder import JpegEncoder
+
+
+@pytest.fixture
+def encoder():
+    encoder = JpegEncoder(max_workers=1, quality=90)
+    yield encoder
+    encoder.shutdown()
+
+
+def _frame(width=64, height=48):
+    pixels = np.zeros((height, width, 3), dtype=np.uint8)
+    pixels[:, : width // 2] = (0, 0, 255)
+    return VideoFrame.from_ndarray(pixels, format="bgr24").reformat(format="yuv420p")
+
+
+def test_save_writes_a_decodable_jpeg_without_leftovers(encoder, tmp_path):
+    path = str(tmp_path / "capture.jpg")
+
+    result = asyncio.run(encoder.save(_frame(), path))
+
+    assert (result.path, result.width, result.height) == (path, 64, 48)
+    assert result.total_ms >= result.encode_ms
+    image = cv2.imread(path)
+    assert image.shape == (48, 64, 3)
+    # Mitad izquierda roja tras el paso por YUV y JPEG
+    assert image[24, 8, 2] > 200 and image[24, 56, 2] < 50
+    assert [p.name for p in tmp_path.iterdir()] == ["capture.jpg"]
+
+
+def test_failed_write_keeps_the_previous_file_and_removes_the_temporary(encoder, tmp_path, monkeypatch):
+    path = tmp_path / "capture.jpg"
+    path.write_bytes(b"anterior")
+
+    def failing_replace(src, dst):
+        raise OSError("disco lleno")
+
+    monkeypatch.setattr(image_encoder.os, "replace", failing_replace)
+
+    with pytest.raises(OSError):
+        asyncio.run(encoder.save(_frame(), str(path)))
+
+    assert path.read_bytes() == b"anterior"
+    assert [p.name for p in tmp_path.iterdir()] == ["capture.jpg"]
@@ -0,0 +1,41 @@
+import asyncio
+import time
+
+from app.utils import loop_monitor
+from app.utils.loop_monitor import LoopLagMonitor
+
+
+def _block_loop(monitor, seconds):
+    async def scenario():
+        monitor.start()
+        # Dar tiempo al watchdog para su primer ping
+        await asyncio.sleep(0.05)
+        time.sleep(seconds)
+        await asyncio.sleep(0.05)
+        started = (monitor._task is not None, monitor._watchdog is not None)
+        await monitor.stop()
+        return started
+    return asyncio.run(scenario())
+
+
+def test_watchdog_runs_with_the_lag_sampler_disabled():
+    monitor = LoopLagMonitor(interval=0, stall_threshold=0.05, sample_interval=0.01)
+
+    lag_task, watchdog = _block_loop(monitor, 0.3)
+
+    assert (lag_task, watchdog) == (False, True)
+    assert monitor.stalls == 1
+    assert "test_loop_monitor.py" in monitor.offenders()[0]["where"]
+
+
+def test_lag_sampler_runs_with_the_watchdog_disabled():
+    monitor = LoopLagMonitor(interval=0.01, stall_threshold=0)
+    lag = loop_monitor._LOOP_LAG_SECONDS._default()
+    observed, total = lag.count, lag.sum
+
+    lag_task, watchdog = _block_loop(monitor, 0.1)
+
+    assert (lag_task, watchdog) == (True, False)
+    assert monitor.stalls == 0
+    # El sleep que coincidió con el bloqueo despertó ~90 ms tarde
+    assert lag.count > observed and lag.sum - total > 0.05
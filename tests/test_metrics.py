@@ -0,0 +1,85 @@
+import asyncio
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+
+from app.api.metrics_routes import MetricsAPI
+from app.utils.metrics import MetricsRegistry, timed
+
+
+def _get_metrics(registry, session_manager=None):
+    async def scenario():
+        app = web.Application()
+        MetricsAPI(session_manager, registry=registry).setup_routes(app)
+        async with TestClient(TestServer(app)) as client:
+            response = await client.get("/metrics")
+            return response.status, response.headers["Content-Type"], await response.text()
+    return asyncio.run(scenario())
+
+
+def test_metrics_endpoint_renders_the_prometheus_text_format():
+    registry = MetricsRegistry()
+    frames = registry.counter("frames_total", "Frames recibidos", ("pipeline",))
+    frames.labels("audio").inc(3)
+    frames.labels('vi"deo').inc()
+    registry.counter("stalls_total", "Bloqueos")
+    latency = registry.histogram("decode_seconds", "Decodificación", buckets=(0.1, 0.5))
+    for value in (0.05, 0.2, 0.7):
+        latency.observe(value)
+
+    status, content_type, body = _get_metrics(registry, session_manager=[object(), object()])
+
+    assert status == 200
+    assert content_type == "text/plain; version=0.0.4; charset=utf-8"
+    assert body.splitlines() == [
+        "# HELP frames_total Frames recibidos",
+        "# TYPE frames_total counter",
+        'frames_total{pipeline="audio"} 3',
+        'frames_total{pipeline="vi\\"deo"} 1',
+        "# HELP stalls_total Bloqueos",
+        "# TYPE stalls_total counter",
+        # Sin etiquetas se expone desde el inicio
+        "stalls_total 0",
+        "# HELP decode_seconds Decodificación",
+        "# TYPE decode_seconds histogram",
+        'decode_seconds_bucket{le="0.1"} 1',
+        'decode_seconds_bucket{le="0.5"} 2',
+        'decode_seconds_bucket{le="+Inf"} 3',
+        f"decode_seconds_sum {0.05 + 0.2 + 0.7!r}",
+        "decode_seconds_count 3",
+        "# HELP peer_sessions_active Sesiones WebRTC activas",
+        "# TYPE peer_sessions_active gauge",
+        # Calculado al exponer: len(session_manager)
+        "peer_sessions_active 2",
+    ]
+    assert body.endswith("\n")
+
+
+def test_registry_returns_the_same_metric_and_rejects_conflicts():
+    registry = MetricsRegistry()
+    counter = registry.counter("requests_total", "Peticiones", ("route",))
+
+    assert registry.counter("requests_total", "Peticiones", ("route",)) is counter
+    with pytest.raises(ValueError):
+        registry.gauge("requests_total", "Peticiones", ("route",))
+    with pytest.raises(ValueError):
+        registry.counter("requests_total", "Peticiones", ("method",))
+    with pytest.raises(ValueError):
+        counter.inc()
+
+
+def test_timed_observes_each_call_even_when_it_raises():
+    registry = MetricsRegistry()
+    histogram = registry.histogram("call_seconds", "Llamadas", ("function",))
+
+    @timed(histogram)
+    def failing():
+        raise RuntimeError("falla")
+
+    with pytest.raises(RuntimeError):
+        failing()
+    failing_series = histogram.labels("failing")
+
+    assert failing_series.count == 1
+    assert 'call_seconds_count{function="failing"} 1' in registry.render()
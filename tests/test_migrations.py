@@ -0,0 +1,174 @@
+import sqlite3
+from datetime import datetime
+import uuid
+
+from sqlalchemy import text
+
+from app.models.database import DatabaseManager
+from app.models.migrations import MIGRATIONS, run_migrations
+from app.services.inventory_service import InventoryService
+
+# Esquema de inventory.db antes de las migraciones (ids UUID como texto)
+BASELINE_SCHEMA = """
+CREATE TABLE inventories (
+    id VARCHAR NOT NULL, origin_id INTEGER, property_id INTEGER NOT NULL,
+    inventory_type_id INTEGER NOT NULL, event_id INTEGER NOT NULL, action VARCHAR,
+    synced BOOLEAN, created_at DATETIME, updated_at DATETIME, PRIMARY KEY (id)
+);
+CREATE TABLE session_context (
+    id INTEGER NOT NULL, current_inventory_id INTEGER, current_space_id INTEGER,
+    current_element_id INTEGER, PRIMARY KEY (id)
+);
+CREATE TABLE spaces (
+    id VARCHAR NOT NULL, origin_id INTEGER, inventory_id VARCHAR NOT NULL, name VARCHAR NOT NULL,
+    description TEXT, action VARCHAR, synced BOOLEAN, created_at DATETIME, updated_at DATETIME,
+    PRIMARY KEY (id), FOREIGN KEY(inventory_id) REFERENCES inventories (id)
+);
+CREATE TABLE elements (
+    id VARCHAR NOT NULL, origin_id INTEGER, space_id VARCHAR NOT NULL, name VARCHAR NOT NULL,
+    description TEXT, amount INTEGER, status VARCHAR, action VARCHAR, synced BOOLEAN,
+    created_at DATETIME, updated_at DATETIME,
+    PRIMARY KEY (id), FOREIGN KEY(space_id) REFERENCES spaces (id)
+);
+CREATE TABLE videos (
+    id VARCHAR NOT NULL, origin_id INTEGER, space_id VARCHAR NOT NULL, path VARCHAR NOT NULL,
+    path_synced VARCHAR, description TEXT, synced BOOLEAN, action VARCHAR,
+    created_at DATETIME, updated_at DATETIME,
+    PRIMARY KEY (id), FOREIGN KEY(space_id) REFERENCES spaces (id)
+);
+CREATE TABLE attributes (
+    id VARCHAR NOT NULL, origin_id INTEGER, element_id VARCHAR NOT NULL, "key" VARCHAR NOT NULL,
+    value VARCHAR NOT NULL, action VARCHAR, synced BOOLEAN, created_at DATETIME, updated_at DATETIME,
+    PRIMARY KEY (id), FOREIGN KEY(element_id) REFERENCES elements (id)
+);
+CREATE TABLE images (
+    id VARCHAR NOT NULL, origin_id INTEGER, space_id VARCHAR NOT NULL, element_id VARCHAR,
+    path VARCHAR, path_synced VARCHAR, description TEXT, action VARCHAR, synced BOOLEAN,
+    created_at DATETIME, updated_at DATETIME,
+    PRIMARY KEY (id), FOREIGN KEY(space_id) REFERENCES spaces (id),
+    FOREIGN KEY(element_id) REFERENCES elements (id)
+);
+"""
+
+KEPT_INVENTORY = str(uuid.uuid4())
+DUPLICATE_INVENTORY = str(uuid.uuid4())
+KEPT_SPACE = str(uuid.uuid4())
+DUPLICATE_SPACE = str(uuid.uuid4())
+ELEMENT = str(uuid.uuid4())
+ATTRIBUTE = str(uuid.uuid4())
+
+
+def _create_baseline_db(path):
+    conn = sqlite3.connect(path)
+    conn.executescript(BASELINE_SCHEMA)
+    # Dos inventarios con la misma clave natural, cada uno con un espacio "cocina"
+    conn.executemany(
+        "INSERT INTO inventories (id, property_id, inventory_type_id, event_id, synced, created_at, updated_at) "
+        "VALUES (?, 1, 2, 3, 0, ?, ?)",
+        [(KEPT_INVENTORY, "2024-01-01 10:00:00", "2024-01-01 10:00:00"),
+         (DUPLICATE_INVENTORY, "2024-01-02 10:00:00", "2024-01-02 10:00:00")],
+    )
+    conn.executemany(
+        "INSERT INTO spaces (id, inventory_id, name, synced, created_at, updated_at) VALUES (?, ?, 'cocina', 0, ?, ?)",
+        [(KEPT_SPACE, KEPT_INVENTORY, "2024-01-01 10:00:00", "2024-01-01 10:00:00"),
+         (DUPLICATE_SPACE, DUPLICATE_INVENTORY, "2024-01-02 10:00:00", "2024-01-02 10:00:00")],
+    )
+    conn.execute(
+        "INSERT INTO elements (id, space_id, name, amount, synced, created_at, updated_at) "
+        "VALUES (?, ?, 'mesa', 1, 0, '2024-01-02 11:00:00', '2024-01-02 11:00:00')",
+        (ELEMENT, DUPLICATE_SPACE),
+    )
+    conn.execute(
+        "INSERT INTO attributes (id, element_id, \"key\", value, synced, created_at, updated_at) "
+        "VALUES (?, ?, 'color', 'rojo', 0, '2024-01-02 11:00:00', '2024-01-02 11:00:00')",
+        (ATTRIBUTE, ELEMENT),
+    )
+    conn.execute(
+        "INSERT INTO session_context (id, current_inventory_id, current_space_id, current_element_id) "
+        "VALUES (1, ?, ?, ?)",
+        (DUPLICATE_INVENTORY, DUPLICATE_SPACE, ELEMENT),
+    )
+    conn.commit()
+    conn.close()
+
+
+def test_migrations_upgrade_a_baseline_database(db_path):
+    _create_baseline_db(db_path)
+
+    engine = DatabaseManager(db_path).engine
+
+    with engine.connect() as conn:
+        assert conn.execute(text("PRAGMA user_version")).scalar() == MIGRATIONS[-1][0]
+        indexes = {row[1] for row in conn.execute(text("PRAGMA index_list(inventories)"))}
+        assert "uq_inventories_natural_key" in indexes
+        # Migración 2: claves UUID guardadas como BLOB de 16 bytes
+        assert conn.execute(text("SELECT DISTINCT typeof(id), length(id) FROM spaces")).fetchall() == [("blob", 16)]
+        assert conn.execute(text("SELECT typeof(element_id) FROM attributes")).scalar() == "blob"
+
+    # Migración 1: duplicados fusionados en la fila más antigua, con sus hijos re-apuntados
+    service = InventoryService(db_path)
+    inventories = service.get_inventories()
+    assert [inventory["id"] for inventory in inventories] == [KEPT_INVENTORY]
+    inventory = service.get_inventory(KEPT_INVENTORY)
+    assert [space["id"] for space in inventory["spaces"]] == [KEPT_SPACE]
+    elements = service.get_elements(KEPT_SPACE)
+    assert [element.id for element in elements] == [ELEMENT]
+    assert [attribute.value for attribute in service.get_attributes(ELEMENT)] == ["rojo"]
+
+    # El contexto guardado apunta a las filas conservadas
+    assert service.get_context() == {
+        "inventory_id": KEPT_INVENTORY, "space_name": "cocina", "element_name": "mesa",
+    }
+
+
+def test_migrations_run_only_once(db_path):
+    _create_baseline_db(db_path)
+    engine = DatabaseManager(db_path).engine
+
+    with engine.connect() as conn:
+        before = conn.execute(text("SELECT hex(id) FROM inventories")).fetchall()
+
+    run_migrations(engine)
+
+    with engine.connect() as conn:
+        assert conn.execute(text("PRAGMA user_version")).scalar() == MIGRATIONS[-1][0]
+        assert conn.execute(text("SELECT hex(id) FROM inventories")).fetchall() == before
+
+
+def test_fresh_database_is_created_at_the_latest_version(db_path, capsys):
+    engine = DatabaseManager(db_path).engine
+    with engine.connect() as conn:
+        assert conn.execute(text("PRAGMA user_version")).scalar() == MIGRATIONS[-1][0]
+    # Creada con el esquema actual: ninguna migración reconstruye sus tablas
+    assert "Aplicando migración" not in capsys.readouterr().out
+
+
+def test_recreated_tables_are_stamped_at_the_latest_version(db_path, capsys):
+    _create_baseline_db(db_path)
+    manager = DatabaseManager(db_path)
+    manager.drop_tables()
+    with manager.engine.begin() as conn:
+        conn.execute(text("PRAGMA user_version = 0"))
+    capsys.readouterr()
+
+    manager.create_tables()
+
+    with manager.engine.connect() as conn:
+        assert conn.execute(text("PRAGMA user_version")).scalar() == MIGRATIONS[-1][0]
+
+
+def test_sync_state_gets_the_high_water_id_column(db_path):
+    _create_baseline_db(db_path)
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        "CREATE TABLE sync_state (entity VARCHAR NOT NULL, high_water_mark DATETIME, "
+        "last_synced_at DATETIME, PRIMARY KEY (entity))"
+    )
+    conn.execute("INSERT INTO sync_state (entity, high_water_mark) VALUES ('inventories', '2024-01-02 10:00:00')")
+    conn.commit()
+    conn.close()
+
+    service = InventoryService(db_path)
+
+    # Una marca anterior a la migración se conserva, sin id de desempate
+    assert service.get_sync_high_water_mark("inventories") == (datetime(2024, 1, 2, 10, 0), None)
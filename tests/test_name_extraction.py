@@ -0,0 +1,58 @@
+import pytest
+
+from app.services.name_extraction_service import NameExtractionService
+
+
+@pytest.fixture(scope="module")
+def service():
+    return NameExtractionService()
+
+
+# Salidas que la precompilación de patrones debía conservar tal cual
+@pytest.mark.parametrize("method, args, expected", [
+    ("extract_space_name", ("ingresar a espacio cocina principal por favor",), "Cocina Principal"),
+    ("extract_space_name", ("ir al espacio habitación de huéspedes",), "Habitación de Huéspedes"),
+    ("extract_space_name", ("abrir espacio cuarto de lavado",), "Cuarto de Lavado"),
+    ("extract_space_name", ("espacio sala",), "Sala"),
+    ("extract_space_name", ("ingresar al espacio la cocina",), "La Cocina"),
+    ("extract_space_name", ("no hay nada que extraer aquí",), None),
+    ("extract_element_name", ("entrar al elemento mesa de centro",), "Mesa de Centro"),
+    ("extract_element_name", ("registrar el televisor de la sala ya",), "Televisor de la Sala"),
+    ("extract_element_name", ("abrir elemento lámpara por favor",), "Lámpara"),
+    ("extract_element_name", ("elemento silla",), "Silla"),
+    ("extract_elements_from_command", ("el espacio tiene un sofá azul y dos lámparas",), [
+        {"name": "sofá", "amount": 1, "color": "azul"},
+        {"name": "lámparas", "amount": 2, "color": None},
+    ]),
+    ("extract_elements_from_command", ("el espacio tiene tres cuadros blancos",), [
+        {"name": "cuadros", "amount": 3, "color": "blanco"},
+    ]),
+    ("extract_attribute", ("es de color azul marino", "color"), "Azul Marino"),
+    ("extract_attribute", ("se encuentra en el segundo piso", "ubicación"), "El Segundo Piso"),
+    ("extract_attribute", ("sin atributos reconocibles", "estado"), None),
+    ("normalize_name", ("mesa de noche",), "Mesa de Noche"),
+])
+def test_unchanged_outputs(service, method, args, expected):
+    assert getattr(service, method)(*args) == expected
+
+
+# Salidas que la precompilación de patrones corrigió a propósito
+@pytest.mark.parametrize("method, args, expected", [
+    # Antes: "Baño Por" (se quitaba "favor" pero quedaba "por")
+    ("extract_space_name", ("entrar al espacio baño por favor ya",), "Baño"),
+    # Antes: {"name": "a"} ("una" se leía como "un" + "a")
+    ("extract_elements_from_command", ("el espacio tiene una mesa",), [
+        {"name": "mesa", "amount": 1, "color": None},
+    ]),
+    # Antes: color None (sólo se reconocían colores en masculino singular)
+    ("extract_elements_from_command", ("el espacio tiene sillas rojas",), [
+        {"name": "sillas", "amount": 1, "color": "rojo"},
+    ]),
+    ("extract_elements_from_command", ("el espacio tiene dos sillas rojas, una mesa y 3 cuadros",), [
+        {"name": "sillas", "amount": 2, "color": "rojo"},
+        {"name": "mesa", "amount": 1, "color": None},
+        {"name": "cuadros", "amount": 3, "color": None},
+    ]),
+])
+def test_corrected_outputs(service, method, args, expected):
+    assert getattr(service, method)(*args) == expected
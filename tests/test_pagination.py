@@ -0,0 +1,64 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+
+from app.api.inventory_routes import InventoryAPI
+from app.services.async_inventory_service import AsyncInventoryService
+from app.utils.pagination import encode_cursor, decode_cursor
+
+
+def test_cursor_round_trip():
+    updated_at = datetime(2024, 5, 1, 12, 30, 15, 123456)
+    record_id = "0f8a1c2e-3b4d-4e5f-8a9b-0c1d2e3f4a5b"
+
+    cursor = encode_cursor(updated_at, record_id)
+
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (updated_at, record_id)
+    assert decode_cursor(encode_cursor(None, record_id)) == (None, record_id)
+
+
+@pytest.mark.parametrize("cursor", ["", "!!!", "bm90LWpzb24", "eyJ1IjoibWFsYSJ9"])
+def test_malformed_cursor_raises_value_error(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+def test_cursor_pages_cover_every_inventory_once(inventory_service):
+    created = [inventory_service.enter_inventory(property_id, 1, 1)["id"] for property_id in range(5)]
+
+    async def walk():
+        app = web.Application()
+        InventoryAPI(AsyncInventoryService(inventory_service)).setup_routes(app)
+        async with TestClient(TestServer(app)) as client:
+            seen, cursor, pages = [], None, 0
+            while True:
+                params = {"limit": "2", "depth": "0"}
+                if cursor:
+                    params["cursor"] = cursor
+                response = await client.get("/api/v1/inventories", params=params)
+                assert response.status == 200
+                body = await response.json()
+                seen.extend(inventory["id"] for inventory in body["inventories"])
+                pages += 1
+                cursor = body["next_cursor"]
+                if cursor is None:
+                    return seen, pages
+
+    seen, pages = asyncio.run(walk())
+
+    assert pages == 3
+    assert sorted(seen) == sorted(created)
+    assert len(seen) == len(set(seen))
+
+
+def test_bad_cursor_returns_400(api_get):
+    unreadable = "!!!"
+    bad_id = encode_cursor(datetime(2024, 1, 1), "nope")
+
+    responses = api_get(*(f"/api/v1/inventories?cursor={cursor}" for cursor in (unreadable, bad_id)))
+
+    assert responses == [(400, {"success": False, "error": "Cursor inválido"})] * 2
@@ -0,0 +1,117 @@
+import asyncio
+import json
+import threading
+
+import pytest
+
+from app.services.recognition_service import RecognitionExecutor
+
+
+class _GatedRecognizer:
+    """Recognizer falso: AcceptWaveform espera a `gate`; b"fin" cierra la frase."""
+
+    def __init__(self):
+        self.gate = threading.Event()
+        self.chunks = []
+        self.grammars = []
+
+    def AcceptWaveform(self, data):
+        self.gate.wait(5)
+        self.chunks.append(data)
+        return data == b"fin"
+
+    def Result(self):
+        return json.dumps({"text": "Listo"})
+
+    def PartialResult(self):
+        return json.dumps({"partial": ""})
+
+    def FinalResult(self):
+        return json.dumps({"text": ""})
+
+    def SetGrammar(self, grammar):
+        self.grammars.append(grammar)
+
+
+@pytest.fixture
+def executor():
+    executor = RecognitionExecutor(max_workers=1, queue_size=1)
+    yield executor
+    executor.shutdown()
+
+
+async def _until_taken(stream):
+    # El worker ya sacó el chunk de la cola y lo está decodificando
+    while not stream._queue.empty() or stream._in_flight is None:
+        await asyncio.sleep(0.001)
+
+
+def test_feed_waits_while_the_queue_is_full(executor):
+    recognizer = _GatedRecognizer()
+
+    async def scenario():
+        stream = executor.create_stream(recognizer)
+        first = await stream.feed(b"a")
+        await _until_taken(stream)
+        second = await stream.feed(b"b")
+        assert stream.saturated()
+
+        third_feed = asyncio.ensure_future(stream.feed(b"c"))
+        await asyncio.sleep(0.05)
+        assert not third_feed.done()
+
+        recognizer.gate.set()
+        third = await third_feed
+        results = [await future for future in (first, second, third)]
+        await stream.close()
+        return results
+
+    results = asyncio.run(scenario())
+
+    assert recognizer.chunks == [b"a", b"b", b"c"]
+    assert [result.final for result in results] == [False, False, False]
+
+
+def test_close_waits_for_the_chunk_in_flight_and_cancels_waiters(executor):
+    recognizer = _GatedRecognizer()
+
+    async def scenario():
+        stream = executor.create_stream(recognizer)
+        in_flight = await stream.feed(b"a")
+        await _until_taken(stream)
+        queued = await stream.feed(b"b")
+
+        closing = asyncio.ensure_future(stream.close())
+        await asyncio.sleep(0.05)
+        # El recognizer sigue en uso en el pool: close() no termina todavía
+        assert not closing.done()
+
+        recognizer.gate.set()
+        await closing
+        return in_flight, queued
+
+    in_flight, queued = asyncio.run(scenario())
+
+    assert in_flight.cancelled() and queued.cancelled()
+    assert recognizer.chunks == [b"a"]
+
+
+def test_latest_grammar_is_applied_after_the_phrase_ends(executor):
+    recognizer = _GatedRecognizer()
+    recognizer.gate.set()
+
+    async def scenario():
+        stream = executor.create_stream(recognizer)
+        stream.set_grammar('["uno"]')
+        stream.set_grammar('["dos"]')
+        partial = await (await stream.feed(b"a"))
+        applied_before_final = list(recognizer.grammars)
+        final = await (await stream.feed(b"fin"))
+        await stream.close()
+        return partial, applied_before_final, final
+
+    partial, applied_before_final, final = asyncio.run(scenario())
+
+    assert partial.final is False and applied_before_final == []
+    assert final.final is True and final.text == "listo"
+    assert recognizer.grammars == ['["dos"]']
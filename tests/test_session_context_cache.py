@@ -0,0 +1,113 @@
+import threading
+import uuid
+
+import pytest
+
+from app.models.database import PeerSessionContext
+from app.services import session_context_cache
+from app.services.session_context_cache import (
+    SessionContextCache,
+    get_session_context_cache,
+    release_session_context_cache,
+)
+
+
+@pytest.fixture
+def blocked_writer():
+    """Detiene el hilo escritor hasta llamar a la función devuelta (que espera a que se vacíe)."""
+    writer = session_context_cache._get_writer()
+    gate = threading.Event()
+    writer.submit(gate.wait)
+
+    def release():
+        gate.set()
+        writer.submit(lambda: None).result()
+    yield release
+    gate.set()
+
+
+def _peer_rows(inventory_service, sender_id):
+    session = inventory_service.db_manager.get_session()
+    try:
+        return [
+            (row.current_inventory_id, row.current_space_id)
+            for row in session.query(PeerSessionContext).filter_by(sender_id=sender_id)
+        ]
+    finally:
+        session.close()
+
+
+def test_context_row_is_read_outside_the_global_lock(inventory_service, monkeypatch):
+    held = []
+    reload = SessionContextCache.reload
+
+    def recording_reload(self):
+        held.append(session_context_cache._caches_lock.locked())
+        reload(self)
+
+    monkeypatch.setattr(SessionContextCache, "reload", recording_reload)
+
+    get_session_context_cache(inventory_service.db_manager, "inspector-1")
+
+    # El contexto por defecto ya existía: solo se lee el del inspector, sin el lock
+    assert held == [False]
+
+
+def test_new_peer_context_starts_in_the_default_inventory_and_saves_it(inventory_service, blocked_writer):
+    inventory = inventory_service.enter_inventory(1, 2, 3)
+
+    cache = get_session_context_cache(inventory_service.db_manager, "inspector-1")
+    assert cache.inventory_id == inventory["id"]
+    blocked_writer()
+
+    assert _peer_rows(inventory_service, "inspector-1") == [(inventory["id"], None)]
+
+
+def test_consecutive_updates_are_written_once_with_the_latest_state(inventory_service, blocked_writer, monkeypatch):
+    cache = get_session_context_cache(inventory_service.db_manager, "inspector-1")
+    flushes = []
+    flush = cache.flush
+    monkeypatch.setattr(cache, "flush", lambda: flushes.append(cache.space_id) or flush())
+    spaces = [str(uuid.uuid4()) for _ in range(3)]
+
+    for space_id in spaces:
+        cache.update(space_id=space_id)
+    blocked_writer()
+
+    assert flushes == [spaces[-1]]
+    assert _peer_rows(inventory_service, "inspector-1") == [(None, spaces[-1])]
+
+
+def test_remember_names_ignores_names_read_for_stale_ids(inventory_service):
+    cache = get_session_context_cache(inventory_service.db_manager, "inspector-1")
+    old_space, new_space = str(uuid.uuid4()), str(uuid.uuid4())
+    cache.update(space_id=old_space)
+    cache.update(space_id=new_space)
+
+    # El nombre se leyó para el espacio anterior: no se guarda
+    cache.remember_names(old_space, "cocina", None, None)
+    assert cache.snapshot()["space_name"] is None
+
+    cache.remember_names(new_space, "baño", None, None)
+    cache.remember_names(new_space, "otro", None, None)
+    assert cache.snapshot()["space_name"] == "baño"
+
+
+def test_discard_deletes_the_row_after_pending_flushes(inventory_service):
+    cache = get_session_context_cache(inventory_service.db_manager, "inspector-1")
+    cache.update(space_id=str(uuid.uuid4()))
+    cache.flush()
+    assert len(_peer_rows(inventory_service, "inspector-1")) == 1
+
+    writer = session_context_cache._get_writer()
+    gate = threading.Event()
+    writer.submit(gate.wait)
+    # Un cambio con flush pendiente y el cierre de la sesión detrás
+    cache.update(space_id=str(uuid.uuid4()))
+    release_session_context_cache(inventory_service.db_manager, "inspector-1")
+    gate.set()
+    writer.submit(lambda: None).result()
+
+    assert _peer_rows(inventory_service, "inspector-1") == []
+    # Un contexto nuevo para el mismo inspector no hereda la fila borrada
+    assert not get_session_context_cache(inventory_service.db_manager, "inspector-1").persisted
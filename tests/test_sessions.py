@@ -0,0 +1,53 @@
+import asyncio
+import threading
+
+from app import sessions
+from app.sessions import PeerSession
+
+
+class _RecordingInventoryService:
+    """Sustituye a InventoryService: registra en qué hilo se crea y si se liberó."""
+
+    def __init__(self, session_id=None):
+        self.session_id = session_id
+        self.thread_name = threading.current_thread().name
+        self.released = False
+
+    def close_session(self):
+        self.released = True
+
+
+def test_peer_session_context_is_created_off_the_event_loop(monkeypatch):
+    monkeypatch.setattr(sessions, "InventoryService", _RecordingInventoryService)
+
+    async def scenario():
+        session = PeerSession("inspector-1", sio_server=None)
+        # El constructor no toca la base de datos
+        assert session.inventory_service is None
+        service = await session._open_inventory_service()
+        await session.close()
+        return service
+
+    service = asyncio.run(scenario())
+
+    assert service.session_id == "inspector-1"
+    assert service.thread_name.startswith("db")
+    assert service.released is True
+
+
+def test_context_opened_after_close_is_released(monkeypatch):
+    created = []
+    monkeypatch.setattr(
+        sessions, "InventoryService",
+        lambda session_id: created.append(_RecordingInventoryService(session_id)) or created[-1]
+    )
+
+    async def scenario():
+        session = PeerSession("inspector-2", sio_server=None)
+        await session.close()
+        return session, await session._open_inventory_service()
+
+    session, service = asyncio.run(scenario())
+
+    assert service is None and session.inventory_service is None
+    assert created[0].released is True
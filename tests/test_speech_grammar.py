@@ -0,0 +1,81 @@
+import asyncio
+import json
+import threading
+
+from app.services.speech_grammar import SpeechGrammar
+
+
+def _grammar():
+    return SpeechGrammar(extra_words=["listo"])
+
+
+def test_add_names_bumps_the_version_only_for_new_names():
+    grammar = _grammar()
+
+    assert grammar.add_names("Sofá ", "", None) is True
+    assert grammar.version == 1
+    # Mismo nombre normalizado: sin cambios
+    assert grammar.add_names("sofá", "SOFÁ") is False
+    assert grammar.version == 1
+    assert grammar.add_names("sofá", "mesa de noche") is True
+    assert grammar.version == 2
+    assert grammar.stats() == {"version": 2, "names": 2, "loaded": False}
+
+
+def test_concurrent_adds_of_the_same_name_count_once():
+    grammar = _grammar()
+    barrier = threading.Barrier(8)
+    changed = []
+
+    def add():
+        barrier.wait()
+        changed.append(grammar.add_names("lámpara"))
+
+    threads = [threading.Thread(target=add) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert changed.count(True) == 1
+    assert grammar.version == 1
+
+
+def test_to_json_is_cached_per_version_and_includes_names():
+    grammar = _grammar()
+    first = grammar.to_json()
+    assert grammar.to_json() is first
+
+    grammar.add_names("mesa de noche")
+    updated = grammar.to_json()
+
+    assert updated is not first
+    phrases = json.loads(updated)
+    assert "mesa de noche" in phrases and "listo" in phrases
+    # Palabras sueltas para combinar disparadores con nombres, y el comodín al final
+    assert {"mesa", "noche"} <= set(phrases)
+    assert phrases[-1] == "[unk]"
+
+
+class _VocabularyService:
+    def __init__(self, names):
+        self.names = names
+        self.calls = 0
+
+    def get_vocabulary_names(self):
+        self.calls += 1
+        return self.names
+
+
+def test_load_names_replaces_names_and_loads_once_asynchronously():
+    grammar = _grammar()
+    service = _VocabularyService(["Cocina", "Sofá", None])
+
+    asyncio.run(grammar.load_async(service))
+    asyncio.run(grammar.load_async(service))
+
+    assert service.calls == 1
+    assert grammar.stats() == {"version": 1, "names": 2, "loaded": True}
+    # Los mismos nombres otra vez no cambian la versión
+    grammar.load_names(service)
+    assert grammar.version == 1
@@ -0,0 +1,92 @@
+import asyncio
+import threading
+import time
+
+import pytest
+import vosk
+
+from app import config
+from app.services.speech_model_service import VoskModelRegistry
+
+
+class _FakeModel:
+    loads = 0
+
+    def __init__(self, path):
+        # Carga lenta: da tiempo a que otros hilos pidan el modelo a la vez
+        time.sleep(0.05)
+        type(self).loads += 1
+        self.path = path
+
+
+class _FakeRecognizer:
+    created = []
+
+    def __init__(self, model, sample_rate, grammar=None):
+        self.model = model
+        self.sample_rate = sample_rate
+        self.grammar = grammar
+        self.accepted = []
+        self.finished = False
+        type(self).created.append(self)
+
+    def AcceptWaveform(self, data):
+        self.accepted.append(data)
+        return False
+
+    def FinalResult(self):
+        self.finished = True
+        return '{"text": ""}'
+
+
+@pytest.fixture
+def fake_vosk(monkeypatch):
+    monkeypatch.setattr(_FakeModel, "loads", 0)
+    monkeypatch.setattr(_FakeRecognizer, "created", [])
+    monkeypatch.setattr(vosk, "Model", _FakeModel)
+    monkeypatch.setattr(vosk, "KaldiRecognizer", _FakeRecognizer)
+
+
+def test_model_is_loaded_once_on_first_use_and_warmed_up(tmp_path, fake_vosk):
+    registry = VoskModelRegistry(str(tmp_path))
+    assert not registry.is_ready and _FakeModel.loads == 0
+
+    models = []
+    threads = [threading.Thread(target=lambda: models.append(registry.get_model())) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert _FakeModel.loads == 1
+    assert len({id(model) for model in models}) == 1
+    # Warm-up: 200 ms de silencio y un resultado final en un recognizer descartable
+    warm_up, = _FakeRecognizer.created
+    assert warm_up.accepted == [bytes(config.VOSK_SAMPLE_RATE // 5)] and warm_up.finished
+    status = registry.status()
+    assert status["ready"] is True and status["loading"] is False
+    assert status["load_time_seconds"] >= 0.05
+
+
+def test_recognizers_share_the_loaded_model(tmp_path, fake_vosk):
+    registry = VoskModelRegistry(str(tmp_path))
+
+    plain = registry.create_recognizer()
+    constrained = registry.create_recognizer(8000, grammar='["tomar foto"]')
+
+    assert _FakeModel.loads == 1
+    assert plain.model is constrained.model is registry.get_model()
+    assert (plain.sample_rate, plain.grammar) == (config.VOSK_SAMPLE_RATE, None)
+    assert (constrained.sample_rate, constrained.grammar) == (8000, '["tomar foto"]')
+
+
+def test_warm_up_records_a_missing_model_without_raising(tmp_path, fake_vosk):
+    registry = VoskModelRegistry(str(tmp_path / "no-existe"))
+
+    asyncio.run(registry.warm_up())
+
+    status = registry.status()
+    assert status["ready"] is False and status["loading"] is False
+    assert "no encontrado" in status["error"]
+    with pytest.raises(FileNotFoundError):
+        registry.get_model()
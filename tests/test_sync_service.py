@@ -0,0 +1,209 @@
+import asyncio
+from datetime import datetime
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from app.models.database import Inventory, Space
+from app.services import sync_service as sync_module
+from app.services.sync_service import SyncService
+
+
+class StubUpstream:
+    """Servidor central de prueba: registra los lotes y responde según un guion por entidad."""
+
+    def __init__(self, statuses=None, extra_origin_ids=None):
+        # entidad -> lista de códigos HTTP a devolver en orden (después, 200)
+        self.statuses = {entity: list(codes) for entity, codes in (statuses or {}).items()}
+        # entidad -> origin_ids adicionales (de filas fuera del lote) en cada respuesta
+        self.extra_origin_ids = extra_origin_ids or {}
+        self.received = []
+
+    def make_app(self):
+        # Una aplicación por corrida: cada asyncio.run usa un loop nuevo
+        app = web.Application()
+        app.router.add_post("/{entity}", self.handle)
+        return app
+
+    async def handle(self, request):
+        entity = request.match_info["entity"]
+        body = await request.json()
+        self.received.append((entity, [item["id"] for item in body["items"]]))
+        codes = self.statuses.get(entity)
+        status = codes.pop(0) if codes else 200
+        if status != 200:
+            return web.json_response({"error": "rechazado"}, status=status)
+        origin_ids = {item["id"]: index + 1 for index, item in enumerate(body["items"])}
+        origin_ids.update(self.extra_origin_ids.get(entity, {}))
+        return web.json_response({"origin_ids": origin_ids})
+
+    def entities(self):
+        return [entity for entity, _ in self.received]
+
+
+class _RecordingAsyncio:
+    """Sustituye a asyncio en sync_service para registrar las esperas de backoff sin dormir."""
+
+    def __init__(self):
+        self.sleeps = []
+
+    def __getattr__(self, name):
+        return getattr(asyncio, name)
+
+    async def sleep(self, delay):
+        self.sleeps.append(delay)
+
+
+def _run_sync(inventory_service, upstream, **kwargs):
+    async def scenario():
+        server = TestServer(upstream.make_app())
+        await server.start_server()
+        try:
+            service = SyncService(
+                inventory_service, upstream_url=str(server.make_url("")), **kwargs
+            )
+            return await service.run_once()
+        finally:
+            await server.close()
+    return asyncio.run(scenario())
+
+
+def _seed(inventory_service):
+    inventory_service.enter_inventory(1, 2, 3)
+    space = inventory_service.enter_space("cocina")
+    inventory_service.enter_element("mesa")
+    return space
+
+
+def _synced(inventory_service, model):
+    session = inventory_service.db_manager.get_session()
+    try:
+        return {row.id: (row.synced, row.origin_id) for row in session.query(model)}
+    finally:
+        session.close()
+
+
+def test_sync_sends_entities_in_dependency_order_and_marks_them(inventory_service):
+    _seed(inventory_service)
+    upstream = StubUpstream()
+
+    stats = _run_sync(inventory_service, upstream, retry_backoff=0)
+
+    assert stats["success"] is True
+    assert upstream.entities() == ["inventories", "spaces", "elements"]
+    assert all(synced and origin_id == 1 for synced, origin_id in _synced(inventory_service, Space).values())
+
+    # Nada pendiente: la segunda corrida no envía ningún lote
+    upstream.received.clear()
+    assert _run_sync(inventory_service, upstream, retry_backoff=0)["success"] is True
+    assert upstream.received == []
+
+
+def test_failed_batch_is_retried_with_exponential_backoff(inventory_service, monkeypatch):
+    _seed(inventory_service)
+    fake_asyncio = _RecordingAsyncio()
+    monkeypatch.setattr(sync_module, "asyncio", fake_asyncio)
+    upstream = StubUpstream({"inventories": [503, 500]})
+
+    stats = _run_sync(inventory_service, upstream, max_retries=3, retry_backoff=0.5)
+
+    assert stats["success"] is True
+    assert stats["entities"]["inventories"]["retries"] == 2
+    assert upstream.entities()[:3] == ["inventories"] * 3
+    assert fake_asyncio.sleeps == [0.5, 1.0]
+
+
+def test_exhausted_retries_stop_the_run_before_children(inventory_service, monkeypatch):
+    _seed(inventory_service)
+    monkeypatch.setattr(sync_module, "asyncio", _RecordingAsyncio())
+    upstream = StubUpstream({"inventories": [500] * 10})
+
+    stats = _run_sync(inventory_service, upstream, max_retries=2, retry_backoff=0.1)
+
+    assert stats["success"] is False
+    assert stats["error"].startswith("inventories")
+    # Intento inicial + 2 reintentos, y ningún hijo enviado sin su padre
+    assert upstream.entities() == ["inventories"] * 3
+    assert not any(synced for synced, _ in _synced(inventory_service, Inventory).values())
+
+
+def test_conflict_keeps_the_batch_pending_until_the_upstream_accepts_it(inventory_service, monkeypatch):
+    space = _seed(inventory_service)
+    monkeypatch.setattr(sync_module, "asyncio", _RecordingAsyncio())
+    upstream = StubUpstream({"spaces": [409] * 2})
+
+    first = _run_sync(inventory_service, upstream, max_retries=1, retry_backoff=0.1)
+
+    assert first["success"] is False
+    assert "409" in first["error"]
+    assert all(synced for synced, _ in _synced(inventory_service, Inventory).values())
+    assert _synced(inventory_service, Space)[space["id"]][0] is False
+    assert "elements" not in upstream.entities()
+
+    # El servidor acepta en la siguiente corrida: solo se reenvía lo rechazado
+    upstream.received.clear()
+    second = _run_sync(inventory_service, upstream, max_retries=1, retry_backoff=0.1)
+    assert second["success"] is True
+    assert upstream.received[0] == ("spaces", [space["id"]])
+    assert upstream.entities() == ["spaces", "elements"]
+
+
+def test_record_modified_after_sync_is_sent_again(inventory_service):
+    space = _seed(inventory_service)
+    upstream = StubUpstream()
+    _run_sync(inventory_service, upstream, retry_backoff=0)
+
+    session = inventory_service.db_manager.get_session()
+    try:
+        row = session.get(Space, space["id"])
+        row.description = "renovada"
+        session.commit()
+    finally:
+        session.close()
+
+    upstream.received.clear()
+    assert _run_sync(inventory_service, upstream, retry_backoff=0)["success"] is True
+    assert upstream.received == [("spaces", [space["id"]])]
+
+
+def test_origin_ids_outside_the_batch_are_ignored(inventory_service, monkeypatch):
+    first = inventory_service.enter_inventory(1, 2, 3)
+    second = inventory_service.enter_inventory(1, 2, 4)
+    monkeypatch.setattr(sync_module, "asyncio", _RecordingAsyncio())
+    # Lotes de uno: la respuesta del primero trae también un origin_id para el segundo,
+    # y el segundo lote es rechazado
+    upstream = StubUpstream({"inventories": [200] + [500] * 10}, extra_origin_ids={"inventories": {second["id"]: 99}})
+
+    stats = _run_sync(inventory_service, upstream, batch_size=1, max_retries=0, retry_backoff=0)
+
+    assert stats["success"] is False
+    assert upstream.received[0] == ("inventories", [first["id"]])
+    assert _synced(inventory_service, Inventory) == {first["id"]: (True, 1), second["id"]: (False, None)}
+
+
+def test_records_sharing_the_mark_timestamp_are_not_lost_across_a_batch_split(inventory_service, monkeypatch):
+    inventory_service.enter_inventory(1, 2, 3)
+    inventory_service.enter_inventory(1, 2, 4)
+    upstream = StubUpstream()
+    _run_sync(inventory_service, upstream, retry_backoff=0)
+
+    # Los dos se modifican en el mismo instante después de sincronizarse
+    tick = datetime(2030, 1, 1, 12, 0, 0)
+    session = inventory_service.db_manager.get_session()
+    try:
+        session.query(Inventory).update({"updated_at": tick}, synchronize_session=False)
+        session.commit()
+    finally:
+        session.close()
+    first, second = sorted(_synced(inventory_service, Inventory))
+
+    # Lotes de uno: el primero se acepta y el segundo se rechaza
+    monkeypatch.setattr(sync_module, "asyncio", _RecordingAsyncio())
+    upstream = StubUpstream({"inventories": [200] + [500] * 10})
+    assert _run_sync(inventory_service, upstream, batch_size=1, max_retries=0, retry_backoff=0)["success"] is False
+    assert upstream.received[0] == ("inventories", [first])
+
+    # El registro del mismo instante que quedó al otro lado del corte se reenvía
+    upstream = StubUpstream()
+    assert _run_sync(inventory_service, upstream, batch_size=1, retry_backoff=0)["success"] is True
+    assert upstream.received == [("inventories", [second])]
@@ -0,0 +1,90 @@
+import sqlite3
+import uuid
+
+import pytest
+
+from app import config
+from app.models.database import UUIDBinary, dispose_engines, normalize_uuid
+from app.services import session_context_cache
+from app.services.inventory_service import InventoryService
+
+
+def test_uuid_binary_round_trip():
+    value = str(uuid.uuid4())
+    column_type = UUIDBinary()
+
+    stored = column_type.process_bind_param(value, None)
+
+    assert stored == uuid.UUID(value).bytes
+    assert column_type.process_result_value(stored, None) == value
+    assert column_type.process_bind_param(None, None) is None
+
+
+@pytest.mark.parametrize("value", ["nope", "", 42, b"short"])
+def test_uuid_binary_rejects_values_that_are_not_uuids(value):
+    with pytest.raises(ValueError):
+        UUIDBinary().process_bind_param(value, None)
+
+
+def test_normalize_uuid_returns_the_canonical_form():
+    value = uuid.uuid4()
+
+    assert normalize_uuid(str(value).upper()) == str(value)
+    assert normalize_uuid(value) == str(value)
+    with pytest.raises(ValueError):
+        normalize_uuid("nope")
+
+
+def test_get_inventory_validates_the_id(inventory_service, api_get):
+    inventory = inventory_service.enter_inventory(1, 2, 3)
+
+    found, malformed, missing = api_get(
+        f"/api/v1/inventory?inventory_id={inventory['id']}",
+        "/api/v1/inventory?inventory_id=nope",
+        f"/api/v1/inventory?inventory_id={uuid.uuid4()}",
+    )
+
+    assert found[0] == 200 and found[1]["inventory"]["id"] == inventory["id"]
+    assert malformed == (400, {"success": False, "error": "Id no válido: 'nope'"})
+    assert missing[0] == 404
+    assert "SELECT" not in missing[1]["error"]
+
+
+def _id_types(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return {
+            table: conn.execute(f"SELECT DISTINCT typeof({column}) FROM {table}").fetchall()
+            for table, column in (("inventories", "id"), ("spaces", "inventory_id"), ("session_context", "current_space_id"))
+        }
+    finally:
+        conn.close()
+
+
+def _reopen(db_path, monkeypatch, storage):
+    """Abre la base de datos como un proceso nuevo con DB_UUID_STORAGE=storage."""
+    monkeypatch.setattr(config, "DB_UUID_STORAGE", storage)
+    dispose_engines()
+    monkeypatch.setattr(session_context_cache, "_caches", {})
+    return InventoryService(db_path)
+
+
+def test_uuid_storage_can_switch_to_text_and_back(db_path, monkeypatch):
+    service = _reopen(db_path, monkeypatch, "blob")
+    inventory = service.enter_inventory(1, 2, 3)
+    space = service.enter_space("cocina")
+    service.save_context()
+    assert set(sum(_id_types(db_path).values(), [])) == {("blob",)}
+
+    # DB_UUID_STORAGE=text: al abrir la base de datos los ids vuelven a ser texto
+    service = _reopen(db_path, monkeypatch, "text")
+    assert set(sum(_id_types(db_path).values(), [])) == {("text",)}
+    assert service.get_inventory(inventory["id"])["spaces"][0]["id"] == space["id"]
+    assert service.enter_space("baño")["inventory_id"] == inventory["id"]
+    service.save_context()
+
+    # Y de vuelta a BLOB, incluidas las filas escritas en modo texto
+    service = _reopen(db_path, monkeypatch, "blob")
+    assert set(sum(_id_types(db_path).values(), [])) == {("blob",)}
+    assert sorted(s["name"] for s in service.get_inventory(inventory["id"])["spaces"]) == ["baño", "cocina"]
+    assert service.get_context()["space_name"] == "baño"
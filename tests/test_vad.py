@@ -0,0 +1,70 @@
+import numpy as np
+
+from app.media.vad import EnergyVadGate
+
+SAMPLE_RATE = 16000
+CHUNK = 1600
+
+
+def _silence():
+    return np.zeros(CHUNK, dtype=np.int16).tobytes()
+
+
+def _speech(amplitude=8000):
+    t = np.arange(CHUNK) / SAMPLE_RATE
+    return (np.sin(2 * np.pi * 440 * t) * amplitude).astype(np.int16).tobytes()
+
+
+def test_silence_is_dropped_until_speech_starts():
+    gate = EnergyVadGate(SAMPLE_RATE, preroll_chunks=0)
+
+    assert gate.process(_silence()) == ([], False)
+    assert gate.process(_silence()) == ([], False)
+    assert gate.in_speech is False
+    assert gate.stats()["skipped_chunks"] == 2
+
+
+def test_preroll_sends_the_latest_silence_before_speech():
+    gate = EnergyVadGate(SAMPLE_RATE, preroll_chunks=1, hangover_chunks=0)
+    first, last = _silence(), np.full(CHUNK, 5, dtype=np.int16).tobytes()
+    speech = _speech()
+
+    gate.process(first)
+    gate.process(last)
+    chunks, end_of_speech = gate.process(speech)
+
+    # Solo el último silencio (pre-roll de 1) y el chunk de voz, en orden
+    assert chunks == [last, speech]
+    assert end_of_speech is False
+
+
+def test_hangover_forwards_trailing_chunks_then_signals_end_of_speech():
+    gate = EnergyVadGate(SAMPLE_RATE, preroll_chunks=0, hangover_chunks=2)
+    tail_1, tail_2 = _silence(), np.full(CHUNK, 3, dtype=np.int16).tobytes()
+
+    assert gate.process(_speech()) == ([_speech()], False)
+    assert gate.process(tail_1) == ([tail_1], False)
+    assert gate.process(tail_2) == ([tail_2], True)
+    assert gate.in_speech is False
+    assert gate.process(_silence()) == ([], False)
+
+
+def test_without_hangover_the_first_silence_ends_the_phrase():
+    gate = EnergyVadGate(SAMPLE_RATE, preroll_chunks=0, hangover_chunks=0)
+
+    gate.process(_speech())
+
+    assert gate.process(_silence()) == ([], True)
+
+
+def test_threshold_follows_the_noise_floor():
+    gate = EnergyVadGate(SAMPLE_RATE, min_rms=300.0, noise_ratio=2.5, preroll_chunks=0)
+    noise = _speech(amplitude=400)
+
+    for _ in range(50):
+        gate.process(noise)
+
+    # Con un piso de ruido de ~283 RMS el umbral sube por encima de ese ruido
+    assert gate.threshold > gate.energy(noise)
+    assert gate.process(noise) == ([], False)
+    assert gate.process(_speech())[0]
@@ -0,0 +1,70 @@
+import asyncio
+import time
+
+import numpy as np
+from av import VideoFrame
+
+from app import config
+from app.processor import VideoProcessorTrack
+
+
+class _FakeVideoTrack:
+    """Track de entrada: frames YUV de ruido, uno por cada recv()."""
+
+    def __init__(self):
+        self._rng = np.random.default_rng(0)
+
+    async def recv(self):
+        pixels = self._rng.integers(0, 255, (48, 64, 3), dtype=np.uint8)
+        return VideoFrame.from_ndarray(pixels, format="bgr24").reformat(format="yuv420p")
+
+
+def _processor(monkeypatch, **settings):
+    for name, value in settings.items():
+        monkeypatch.setattr(config, name, value)
+    return VideoProcessorTrack(_FakeVideoTrack(), lazy=True)
+
+
+def test_lazy_mode_decimates_idle_frames(monkeypatch):
+    processor = _processor(monkeypatch, VIDEO_IDLE_FRAME_STRIDE=3)
+
+    async def scenario():
+        for _ in range(9):
+            await processor.recv()
+
+    asyncio.run(scenario())
+
+    # Solo 1 de cada 3 frames llega a la caché y ninguno se puntúa
+    assert processor.count == 3
+    assert len(processor.frame_selector) == 0
+    assert processor.pipeline.stats()["frame_decimation"]["stage"]["dropped"] == 6
+
+
+def test_capture_burst_ends_once_enough_frames_are_scored(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    processor = _processor(
+        monkeypatch, VIDEO_IDLE_FRAME_STRIDE=3, CAPTURE_BURST_WINDOW_MS=2000,
+        CAPTURE_BURST_STRIDE=1, CAPTURE_BURST_MIN_FRAMES=3,
+    )
+
+    async def consume():
+        while True:
+            await processor.recv()
+            await asyncio.sleep(0.01)
+
+    async def scenario():
+        consumer = asyncio.create_task(consume())
+        await asyncio.sleep(0.05)
+        start = time.perf_counter()
+        try:
+            path = await processor.capture_frame()
+        finally:
+            consumer.cancel()
+        return path, time.perf_counter() - start
+
+    path, elapsed = asyncio.run(scenario())
+
+    assert path is not None and (tmp_path / path).exists()
+    # Tres frames a ~10 ms, muy por debajo de la ventana de 2 s
+    assert elapsed < 1.0
+    assert processor._capture_pending is False